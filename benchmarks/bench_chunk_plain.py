@@ -0,0 +1,94 @@
+# benchmarks/bench_chunk_plain.py
+"""
+chunk_plain on multi-MB inputs: the linear rewrite vs the original implementation.
+
+    python -m benchmarks.bench_chunk_plain [--mb 4] [--repeat 3] [--skip-reference]
+
+Each case is checked for byte-identical output before it is timed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from codebase_whisperer.chunking.plain import chunk_plain
+from codebase_whisperer.chunking.tests._plain_reference import chunk_plain as chunk_plain_reference
+
+
+def _markdown(size: int, rng: random.Random) -> str:
+    """Short paragraphs and headings: many tiny pieces for the min-size merge to move."""
+    out: List[str] = []
+    n = 0
+    while n < size:
+        para = rng.choice([
+            f"## Section {n}",
+            "- item " + "x" * rng.randint(5, 60),
+            "Lorem ipsum dolor sit amet. " * rng.randint(1, 4),
+        ])
+        out.append(para)
+        n += len(para) + 2
+    return "\n\n".join(out)
+
+
+def _properties(size: int, rng: random.Random) -> str:
+    """key=value lines in blank-line separated groups."""
+    out: List[str] = []
+    n = 0
+    while n < size:
+        line = f"app.module{rng.randint(0, 999)}.key{n}=value{rng.randint(0, 10**6)}"
+        out.append(line + ("\n\n" if rng.random() < 0.5 else "\n"))
+        n += len(out[-1])
+    return "".join(out)
+
+
+def _yaml_blob(size: int, rng: random.Random) -> str:
+    """One long paragraph (no blank lines): hard-split into sliceable segments."""
+    lines = [f"  key_{i}: {rng.randint(0, 10**9)}" for i in range(size // 20)]
+    return "\n".join(lines)
+
+
+CASES: List[Tuple[str, Callable[[int, random.Random], str], int, int]] = [
+    # name, generator, max_chars, min_chars
+    ("markdown", _markdown, 2400, 200),
+    ("markdown min>max", _markdown, 400, 2000),
+    ("properties", _properties, 2400, 1800),
+    ("yaml blob", _yaml_blob, 2400, 200),
+    # the merge phase re-joined the growing chunk on every step: quadratic in min_chars
+    ("properties merge", _properties, 120, 200_000),
+    ("markdown merge", _markdown, 400, 1_000_000),
+]
+
+
+def _time(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """Best of `repeat` runs, and the output."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--mb", type=float, default=4.0, help="input size per case, in MB")
+    ap.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    ap.add_argument("--skip-reference", action="store_true", help="only time the new implementation")
+    args = ap.parse_args()
+
+    size = int(args.mb * 1024 * 1024)
+    for name, gen, max_chars, min_chars in CASES:
+        text = gen(size, random.Random(0))
+        new_s, new_out = _time(lambda: chunk_plain(text, max_chars, min_chars), args.repeat)
+        line = f"{name:18s} {len(text) / 1e6:6.1f} MB  max={max_chars:<5d} min={min_chars:<8d} new={new_s:8.3f}s"
+        if not args.skip_reference:
+            ref_s, ref_out = _time(lambda: chunk_plain_reference(text, max_chars, min_chars), args.repeat)
+            assert new_out == ref_out, f"{name}: output differs from the reference"
+            line += f"  reference={ref_s:8.3f}s  x{ref_s / max(new_s, 1e-9):.1f}"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/bench_ts_defs.py
+"""
+Tree-sitter definition extraction: compiled queries vs the Python walkers.
+
+    python -m benchmarks.bench_ts_defs [--kb 512] [--repeat 3]
+
+Each case is checked for identical (symbol, code) output before it is timed.
+"parse" is the tree-sitter parse alone, which both engines pay.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from codebase_whisperer.chunking.t_sitter import extract_defs, get_ts_parser
+
+
+def _java(size: int, rng: random.Random) -> str:
+    out: List[str] = ["package com.example;\n"]
+    n = 0
+    while n < size:
+        cls = [f"public class Service{n} {{", "    private final Map<String, Integer> cache = new HashMap<>();"]
+        for m in range(rng.randint(3, 12)):
+            body = "\n".join(f"        total += values[{i}] * {rng.randint(1, 99)};" for i in range(rng.randint(2, 10)))
+            cls.append(f"    public int compute{m}(int[] values) {{\n        int total = 0;\n{body}\n        return total;\n    }}")
+        cls.append(f"    static class Inner{n} {{ void run() {{ System.out.println(\"x\"); }} }}")
+        cls.append("}")
+        out.append("\n".join(cls))
+        n += len(out[-1])
+    return "\n\n".join(out)
+
+
+def _python(size: int, rng: random.Random) -> str:
+    out: List[str] = []
+    n = 0
+    while n < size:
+        cls = [f"class Handler{n}:"]
+        for m in range(rng.randint(3, 12)):
+            body = "\n".join(f"        x = x * {rng.randint(1, 99)} + self.offset[{i}]" for i in range(rng.randint(2, 10)))
+            cls.append(f"    def step{m}(self, x):\n{body}\n        return x")
+        out.append("\n".join(cls))
+        out.append(f"def helper{n}(a, b):\n    return [a + i for i in range(b)]")
+        n += len(out[-1]) + len(out[-2])
+    return "\n\n".join(out) + "\n"
+
+
+def _typescript(size: int, rng: random.Random) -> str:
+    out: List[str] = []
+    n = 0
+    while n < size:
+        cls = [f"export class Store{n} {{", "  private items: Map<string, number> = new Map();"]
+        for m in range(rng.randint(3, 12)):
+            body = "\n".join(f"    acc += xs[{i}] * {rng.randint(1, 99)};" for i in range(rng.randint(2, 10)))
+            cls.append(f"  reduce{m}(xs: number[]): number {{\n    let acc = 0;\n{body}\n    return acc;\n  }}")
+        cls.append("}")
+        out.append("\n".join(cls))
+        out.append(f"export function make{n}(): Store{n} {{ return new Store{n}(); }}")
+        n += len(out[-1]) + len(out[-2])
+    return "\n\n".join(out) + "\n"
+
+
+def _markdown(size: int, rng: random.Random) -> str:
+    out: List[str] = []
+    n = 0
+    while n < size:
+        out.append(rng.choice([
+            f"## Section {n}",
+            f"### Detail {n}",
+            "- item " + "x" * rng.randint(5, 60),
+            "Lorem ipsum dolor sit amet. " * rng.randint(1, 4),
+        ]))
+        n += len(out[-1]) + 2
+    return "\n\n".join(out) + "\n"
+
+
+def _mybatis(size: int, rng: random.Random) -> str:
+    out: List[str] = ['<?xml version="1.0" encoding="UTF-8"?>\n<mapper namespace="com.example.UserMapper">']
+    n = 0
+    while n < size:
+        cols = ", ".join(f"col_{i}" for i in range(rng.randint(3, 12)))
+        out.append(
+            f'  <select id="find{n}" resultMap="Row{n % 7}">\n'
+            f"    SELECT {cols} FROM users\n"
+            f'    <where><if test="id != null">AND id = #{{id}}</if></where>\n'
+            f"  </select>"
+        )
+        out.append(f'  <resultMap id="Row{n}" type="User"><id column="id" property="id"/></resultMap>')
+        n += len(out[-1]) + len(out[-2])
+    out.append("</mapper>\n")
+    return "\n".join(out)
+
+
+CASES: List[Tuple[str, Callable[[int, random.Random], str]]] = [
+    ("java", _java),
+    ("python", _python),
+    ("typescript", _typescript),
+    ("markdown", _markdown),
+    ("xml", _mybatis),
+]
+
+
+def _time(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """Best of `repeat` runs, and the output."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--kb", type=float, default=512.0, help="input size per case, in KB")
+    ap.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    args = ap.parse_args()
+
+    size = int(args.kb * 1024)
+    for lang, gen in CASES:
+        parser, _ = get_ts_parser(lang)
+        if parser is None:
+            print(f"{lang:11s} skipped: no tree-sitter parser")
+            continue
+        text = gen(size, random.Random(0))
+        utf8 = text.encode("utf-8")
+        parse_s, _ = _time(lambda: parser.parse(utf8), args.repeat)
+        query_s, query_out = _time(lambda: extract_defs(lang, parser, text, engine="query"), args.repeat)
+        walk_s, walk_out = _time(lambda: extract_defs(lang, parser, text, engine="walk"), args.repeat)
+        assert query_out == walk_out, f"{lang}: query output differs from the walkers"
+        print(
+            f"{lang:11s} {len(utf8) / 1e3:7.0f} KB  defs={len(query_out):<6d} parse={parse_s:7.3f}s"
+            f"  query={query_s:7.3f}s  walk={walk_s:7.3f}s  x{walk_s / max(query_s, 1e-9):.1f}"
+            f"  (excl. parse x{(walk_s - parse_s) / max(query_s - parse_s, 1e-9):.1f})",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
-from .common import split_by_size
-from .t_sitter import get_ts_parser, extract_defs, chunk_defs_with_limits
-from .driver import chunk_text, ts_supported
+from .common import split_by_size, split_spans
+from .t_sitter import get_ts_parser, extract_defs, iter_defs, chunk_defs_with_limits
+from .driver import chunk_text, iter_chunks, ts_supported
+from .pool import ChunkPool
+from .incremental import ParseCache, chunk_text_incremental
 
-__all__ = ["chunk_text"]
+__all__ = ["chunk_text", "iter_chunks", "ChunkPool", "ParseCache", "chunk_text_incremental"]
@@ -1,7 +1,41 @@
-
-from typing import List
+from typing import List, Tuple
 import re
 
+# In a window text[start:limit], matches up to and including its last whitespace
+# char (the regex engine backtracks from the end, in C).
+_THROUGH_LAST_SPACE = re.compile(r".*\s", re.DOTALL)
+
+def split_spans(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of split_by_size(text, max_chars): each span ends at the
+    last whitespace boundary before the max_chars limit, or is a hard split of
+    max_chars when a single token is longer than that. Nothing is copied.
+    """
+    n = len(text)
+    if n <= max_chars:
+        return [(0, n)]
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while n - start > max_chars:
+        limit = start + max_chars
+        if text[limit].isspace() or text[limit - 1].isspace():
+            end = limit  # the limit already falls on a token boundary
+        else:
+            m = _THROUGH_LAST_SPACE.match(text, start, limit)
+            if m is not None:
+                end = m.end()  # just after the last whitespace before the limit
+            else:
+                # one token runs past the limit: hard split. A text that starts
+                # with such a token has always produced an empty first chunk.
+                if start == 0:
+                    spans.append((0, 0))
+                end = limit
+        spans.append((start, end))
+        start = end
+    if start < n:
+        spans.append((start, n))
+    return spans
+
 def split_by_size(text: str, max_chars: int) -> List[str]:
     """
     Split text into chunks no longer than max_chars.
@@ -10,18 +44,4 @@ def split_by_size(text: str, max_chars: int) -> List[str]:
     """
     if len(text) <= max_chars:
         return [text]
-    # split on safe boundaries
-    parts = re.split(r'(\n|\s)', text)
-    out, buf = [], ""
-    for p in parts:
-        if len(buf) + len(p) > max_chars:
-            out.append(buf)
-            buf = ""
-
-            while len(p) > max_chars:
-                out.append(p[:max_chars])
-                p = p[max_chars:]
-        buf += p
-    if buf:
-        out.append(buf)
-    return out
+    return [text[s:e] for s, e in split_spans(text, max_chars)]
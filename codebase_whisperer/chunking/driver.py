@@ -1,6 +1,7 @@
 # codebase_whisperer/chunking/driver.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .plain import chunk_plain
 from .t_sitter import core as tcore            # ← import the module, not the functions
@@ -10,7 +11,7 @@ from .t_sitter.parser import get_ts_parser
 Symbol = Optional[str]
 Chunk = Tuple[Symbol, str]
 
-__all__ = ["ts_supported", "get_parser", "chunk_text"]
+__all__ = ["ts_supported", "get_parser", "chunk_text", "iter_chunks"]
 
 def ts_supported(lang: str) -> bool:
     if not lang:
@@ -46,26 +47,60 @@ def chunk_text(
     - Otherwise: chunk_plain
     Returns: List[(symbol|None, chunk_text)]
     """
-    short = (lang or "text").split(".")[0]
-    ts_parser_cache = ts_parser_cache or {}
-
-    if ts_supported(short):
-        parser = get_parser(short, ts_parser_cache)
-        if parser is None:
-            pieces = chunk_plain(text, max_chars=max_chunk_chars, min_chars=min_chunk_chars)
-            return [(None, p) for p in pieces]
+    # NOTE: call through the module so tests can monkeypatch tcore.extract_defs
+    return list(_chunks(
+        lambda short, parser: tcore.extract_defs(short, parser, text),
+        lang=lang,
+        text=text,
+        max_chunk_chars=max_chunk_chars,
+        min_chunk_chars=min_chunk_chars,
+        ts_parser_cache=ts_parser_cache,
+    ))
 
-        # NOTE: call through the module so tests can monkeypatch tcore.extract_defs
-        defs: List[Tuple[str, str]] = tcore.extract_defs(short, parser, text)
+def iter_chunks(
+    *,
+    lang: str,
+    text: str,
+    max_chunk_chars: int,
+    min_chunk_chars: int = 0,
+    ts_parser_cache: Optional[Dict[str, Any]] = None,
+) -> Iterator[Chunk]:
+    """
+    chunk_text as a generator: tree-sitter chunks are yielded as the walk finds
+    each definition, so a consumer can start on the first chunks of a large file
+    before the rest exist. Same chunks, same order as chunk_text.
+    """
+    return _chunks(
+        lambda short, parser: tcore.iter_defs(short, parser, text),
+        lang=lang,
+        text=text,
+        max_chunk_chars=max_chunk_chars,
+        min_chunk_chars=min_chunk_chars,
+        ts_parser_cache=ts_parser_cache,
+    )
 
-        if not defs:
-            pieces = chunk_plain(text, max_chars=max_chunk_chars, min_chars=min_chunk_chars)
-            return [(None, p) for p in pieces]
+def _chunks(
+    defs_of: Callable[[str, Any], Iterable[Tuple[str, str]]],
+    *,
+    lang: str,
+    text: str,
+    max_chunk_chars: int,
+    min_chunk_chars: int,
+    ts_parser_cache: Optional[Dict[str, Any]],
+) -> Iterator[Chunk]:
+    short = (lang or "text").split(".")[0]
+    # `is None`, not `or`: an empty dict from the caller must still get warmed
+    ts_parser_cache = ts_parser_cache if ts_parser_cache is not None else {}
 
-        out: List[Chunk] = []
-        for piece, sym in tcore.chunk_defs_with_limits(defs, max_chunk_chars):
-            out.append((sym, piece))
-        return out
+    parser = get_parser(short, ts_parser_cache) if ts_supported(short) else None
+    if parser is not None:
+        defs = iter(defs_of(short, parser))
+        first = next(defs, None)
+        if first is not None:
+            for piece, sym in tcore.iter_defs_with_limits(itertools.chain((first,), defs), max_chunk_chars):
+                yield sym, piece
+            return
 
-    pieces = chunk_plain(text, max_chars=max_chunk_chars, min_chars=min_chunk_chars)
-    return [(None, p) for p in pieces]
\ No newline at end of file
+    # no parser / no defs -> plain chunking
+    for p in chunk_plain(text, max_chars=max_chunk_chars, min_chars=min_chunk_chars):
+        yield None, p
@@ -0,0 +1,395 @@
+# codebase_whisperer/chunking/incremental.py
+"""
+Incremental re-chunking of files that changed since their last chunking.
+
+ParseCache keeps, per file key, the definitions of the last chunking: span,
+a hash of the def's bytes, and the offsets and hashes of its chunks. That is
+all that goes to disk; the source bytes and the tree-sitter tree (trees do
+not serialize) are only kept in memory. chunk_text_incremental diffs the new
+text against the bytes in memory into one edit and hands tree-sitter
+`parse(new, old_tree)`; otherwise it parses from scratch. Either way, a def
+whose symbol and bytes hash as before is not split or hashed again: its
+cached chunks are reused.
+
+Error recovery in tree-sitter depends on the old tree it is given, so when
+either tree has syntax errors the incremental result is thrown away and the
+text is parsed from scratch. That keeps the chunks exactly chunk_text(...)'s.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .common import split_spans
+from .driver import Chunk, chunk_text, get_parser, ts_supported
+from .t_sitter.core import iter_def_spans
+
+__all__ = ["TextEdit", "text_edit", "ParseCache", "ChunkUpdate", "chunk_text_incremental", "open_parse_cache"]
+
+# a chunk of a def: (start, end) in the def's code, and the sha256 of that text
+Piece = Tuple[int, int, str]
+# (symbol, start_byte, end_byte, sha256 of the def's bytes, chars stripped from
+# the front of its text to get its code, its chunks)
+DefState = Tuple[str, int, int, str, int, List[Piece]]
+
+# bump when DefState changes; older cache files are ignored
+_FORMAT = 2
+
+
+def _sha256_text(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8", "replace")).hexdigest()
+
+
+def _sha256_bytes(utf8: bytes, start: int = 0, end: Optional[int] = None) -> str:
+    return hashlib.sha256(memoryview(utf8)[start:end]).hexdigest()
+
+
+# -------------------------
+# edits
+# -------------------------
+@dataclass(frozen=True)
+class TextEdit:
+    """One contiguous replacement, in tree-sitter's terms (bytes; (row, byte column) points)."""
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: Tuple[int, int]
+    old_end_point: Tuple[int, int]
+    new_end_point: Tuple[int, int]
+
+    @property
+    def delta(self) -> int:
+        return self.new_end_byte - self.old_end_byte
+
+
+def _common_prefix_len(a: bytes, b: bytes, limit: int) -> int:
+    # binary search on slice equality: each probe is a memcmp, so ~log2(n) of them
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: bytes, b: bytes, limit: int) -> int:
+    lo, hi = 0, limit
+    na, nb = len(a), len(b)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[na - mid:] == b[nb - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point(utf8: bytes, pos: int) -> Tuple[int, int]:
+    return utf8.count(b"\n", 0, pos), pos - (utf8.rfind(b"\n", 0, pos) + 1)
+
+
+def text_edit(old: bytes, new: bytes) -> Optional[TextEdit]:
+    """
+    The single edit turning `old` into `new`: everything between their common
+    prefix and common suffix. None when they are equal. Several scattered
+    changes come out as one edit spanning all of them.
+    """
+    if old == new:
+        return None
+    shortest = min(len(old), len(new))
+    start = _common_prefix_len(old, new, shortest)
+    # the suffix may not overlap the prefix in either text
+    tail = _common_suffix_len(old, new, shortest - start)
+    old_end, new_end = len(old) - tail, len(new) - tail
+    return TextEdit(
+        start_byte=start,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point(old, start),
+        old_end_point=_point(old, old_end),
+        new_end_point=_point(new, new_end),
+    )
+
+
+# -------------------------
+# cache
+# -------------------------
+@dataclass
+class _Entry:
+    lang: str
+    max_chars: int
+    sha256: str                 # of the UTF-8 text
+    defs: List[DefState]
+    tag: Optional[str] = None   # caller's label for this version of the file
+    utf8: Optional[bytes] = None  # in memory only, with the tree
+    tree: Any = None
+
+
+class ParseCache:
+    """
+    Last chunking of each file, by key (e.g. relpath).
+      - on disk under `cache_dir` (if given): one small JSON file of def spans
+        and hashes per key, so a later process can still reuse unchanged defs;
+        no source text is stored
+      - in memory: the same plus the source bytes and tree-sitter tree, for the
+        `max_trees` most recently used files, so a re-parse can reuse the tree
+    Safe to share between threads as long as one key is only chunked by one
+    thread at a time.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, *, max_trees: int = 64) -> None:
+        self.cache_dir = cache_dir
+        self.max_trees = max(0, int(max_trees))
+        self._mem: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        h = hashlib.sha1(key.encode("utf-8", "replace")).hexdigest()
+        return os.path.join(self.cache_dir or "", h + ".json")
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                return hit
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != _FORMAT or meta.get("key") != key:
+                return None  # older layout, or a hash collision on the file name
+            defs = [
+                (str(sym), int(a), int(b), str(dsha), int(lead), [(int(s), int(e), str(h)) for s, e, h in pieces])
+                for sym, a, b, dsha, lead, pieces in meta["defs"]
+            ]
+            return _Entry(
+                lang=str(meta["lang"]), max_chars=int(meta["max_chars"]), sha256=str(meta["sha256"]),
+                defs=defs, tag=meta.get("tag"),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            if self.max_trees > 0:
+                self._mem[key] = entry
+                self._mem.move_to_end(key)
+                while len(self._mem) > self.max_trees:
+                    self._mem.popitem(last=False)
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        meta = {
+            "format": _FORMAT,
+            "key": key,
+            "lang": entry.lang,
+            "max_chars": entry.max_chars,
+            "sha256": entry.sha256,
+            "tag": entry.tag,
+            "defs": [[sym, a, b, dsha, lead, [list(p) for p in pieces]] for sym, a, b, dsha, lead, pieces in entry.defs],
+        }
+        # write-then-rename: a reader never sees a torn file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(meta))  # dumps encodes in C; dump(f) does not
+        os.replace(tmp, path)
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._mem.pop(key, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def prune(self, keep) -> None:
+        """Drop every cached file whose key is not in `keep`."""
+        keep = set(keep)
+        with self._lock:
+            for key in [k for k in self._mem if k not in keep]:
+                del self._mem[key]
+        if not self.cache_dir:
+            return
+        wanted = {os.path.basename(self._path(key)) for key in keep}
+        for name in os.listdir(self.cache_dir):
+            if name not in wanted:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+# one cache per directory for the life of the process: watch mode runs ingest
+# again and again, and the in-memory trees are only useful if they survive that
+_OPEN_CACHES: Dict[str, ParseCache] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def open_parse_cache(cache_dir: str, *, max_trees: int = 64) -> ParseCache:
+    """The process-wide ParseCache for `cache_dir`."""
+    key = os.path.abspath(cache_dir)
+    with _OPEN_LOCK:
+        cache = _OPEN_CACHES.get(key)
+        if cache is None:
+            cache = _OPEN_CACHES[key] = ParseCache(key, max_trees=max_trees)
+        return cache
+
+
+# -------------------------
+# chunking
+# -------------------------
+@dataclass
+class ChunkUpdate:
+    chunks: List[Chunk]                 # same as chunk_text(...)
+    shas: List[str]                     # sha256 of each chunk's text
+    changed: List[bool]                 # per chunk: new since the cached chunking
+    # per chunk: the cached chunking had this very chunk (symbol and text) at this index
+    in_place: List[bool] = field(default_factory=list)
+    # (symbol, start_byte, end_byte) of each def that changed, in the new text
+    changed_spans: List[Tuple[str, int, int]] = field(default_factory=list)
+    edit: Optional[TextEdit] = None     # from the cached text, when it was still in memory
+    reparsed: bool = False              # tree-sitter reused the previous tree
+    prev_tag: Optional[str] = None      # `tag` the cached chunking was stored with
+
+
+def _all_changed(chunks: List[Chunk]) -> ChunkUpdate:
+    return ChunkUpdate(
+        chunks=chunks,
+        shas=[_sha256_text(piece) for _, piece in chunks],
+        changed=[True] * len(chunks),
+        in_place=[False] * len(chunks),
+    )
+
+
+def _lead(utf8: bytes, start: int, end: int, code: str) -> int:
+    """Chars stripped from the front of utf8[start:end]'s text to get `code`."""
+    raw = utf8[start:end].decode("utf-8", "replace")
+    return 0 if len(raw) == len(code) else len(raw) - len(raw.lstrip())
+
+
+def chunk_text_incremental(
+    *,
+    key: str,
+    lang: str,
+    text: str,
+    max_chunk_chars: int,
+    min_chunk_chars: int = 0,
+    parse_cache: ParseCache,
+    ts_parser_cache: Optional[Dict[str, Any]] = None,
+    tag: Optional[str] = None,
+) -> ChunkUpdate:
+    """
+    chunk_text for a file that may have been chunked before under `key`, with
+    the hashes of its chunks and which of them changed. Only tree-sitter
+    chunking is incremental; anything that falls back to plain chunking is
+    reported as entirely changed (and not cached). `tag` is stored with the
+    chunking and comes back as prev_tag on the next call, so the caller can
+    tell which version of the file `in_place` compares against.
+    """
+    short = (lang or "text").split(".")[0]
+    ts_parser_cache = ts_parser_cache if ts_parser_cache is not None else {}
+    parser = get_parser(short, ts_parser_cache) if ts_supported(short) else None
+    if parser is None:
+        parse_cache.forget(key)
+        return _all_changed(chunk_text(
+            lang=lang, text=text, max_chunk_chars=max_chunk_chars,
+            min_chunk_chars=min_chunk_chars, ts_parser_cache=ts_parser_cache,
+        ))
+
+    utf8 = text.encode("utf-8")
+    sha = _sha256_bytes(utf8)
+    prev = parse_cache.get(key)
+    if prev is not None and (prev.lang != short or prev.max_chars != max_chunk_chars):
+        prev = None
+    same = prev is not None and prev.sha256 == sha
+
+    edit = None
+    tree = prev.tree if same else None
+    reparsed = False
+    if not same and prev is not None and prev.tree is not None and prev.utf8 is not None:
+        edit = text_edit(prev.utf8, utf8)
+        try:
+            old_had_error = prev.tree.root_node.has_error
+            prev.tree.edit(
+                start_byte=edit.start_byte,
+                old_end_byte=edit.old_end_byte,
+                new_end_byte=edit.new_end_byte,
+                start_point=edit.start_point,
+                old_end_point=edit.old_end_point,
+                new_end_point=edit.new_end_point,
+            )
+            tree = parser.parse(utf8, prev.tree)
+            reparsed = True
+            if old_had_error or tree.root_node.has_error:
+                # recovery from a syntax error may differ from a fresh parse's
+                tree, reparsed = parser.parse(utf8), False
+        except Exception:
+            # the cached tree may be edited without matching bytes any more:
+            # drop it and parse from scratch (the def hashes are still good)
+            parse_cache.forget(key)
+            tree = None
+    if tree is None and not same and text.strip():
+        tree = parser.parse(utf8)
+
+    update = ChunkUpdate(
+        chunks=[], shas=[], changed=[], edit=edit, reparsed=reparsed,
+        prev_tag=prev.tag if prev is not None else None,
+    )
+    defs: List[DefState] = []
+    if same:
+        # byte-identical: the cached defs are the answer, no parse at all
+        defs = prev.defs
+        for sym, a, b, _, lead, pieces in defs:
+            code = utf8[a:b].decode("utf-8", "replace")[lead:]
+            for s, e, h in pieces:
+                update.chunks.append((sym or None, code[s:e]))
+                update.shas.append(h)
+                update.changed.append(False)
+    else:
+        spans = list(iter_def_spans(short, parser, text, tree=tree))
+        if not spans:
+            # chunk_text falls back to plain chunking here
+            parse_cache.forget(key)
+            return _all_changed(chunk_text(
+                lang=lang, text=text, max_chunk_chars=max_chunk_chars,
+                min_chunk_chars=min_chunk_chars, ts_parser_cache=ts_parser_cache,
+            ))
+        # same symbol and bytes -> same code -> same chunks, wherever the def moved
+        known: Dict[Tuple[str, str], DefState] = {}
+        for d in prev.defs if prev is not None else ():
+            known.setdefault((d[0], d[3]), d)
+        for sym, code, a, b in spans:
+            dsha = _sha256_bytes(utf8, a, b)
+            old = known.get((sym, dsha))
+            if old is not None:
+                lead, pieces = old[4], old[5]
+            else:
+                lead = _lead(utf8, a, b, code)
+                pieces = [(s, e, _sha256_text(code[s:e])) for s, e in split_spans(code, max_chunk_chars)]
+                update.changed_spans.append((sym, a, b))
+            defs.append((sym, a, b, dsha, lead, pieces))
+            for s, e, h in pieces:
+                update.chunks.append((sym or None, code[s:e]))
+                update.shas.append(h)
+                update.changed.append(old is None)
+
+    before = [(sym or None, h) for sym, _, _, _, _, pieces in (prev.defs if prev is not None else ()) for _, _, h in pieces]
+    update.in_place = [
+        i < len(before) and before[i] == (sym, h)
+        for i, ((sym, _), h) in enumerate(zip(update.chunks, update.shas))
+    ]
+    parse_cache.put(key, _Entry(
+        lang=short, max_chars=max_chunk_chars, sha256=sha, defs=defs, tag=tag, utf8=utf8, tree=tree,
+    ))
+    return update
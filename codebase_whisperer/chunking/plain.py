@@ -3,6 +3,8 @@ import re
 from typing import List, Iterable, Tuple
 from .common import split_by_size
 
+_SEP = "\n\n"  # separator between pieces of a chunk (never a piece itself: paragraphs have no blank lines)
+
 def _split_paragraph(p: str, max_chars: int) -> List[str]:
     """Hard-split a paragraph that exceeds max_chars without producing empty chunks."""
     if not p:
@@ -45,6 +47,7 @@ def chunk_plain(text: str, max_chars: int, min_chars: int) -> List[str]:
     # --- Phase 1: initial pack (cap by max_chars), keeping per-chunk piece boundaries/flags
     # chunk is List[Tuple[text, is_slice]]
     chunks: List[List[Tuple[str, bool]]] = []
+    lens: List[int] = []  # joined length of each chunk, kept in step with `chunks`
     cur: List[Tuple[str, bool]] = []
     cur_len = 0
 
@@ -70,34 +73,51 @@ def chunk_plain(text: str, max_chars: int, min_chars: int) -> List[str]:
             # flush current chunk, start a new one
             if cur:
                 chunks.append(cur)
+                lens.append(cur_len)
             cur = []
             cur_len = 0
             # piece is guaranteed <= max (by construction), so it fits into a fresh chunk
             _, cur_len = _append_piece(cur, cur_len, piece)
     if cur:
         chunks.append(cur)
+        lens.append(cur_len)
+
+    # Every step below only ever touches a receiver chunk and the chunk right
+    # after it, so chunks are walked once with cursors instead of pop(0)/pop(i+1),
+    # and lengths are kept as running totals instead of re-joining a chunk.
+    #   starts[c]: index of chunk c's first live piece (earlier ones were moved out)
+    #   lens[c]:   joined length of chunk c's live pieces
+    starts: List[int] = [0] * len(chunks)
+
+    def _skip_separators(c: int) -> None:
+        chunk, d = chunks[c], starts[c]
+        while d < len(chunk) and chunk[d][0] == _SEP:
+            lens[c] -= 2
+            d += 1
+        starts[c] = d
 
-    # Helper to convert chunk pieces -> text and length
-    def chunk_text_and_len(chunk: List[Tuple[str,bool]]) -> Tuple[str, int]:
-        # chunk includes explicit "\n\n" separators as pieces
-        s = "".join(t for (t, _flag) in chunk)
-        return s, len(s)
+    def _exhausted(c: int) -> bool:
+        return starts[c] >= len(chunks[c])
+
+    # indexes of the chunks still alive (donors emptied along the way drop out)
+    kept: List[int] = []
 
     # --- Phase 2A: if min_chars <= max_chars, try to raise non-final chunks using borrowing WITHOUT exceeding max_chars
     if min_chars <= max_chars:
         i = 0
-        while i < len(chunks) - 1:
-            # compute current text/len
-            cur_txt, cur_len = chunk_text_and_len(chunks[i])
+        while True:
+            kept.append(i)
+            nxt = i + 1  # donor: the chunk after i
+            if nxt >= len(chunks):
+                break
+            cur = chunks[i]
+            cur_len = lens[i]
 
             # while current chunk is too small and there is a donor
-            while cur_len < min_chars and i < len(chunks) - 1:
-                donor = chunks[i + 1]
-                if not donor:
+            while cur_len < min_chars and nxt < len(chunks):
+                if _exhausted(nxt):
                     # empty donor (shouldn’t happen), drop it
-                    chunks.pop(i + 1)
-                    if i >= len(chunks) - 1:
-                        break
+                    nxt += 1
                     continue
 
                 # room left in current chunk under max (account for separator if we take anything)
@@ -105,135 +125,135 @@ def chunk_plain(text: str, max_chars: int, min_chars: int) -> List[str]:
                 if room <= 0:
                     break
 
-                # Donor starts with either a separator piece (from earlier packing) or a real piece.
                 # Skip any leading separator in donor (we’ll add our own).
-                while donor and donor[0][0] == "\n\n":
-                    donor.pop(0)
-
-                if not donor:
-                    chunks.pop(i + 1)
-                    if i >= len(chunks) - 1:
-                        break
+                _skip_separators(nxt)
+                if _exhausted(nxt):
+                    nxt += 1
                     continue
 
-                first_text, first_is_slice = donor[0]
+                donor, d = chunks[nxt], starts[nxt]
+                first_text, first_is_slice = donor[d]
 
                 took_any = False
                 if first_is_slice:
                     # Allowed to slice: take only what fits in 'room'
                     take = min(room, len(first_text))
                     if take > 0:
-                        # append separator if current has content
                         if cur_len > 0:
-                            chunks[i].append(("\n\n", True))
+                            cur.append((_SEP, True))
                             cur_len += 2
                         head = first_text[:take]
                         tail = first_text[take:]
-                        chunks[i].append((head, True))
+                        cur.append((head, True))
                         cur_len += len(head)
+                        lens[nxt] -= len(head)
                         took_any = True
                         if tail:
-                            donor[0] = (tail, True)
+                            donor[d] = (tail, True)
                         else:
-                            donor.pop(0)
+                            starts[nxt] = d + 1
                 else:
                     # Whole paragraph: move it only if the whole piece fits
                     need = len(first_text)
                     if need <= room:
                         if cur_len > 0:
-                            chunks[i].append(("\n\n", True))
+                            cur.append((_SEP, True))
                             cur_len += 2
-                        chunks[i].append((first_text, False))
+                        cur.append((first_text, False))
                         cur_len += need
-                        donor.pop(0)
+                        lens[nxt] -= need
+                        starts[nxt] = d + 1
                         took_any = True
 
                 # Clean up donor if empty (also strip leading separators again)
-                while donor and donor[0][0] == "\n\n":
-                    donor.pop(0)
-                if not donor:
-                    chunks.pop(i + 1)
+                _skip_separators(nxt)
+                if _exhausted(nxt):
+                    nxt += 1
 
                 if not took_any:
                     # Can’t take more without exceeding max or breaking whole-paragraph rule
                     break
 
-            i += 1
+            lens[i] = cur_len
+            if nxt >= len(chunks):
+                break
+            i = nxt
 
         # Last-chunk tiny tail: try to absorb into previous only if it DOES NOT exceed max_chars
-        if len(chunks) >= 2:
-            last_txt, last_len = chunk_text_and_len(chunks[-1])
-            if last_len < min_chars:
-                prev_txt, prev_len = chunk_text_and_len(chunks[-2])
+        if len(kept) >= 2:
+            last, prev = kept[-1], kept[-2]
+            if lens[last] < min_chars:
+                prev_chunk = chunks[prev]
+                prev_len = lens[prev]
                 room = max_chars - prev_len - 2
                 if room > 0:
                     # move as much as fits (do not exceed max). Prefer whole-paragraph move if possible.
-                    donor = chunks[-1]
-                    # skip leading separators
-                    while donor and donor[0][0] == "\n\n":
-                        donor.pop(0)
-
-                    moved_any = False
-                    while donor and room > 0:
-                        t, is_slice = donor[0]
+                    _skip_separators(last)
+                    donor, d = chunks[last], starts[last]
+                    prev_has_text = len(prev_chunk) > starts[prev]
+
+                    while d < len(donor) and room > 0:
+                        t, is_slice = donor[d]
                         need = len(t)
                         if not is_slice and need <= room:
                             # move whole paragraph
-                            if chunks[-2]:
-                                chunks[-2].append(("\n\n", True))
+                            if prev_has_text:
+                                prev_chunk.append((_SEP, True))
                                 prev_len += 2
-                            chunks[-2].append(donor.pop(0))
+                            prev_chunk.append(donor[d])
+                            d += 1
                             prev_len += need
                             room = max_chars - prev_len - 2
-                            moved_any = True
                         elif is_slice:
                             take = min(room, need)
                             if take > 0:
-                                if chunks[-2]:
-                                    chunks[-2].append(("\n\n", True))
+                                if prev_has_text:
+                                    prev_chunk.append((_SEP, True))
                                     prev_len += 2
                                 head, tail = t[:take], t[take:]
-                                chunks[-2].append((head, True))
+                                prev_chunk.append((head, True))
                                 prev_len += len(head)
                                 room = max_chars - prev_len - 2
                                 if tail:
-                                    donor[0] = (tail, True)
+                                    donor[d] = (tail, True)
                                 else:
-                                    donor.pop(0)
-                                moved_any = True
+                                    d += 1
                             else:
                                 break
                         else:
                             # whole paragraph but doesn't fit; stop
                             break
+                        prev_has_text = True
 
+                    starts[last] = d
                     # drop last chunk if fully consumed
-                    if not donor:
-                        chunks.pop()
+                    if _exhausted(last):
+                        kept.pop()
 
     else:
         # --- Phase 2B: min_chars > max_chars → greedily collapse adjacent chunks (allowed to exceed max) until non-final chunks meet min
         i = 0
-        while i < len(chunks) - 1:
-            cur_txt, cur_len = chunk_text_and_len(chunks[i])
-            if cur_len >= min_chars:
-                i += 1
+        for nxt in range(1, len(chunks)):
+            if lens[i] >= min_chars:
+                kept.append(i)
+                i = nxt
                 continue
             # Merge whole next chunk (preserve paragraph boundaries)
             # ensure single separator between chunks
-            if chunks[i] and chunks[i][-1][0] != "\n\n":
-                chunks[i].append(("\n\n", True))
+            cur = chunks[i]
+            if cur and cur[-1][0] != _SEP:
+                cur.append((_SEP, True))
+                lens[i] += 2
             # skip any leading separators in donor
-            while chunks[i+1] and chunks[i+1][0][0] == "\n\n":
-                chunks[i+1].pop(0)
-            chunks[i].extend(chunks[i+1])
-            chunks.pop(i + 1)
-            # don’t advance i; we may need to keep merging
+            _skip_separators(nxt)
+            cur.extend(chunks[nxt][starts[nxt]:])
+            lens[i] += lens[nxt]
+        kept.append(i)
 
     # Materialize final strings
     out: List[str] = []
-    for chunk in chunks:
-        s, _ = chunk_text_and_len(chunk)
+    for c in kept:
+        s = "".join(t for (t, _flag) in chunks[c][starts[c]:])
         if s:  # avoid empties
             out.append(s)
-    return out
\ No newline at end of file
+    return out
@@ -0,0 +1,87 @@
+# codebase_whisperer/chunking/pool.py
+from __future__ import annotations
+import multiprocessing as mp
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .driver import Chunk, chunk_text, get_parser
+
+__all__ = ["ChunkPool"]
+
+# Per-process parser cache: filled by the first file of each language a worker
+# sees and reused by every later task that lands on the same process.
+_PROC_PARSER_CACHE: Dict[str, Any] = {}
+
+
+def _init_worker(warm_langs: Sequence[str]) -> None:
+    _PROC_PARSER_CACHE.clear()
+    for lang in warm_langs:
+        get_parser(lang, _PROC_PARSER_CACHE)
+
+
+def _chunk_many(
+    jobs: List[Tuple[str, str]],
+    max_chunk_chars: int,
+    min_chunk_chars: int,
+) -> List[List[Chunk]]:
+    return [
+        chunk_text(
+            lang=lang,
+            text=text,
+            max_chunk_chars=max_chunk_chars,
+            min_chunk_chars=min_chunk_chars,
+            ts_parser_cache=_PROC_PARSER_CACHE,
+        )
+        for lang, text in jobs
+    ]
+
+
+class ChunkPool:
+    """
+    chunk_text on a pool of worker processes, so tree-sitter parsing and the
+    Python def walkers use more than one core.
+      - files are sent in groups (one task per group) to amortize IPC
+      - each worker keeps its own parser cache for the life of the process
+    Output per file is exactly chunk_text(...)'s: List[(symbol|None, text)].
+
+    Workers are started with "spawn": the ingest pipeline already runs threads,
+    and forking a threaded process can deadlock the child.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        *,
+        max_chunk_chars: int,
+        min_chunk_chars: int = 0,
+        warm_langs: Iterable[str] = (),
+        start_method: str = "spawn",
+    ) -> None:
+        self.processes = max(1, int(processes))
+        self.max_chunk_chars = int(max_chunk_chars)
+        self.min_chunk_chars = int(min_chunk_chars)
+        self._ex = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=mp.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(tuple(warm_langs),),
+        )
+
+    def submit(self, records: Sequence[Any]) -> "Future[List[List[Chunk]]]":
+        """Chunk a group of FileRecords (anything with .lang/.content) in one task."""
+        jobs = [(r.lang or "text", r.content or "") for r in records]
+        return self._ex.submit(_chunk_many, jobs, self.max_chunk_chars, self.min_chunk_chars)
+
+    def chunk_files(self, records: Sequence[Any]) -> List[List[Chunk]]:
+        if not records:
+            return []
+        return self.submit(records).result()
+
+    def close(self) -> None:
+        self._ex.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ChunkPool":
+        return self
+
+    def __exit__(self, *exc: Optional[BaseException]) -> None:
+        self.close()
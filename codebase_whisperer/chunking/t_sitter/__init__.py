@@ -1,4 +1,4 @@
 from .parser import get_ts_parser
-from .core import extract_defs, chunk_defs_with_limits
+from .core import extract_defs, iter_defs, iter_def_spans, chunk_defs_with_limits, iter_defs_with_limits
 
-__all__ = ["get_ts_parser", "extract_defs", "chunk_defs_with_limits"]
+__all__ = ["get_ts_parser", "extract_defs", "iter_defs", "iter_def_spans", "chunk_defs_with_limits", "iter_defs_with_limits"]
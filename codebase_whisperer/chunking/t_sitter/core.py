@@ -1,11 +1,15 @@
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from ..common import split_by_size
 from .util import node_text
 
 from .lang_nodes import LANG_NODE_MAP
-from .walkers import walk_code, walk_markdown, walk_xml, normalize_sym
+from .walkers import iter_code_defs, iter_markdown_defs, iter_xml_defs, normalize_sym
+from .queries import defs_query, query_code_defs, query_markdown_defs, query_xml_defs
+
+CODE_LANGS = {"java","kotlin","groovy","typescript","tsx","javascript","python"}
+ENGINES = ("query", "walk")
 
 
 
@@ -20,13 +24,51 @@ def extract_defs(
         parser,
         text: str,
         lang_node_map: Optional[Dict[str, Any]] = None,
+        engine: str = "query",
 ) -> List[Tuple[str, str]]:
+    return list(iter_defs(lang_name, parser, text, lang_node_map, engine))
+
+
+def iter_defs(
+        lang_name: str,
+        parser,
+        text: str,
+        lang_node_map: Optional[Dict[str, Any]] = None,
+        engine: str = "query",
+) -> Iterator[Tuple[str, str]]:
+    """
+    extract_defs, yielding each (symbol, code) as the walk reaches it.
+
+    engine="query" matches definition nodes with a compiled tree-sitter query
+    and falls back to the Python walkers when the grammar/binding can't build
+    one; engine="walk" always uses the walkers. Both give the same output.
+    """
+    for sym, code, _start, _end in iter_def_spans(lang_name, parser, text, lang_node_map, engine):
+        yield sym, code
+
+
+def iter_def_spans(
+        lang_name: str,
+        parser,
+        text: str,
+        lang_node_map: Optional[Dict[str, Any]] = None,
+        engine: str = "query",
+        tree=None,
+) -> Iterator[Tuple[str, str, int, int]]:
+    """
+    iter_defs plus each def's node span: (symbol, code, start_byte, end_byte) in
+    text's UTF-8 bytes. `tree` is a parse of `text` to use instead of parsing it
+    here (e.g. an incremental re-parse).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
     if not text or not text.strip():
-        return []
+        return
 
     spec_map = lang_node_map or LANG_NODE_MAP
     utf8 = text.encode("utf-8")
-    tree = parser.parse(utf8)
+    if tree is None:
+        tree = parser.parse(utf8)
     root = tree.root_node
 
     key = _lang_key(parser, lang_name)
@@ -39,43 +81,61 @@ def extract_defs(
     )
 
     if spec is None:
-        return [("", text)]
+        yield ("", text, 0, len(utf8))
+        return
 
     extra: Dict[str, Any] = spec.get("extra", {})
 
-    defs: List[Tuple[str, str]] = []
-
-    def emit(symbol: Any, node):
-        sym_s = normalize_sym(symbol)
-        code = node_text(utf8, node).strip()
-        if code:
-            defs.append((sym_s, code))
-
-    if key_short in {"java","kotlin","groovy","typescript","tsx","javascript","python"}:
-        walk_code(root, spec=spec, utf8=utf8, emit=emit, container_sym=None)
+    query = None
+    if engine == "query":
+        if key_short in CODE_LANGS:
+            query_types = spec["class"] | spec["method"]
+        elif key_short == "markdown":
+            query_types = extra.get("heading_nodes", set())
+        elif key_short == "xml":
+            query_types = {"element"}
+        else:
+            query_types = set()
+        language = getattr(parser, "language", None)
+        if query_types and language is not None:
+            query = defs_query(language, query_types)
+
+    if key_short in CODE_LANGS:
+        if query is not None:
+            found = query_code_defs(root, query=query, spec=spec, utf8=utf8, container_sym=None)
+        else:
+            found = iter_code_defs(root, spec=spec, utf8=utf8, container_sym=None)
     elif key_short == "markdown":
-        walk_markdown(root, utf8=utf8, extra=extra, emit=emit)
+        if query is not None:
+            found = query_markdown_defs(root, query=query, utf8=utf8)
+        else:
+            found = iter_markdown_defs(root, utf8=utf8, extra=extra)
     elif key_short == "xml":
-        walk_xml(root, utf8=utf8, extra=extra, emit=emit, ns=None)
+        if query is not None:
+            found = query_xml_defs(root, query=query, utf8=utf8, extra=extra, ns=None)
+        else:
+            found = iter_xml_defs(root, utf8=utf8, extra=extra, ns=None)
     else:
-        for ch in getattr(root, "children", []):
-            emit("", ch)
+        found = (("", ch) for ch in getattr(root, "children", []))
 
-    out: List[Tuple[str, str]] = []
     seen: set[Tuple[str, str]] = set()
-    for sym, code in defs:
-        sym_s = normalize_sym(sym)
+    for symbol, node in found:
+        code = node_text(utf8, node).strip()
+        if not code:
+            continue
+        sym_s = normalize_sym(symbol)
         k = (sym_s, code[:120])
         if k in seen:
             continue
         seen.add(k)
-        out.append((sym_s, code))
-    return out
+        yield sym_s, code, node.start_byte, node.end_byte
 
 
 def chunk_defs_with_limits(defs: List[Tuple[str, str]], max_chars: int) -> List[Tuple[str, Optional[str]]]:
-    out: List[Tuple[str, Optional[str]]] = []
+    return list(iter_defs_with_limits(defs, max_chars))
+
+
+def iter_defs_with_limits(defs: Iterable[Tuple[str, str]], max_chars: int) -> Iterator[Tuple[str, Optional[str]]]:
     for sym, snippet in defs:
         for piece in split_by_size(snippet, max_chars):
-            out.append((piece, sym or None))
-    return out
\ No newline at end of file
+            yield piece, sym or None
\ No newline at end of file
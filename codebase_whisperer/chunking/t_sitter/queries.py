@@ -0,0 +1,134 @@
+# codebase_whisperer/chunking/t_sitter/queries.py
+"""
+Definition extraction driven by tree-sitter queries.
+
+The walkers visit every node of the tree in Python to find the handful that
+are classes, methods, headings or elements. Here those node types are compiled
+into one Query per language (from LANG_NODE_MAP, once per process) and the
+match runs in C; Python only sees the captured nodes. Symbols come from the
+same helpers the walkers use, and containers (enclosing class symbol, XML
+namespace) are threaded through a stack of byte ranges, so the output is the
+walkers' output in the same order.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .util import heading_text
+from .walkers import Def, DescendantNames, code_def_symbol, normalize_sym, xml_element_defs
+
+# (language, node types) -> compiled query | None. Languages compare by the
+# grammar they wrap, so every parser of one grammar shares the entry even
+# though each get_language() call hands out a new object.
+_QUERIES: Dict[Tuple[Any, frozenset], Optional[Any]] = {}
+
+
+def _has_kind(language, kind: str, named: bool) -> bool:
+    try:
+        return bool(language.id_for_node_kind(kind, named))
+    except Exception:
+        return False
+
+
+def _compile(language, source: str):
+    from tree_sitter import Query
+    try:
+        return Query(language, source)
+    except TypeError:
+        # py-tree-sitter < 0.23
+        return language.query(source)
+
+
+def defs_query(language, node_types: Iterable[str]) -> Optional[Any]:
+    """
+    A query capturing every node of the given types as @def, compiled once per
+    (language, types). Types the grammar does not have are left out, since an
+    unknown type fails the whole query. None when nothing is left or this
+    tree-sitter build has no query support; callers fall back to the walkers.
+    """
+    types = frozenset(t for t in node_types if t)
+    key = (language, types)
+    if key in _QUERIES:
+        return _QUERIES[key]
+
+    alts: List[str] = []
+    for t in sorted(types):
+        # the walkers compare node.type, which matches named and anonymous nodes alike
+        if _has_kind(language, t, True):
+            alts.append(f"({t})")
+        if _has_kind(language, t, False):
+            alts.append('"' + t.replace("\\", "\\\\").replace('"', '\\"') + '"')
+
+    query = None
+    if alts:
+        try:
+            query = _compile(language, f"[{' '.join(alts)}] @def")
+        except Exception:
+            query = None
+    _QUERIES[key] = query
+    return query
+
+
+def captured_nodes(query, root) -> List[Any]:
+    """Captured nodes in walk (pre-)order: by start, outer before inner."""
+    try:
+        from tree_sitter import QueryCursor  # py-tree-sitter >= 0.25
+        caps = QueryCursor(query).captures(root)
+    except ImportError:
+        caps = query.captures(root)
+    if isinstance(caps, dict):
+        nodes = [n for ns in caps.values() for n in ns]
+    else:  # py-tree-sitter < 0.23: [(node, capture name)]
+        nodes = [n for n, _name in caps]
+    nodes.sort(key=lambda n: (n.start_byte, -n.end_byte))
+    return nodes
+
+
+def _inside(node, start: int, end: int) -> bool:
+    return start <= node.start_byte < end and node.end_byte <= end
+
+
+def query_code_defs(
+        root,
+        *,
+        query,
+        utf8: bytes,
+        spec: Dict[str, Any],
+        container_sym: Optional[str] = None,
+        ) -> Iterator[Def]:
+    """iter_code_defs over the query's captures."""
+    class_types: set[str] = spec["class"]
+    name_child: Any = spec["name_child"]
+    descendant_text = DescendantNames()
+    outer = normalize_sym(container_sym)
+
+    # enclosing classes: (start_byte, end_byte, symbol)
+    classes: List[Tuple[int, int, str]] = []
+    for node in captured_nodes(query, root):
+        while classes and not _inside(node, classes[-1][0], classes[-1][1]):
+            classes.pop()
+        container_norm = classes[-1][2] if classes else outer
+        is_class = node.type in class_types
+        sym = code_def_symbol(utf8, node, container_norm, is_class, name_child, descendant_text)
+        yield sym, node
+        if is_class:
+            classes.append((node.start_byte, node.end_byte, sym))
+
+
+def query_markdown_defs(root, *, query, utf8: bytes) -> Iterator[Def]:
+    """iter_markdown_defs over the query's captures."""
+    for node in captured_nodes(query, root):
+        yield heading_text(utf8, node), node
+
+
+def query_xml_defs(root, *, query, utf8: bytes, extra, ns: Optional[str] = None) -> Iterator[Def]:
+    """iter_xml_defs over the query's captures (the query is for "element")."""
+    xml_cfg = extra.get("xml", {})
+    # enclosing elements: (start_byte, end_byte, namespace their children inherit)
+    elems: List[Tuple[int, int, Optional[str]]] = []
+    for node in captured_nodes(query, root):
+        while elems and not _inside(node, elems[-1][0], elems[-1][1]):
+            elems.pop()
+        current_ns = elems[-1][2] if elems else ns
+        next_ns, defs = xml_element_defs(utf8, node, current_ns, xml_cfg)
+        yield from defs
+        elems.append((node.start_byte, node.end_byte, next_ns))
@@ -1,12 +1,15 @@
 # codebase_whisperer/chunking/t_sitter/walkers.py
 from __future__ import annotations
-from typing import Any, List, Optional, Callable
+import re
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from .util import node_text, child_text_by_type, heading_text
 from .xml import xml_start_tag, xml_tag_name, xml_attr_value, xml_fallback_tag_name
 
 # ---- types ----
 EmitFn = Callable[[str, Any], None]
+Def = Tuple[str, Any]  # (symbol, node), in document order
 DescendantLookup = Callable[[Any, Optional[str]], Optional[str]]
 FieldNameText = Callable[[bytes, Any], Optional[str]]
 
@@ -63,14 +66,86 @@ def _first_name_from_candidates(utf8, node, name_child, _descendant_text_by_type
 def _descendant_text_by_type(utf8, node, type_name: Optional[str]) -> Optional[str]:
     if not type_name:
         return None
-    q = list(getattr(node, "children", []))
+    q = deque(getattr(node, "children", []))
     while q:
-        n = q.pop(0)
+        n = q.popleft()
         if n.type == type_name:
             return node_text(utf8, n).strip()
         q.extend(getattr(n, "children", []))
     return None
 
+def _node_key(node) -> Any:
+    # tree-sitter hands out a fresh Node object per access; .id is stable per tree
+    nid = getattr(node, "id", None)
+    return nid if nid is not None else id(node)
+
+class DescendantNames:
+    """
+    _descendant_text_by_type with a cache for one parse. The first lookup of a
+    type under a node resolves it for that node's whole subtree (one post-order
+    pass), so the nested class/method lookups that follow are dict hits and a
+    walk stays linear in the node count. Same answer as the BFS: the shallowest
+    match, leftmost among equals.
+    """
+
+    def __init__(self) -> None:
+        # (node key, type) -> (depth below the node, matching node) | None
+        self._first: Dict[Tuple[Any, str], Optional[Tuple[int, Any]]] = {}
+
+    def __call__(self, utf8, node, type_name: Optional[str]) -> Optional[str]:
+        if not type_name:
+            return None
+        hit = self._first_of_type(node, type_name)
+        return node_text(utf8, hit[1]).strip() if hit else None
+
+    def _first_of_type(self, node, type_name: str) -> Optional[Tuple[int, Any]]:
+        memo = self._first
+        root_key = (_node_key(node), type_name)
+        if root_key in memo:
+            return memo[root_key]
+        # iterative post-order: (node, children or None if not expanded yet)
+        stack: List[Tuple[Any, Optional[list]]] = [(node, None)]
+        while stack:
+            n, kids = stack.pop()
+            if kids is None:
+                kids = list(getattr(n, "children", []))
+                stack.append((n, kids))
+                stack.extend((ch, None) for ch in kids if (_node_key(ch), type_name) not in memo)
+                continue
+            best: Optional[Tuple[int, Any]] = None
+            for ch in kids:
+                if ch.type == type_name:
+                    cand: Optional[Tuple[int, Any]] = (1, ch)
+                else:
+                    below = memo[(_node_key(ch), type_name)]
+                    cand = (below[0] + 1, below[1]) if below else None
+                # strict <: among equally shallow matches the leftmost child wins
+                if cand is not None and (best is None or cand[0] < best[0]):
+                    best = cand
+            memo[(_node_key(n), type_name)] = best
+        return memo[root_key]
+
+
+def code_def_symbol(
+        utf8: bytes,
+        node,
+        container_norm: str,
+        is_class: bool,
+        name_child: Any,
+        descendant_text: DescendantLookup,
+        ) -> str:
+    """Symbol of one class/method node given its enclosing class symbol."""
+    name = _field_name_text(utf8, node) or _as_name(
+        _first_name_from_candidates(utf8, node, name_child, descendant_text)
+    )
+    if is_class:
+        sym = name or container_norm
+    elif container_norm and name:
+        sym = f"{container_norm}.{name}"
+    else:
+        sym = name or container_norm
+    return normalize_sym(sym)
+
 
 def walk_code(
         node,
@@ -80,108 +155,122 @@ def walk_code(
         emit:EmitFn,
         container_sym: Optional[str] = None
         ):
+    for sym, n in iter_code_defs(node, utf8=utf8, spec=spec, container_sym=container_sym):
+        emit(sym, n)
+
+def iter_code_defs(
+        node,
+        *,
+        utf8: bytes,
+        spec: Any | dict[str, Any] | None,
+        container_sym: Optional[str] = None,
+        ) -> Iterator[Def]:
+    """walk_code, yielding (symbol, node) as each definition is reached."""
     class_types: set[str] = spec["class"]
     method_types: set[str] = spec["method"]
     name_child: Any = spec["name_child"]
+    # name lookups below a node are shared by every def nested inside it
+    descendant_text = DescendantNames()
 
     def _walk(node, container_sym: Optional[str] = None):
         container_norm = normalize_sym(container_sym)
         next_container = container_norm or None
 
-
-        if node.type in class_types:
-            # cname_raw = _first_name_from_candidates(utf8, node, name_child, _descendant_text_by_type)
-            cname = _field_name_text(utf8, node) or _as_name(
-                _first_name_from_candidates(utf8, node, name_child, _descendant_text_by_type)
-            )
-            sym = cname or container_norm
-            sym = normalize_sym(sym)
-            emit(sym, node)
-            next_container = sym
-        elif node.type in method_types:
-            mname = _field_name_text(utf8, node) or _as_name(
-                _first_name_from_candidates(utf8, node, name_child, _descendant_text_by_type)
-                )
-
-            if container_norm and mname:
-                sym = f"{container_norm}.{mname}"
-            else:
-                sym = mname or container_norm
-            sym = normalize_sym(sym)
-            emit(sym, node)
+        if node.type in class_types or node.type in method_types:
+            is_class = node.type in class_types
+            sym = code_def_symbol(utf8, node, container_norm, is_class, name_child, descendant_text)
+            yield sym, node
+            if is_class:
+                next_container = sym
 
         for ch in getattr(node, "children", []):
-            _walk(ch, next_container)
+            yield from _walk(ch, next_container)
 
-    _walk(node, container_sym)
+    yield from _walk(node, container_sym)
 
     # # markdown
 def walk_markdown(node, *, utf8, extra, emit):
+    for sym, n in iter_markdown_defs(node, utf8=utf8, extra=extra):
+        emit(sym, n)
+
+def iter_markdown_defs(node, *, utf8, extra) -> Iterator[Def]:
     heads = extra.get("heading_nodes", set())
     def _walk(node):
         if node.type in heads:
-            emit(heading_text(utf8, node), node)
+            yield heading_text(utf8, node), node
         for ch in getattr(node, "children", []):
-            _walk(ch)
-    _walk(node)
+            yield from _walk(ch)
+    yield from _walk(node)
 
 def walk_xml(node, *, utf8, extra, emit, ns: Optional[str] = None):
-    import re
+    for sym, n in iter_xml_defs(node, utf8=utf8, extra=extra, ns=ns):
+        emit(sym, n)
 
-    xml_cfg = extra.get("xml", {})
+def xml_element_defs(utf8, node, current_ns: Optional[str], xml_cfg) -> Tuple[Optional[str], List[Def]]:
+    """The defs one <element> contributes, and the namespace its children inherit."""
     def_elems: set[str] = xml_cfg.get("def_elements", set())
     name_attrs: List[str] = xml_cfg.get("name_attrs", [])
     ns_attr: Optional[str] = xml_cfg.get("ns_attr")
 
+    defs: List[Def] = []
+    next_ns = current_ns
+    tag = xml_tag_name(utf8, node) or xml_fallback_tag_name(utf8, node)
+    st = xml_start_tag(node)
+
+    # --- namespace detection (attribute first, then regex fallback) ---
+    ns_val = None
+    if st and ns_attr:
+        ns_val = xml_attr_value(utf8, st, ns_attr)
+    if ns_val is None:
+        raw = node_text(utf8, st or node)
+        m = re.search(r'namespace\s*=\s*"([^"]+)"', raw)
+        if m:
+            ns_val = m.group(1)
+    if ns_val:
+        next_ns = ns_val
+
+    # --- emit mapper only for the <mapper> tag ---
+    if tag == "mapper":
+        defs.append(((f"{next_ns}.mapper" if next_ns else "mapper"), node))
+
+    # --- emit MyBatis defs like mapper.select#id, mapper.resultMap#id ---
+    if tag and (tag in def_elems):
+        ident = None
+        # prefer attribute extractor
+        if st:
+            for a in name_attrs:
+                ident = xml_attr_value(utf8, st, a)
+                if ident:
+                    break
+        # fallback: regex on raw start tag text
+        if not ident:
+            raw = node_text(utf8, st or node)
+            for a in name_attrs:
+                m = re.search(rf'{re.escape(a)}\s*=\s*"([^"]+)"', raw)
+                if m:
+                    ident = m.group(1)
+                    break
+
+        parts = []
+        if tag != "mapper":
+            parts.append("mapper")
+        parts.append(tag if not ident else f"{tag}#{ident}")
+        sym = ".".join(parts)
+        if next_ns:
+            sym = f"{next_ns}.{sym}"
+        defs.append((sym, node))
+
+    return next_ns, defs
+
+def iter_xml_defs(node, *, utf8, extra, ns: Optional[str] = None) -> Iterator[Def]:
+    xml_cfg = extra.get("xml", {})
+
     def _walk(node, current_ns:Optional[str] = None):
         next_ns = current_ns
         if node.type == "element":
-            tag = xml_tag_name(utf8, node) or xml_fallback_tag_name(utf8, node)
-            st = xml_start_tag(node)
-
-            # --- namespace detection (attribute first, then regex fallback) ---
-            ns_val = None
-            if st and ns_attr:
-                ns_val = xml_attr_value(utf8, st, ns_attr)
-            if ns_val is None:
-                raw = node_text(utf8, st or node)
-                m = re.search(r'namespace\s*=\s*"([^"]+)"', raw)
-                if m:
-                    ns_val = m.group(1)
-            if ns_val:
-                next_ns = ns_val
-
-            # --- emit mapper only for the <mapper> tag ---
-            if tag == "mapper":
-                emit(f"{next_ns}.mapper" if next_ns else "mapper", node)
-
-            # --- emit MyBatis defs like mapper.select#id, mapper.resultMap#id ---
-            if tag and (tag in def_elems):
-                ident = None
-                # prefer attribute extractor
-                if st:
-                    for a in name_attrs:
-                        ident = xml_attr_value(utf8, st, a)
-                        if ident:
-                            break
-                # fallback: regex on raw start tag text
-                if not ident:
-                    raw = node_text(utf8, st or node)
-                    for a in name_attrs:
-                        m = re.search(rf'{re.escape(a)}\s*=\s*"([^"]+)"', raw)
-                        if m:
-                            ident = m.group(1)
-                            break
-
-                parts = []
-                if tag != "mapper":
-                    parts.append("mapper")
-                parts.append(tag if not ident else f"{tag}#{ident}")
-                sym = ".".join(parts)
-                if next_ns:
-                    sym = f"{next_ns}.{sym}"
-                emit(sym, node)
+            next_ns, defs = xml_element_defs(utf8, node, current_ns, xml_cfg)
+            yield from defs
 
         for ch in getattr(node, "children", []):
-            _walk(ch, next_ns)
-    _walk(node, ns)
+            yield from _walk(ch, next_ns)
+    yield from _walk(node, ns)
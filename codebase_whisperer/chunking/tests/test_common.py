@@ -0,0 +1,48 @@
+# codebase_whisperer/chunking/tests/test_common.py
+import random
+import re
+
+from ..common import split_by_size, split_spans
+
+
+def _split_by_size_re(text: str, max_chars: int):
+    """The original re.split-based implementation, as the reference."""
+    if len(text) <= max_chars:
+        return [text]
+    parts = re.split(r'(\n|\s)', text)
+    out, buf = [], ""
+    for p in parts:
+        if len(buf) + len(p) > max_chars:
+            out.append(buf)
+            buf = ""
+            while len(p) > max_chars:
+                out.append(p[:max_chars])
+                p = p[max_chars:]
+        buf += p
+    if buf:
+        out.append(buf)
+    return out
+
+
+def test_prefers_whitespace_and_hard_splits_long_tokens():
+    assert split_by_size("aaa bbb ccc", 8) == ["aaa bbb ", "ccc"]
+    assert split_by_size("aaa bbb", 100) == ["aaa bbb"]
+    # a leading token longer than max_chars has always yielded an empty first piece
+    assert split_by_size("x" * 25 + " y", 10) == ["", "x" * 10, "x" * 10, "xxxxx y"]
+
+
+def test_spans_are_offsets_of_the_pieces():
+    text = "alpha beta\ngamma delta " * 50
+    spans = split_spans(text, 37)
+    assert [text[s:e] for s, e in spans] == split_by_size(text, 37)
+    assert all(e - s <= 37 for s, e in spans)
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+
+
+def test_matches_re_split_implementation():
+    rng = random.Random(7)
+    alphabet = ["a", "bb", " ", "\n", "\t", "x" * 7, "　", "\r\n"]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) * rng.randint(1, 12) for _ in range(rng.randint(0, 30)))
+        max_chars = rng.randint(1, 60)
+        assert split_by_size(text, max_chars) == _split_by_size_re(text, max_chars)
@@ -0,0 +1,226 @@
+# tests/test_incremental.py
+import hashlib
+import random
+
+import pytest
+
+from ..driver import chunk_text
+from .. import incremental
+from ..incremental import ParseCache, chunk_text_incremental, text_edit
+from ..t_sitter import get_ts_parser
+
+def _need(lang: str):
+    parser, _ = get_ts_parser(lang)
+    if not parser:
+        pytest.skip(f"tree-sitter parser not available for {lang}")
+    return parser
+
+def _sha(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+def _java_src(n_classes: int) -> str:
+    out = ["package com.example;"]
+    for c in range(n_classes):
+        methods = "\n".join(
+            f"    int m{m}(int x) {{\n        return x * {m} + {c};\n    }}" for m in range(6)
+        )
+        out.append(f"class C{c} {{\n{methods}\n}}")
+    return "\n\n".join(out) + "\n"
+
+# -----------------------
+# edits
+# -----------------------
+
+def test_text_edit_single_region_with_points():
+    old = b"ab\ncd\nef\n"
+    new = b"ab\ncXYd\nef\n"
+    e = text_edit(old, new)
+    assert (e.start_byte, e.old_end_byte, e.new_end_byte) == (4, 4, 6)
+    assert e.start_point == (1, 1) and e.old_end_point == (1, 1) and e.new_end_point == (1, 3)
+    assert text_edit(old, old) is None
+
+def test_text_edit_prefix_and_suffix_do_not_overlap():
+    # "aa" -> "aaa": prefix 2 + suffix 2 would overlap; the edit must stay well-formed
+    e = text_edit(b"aa", b"aaa")
+    assert e.start_byte + (2 - e.old_end_byte) == 2
+    assert 0 <= e.start_byte <= e.old_end_byte <= 2 and e.new_end_byte - e.start_byte == 1
+
+def test_text_edit_spans_scattered_changes():
+    rng = random.Random(5)
+    for _ in range(200):
+        old = bytes(rng.choice(b"ab\n") for _ in range(rng.randint(0, 30)))
+        new = bytearray(old)
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randint(0, len(new))
+            new[i:i + rng.randint(0, 2)] = bytes(rng.choice(b"ab\n") for _ in range(rng.randint(0, 2)))
+        new = bytes(new)
+        e = text_edit(old, new)
+        if old == new:
+            assert e is None
+            continue
+        # splicing the edit's new bytes into old gives new
+        assert old[:e.start_byte] + new[e.start_byte:e.new_end_byte] + old[e.old_end_byte:] == new
+
+# -----------------------
+# chunk_text_incremental
+# -----------------------
+
+def test_incremental_matches_chunk_text_and_reports_changed_defs(tmp_path):
+    _need("java")
+    cache = ParseCache(str(tmp_path))
+    src = _java_src(12)
+    first = chunk_text_incremental(key="A.java", lang="java", text=src, max_chunk_chars=400, parse_cache=cache)
+    assert first.chunks == chunk_text(lang="java", text=src, max_chunk_chars=400)
+    assert all(first.changed) and not first.reparsed
+
+    new = src.replace("return x * 3 + 7;", "return x * 3 + 7 + 1;")
+    upd = chunk_text_incremental(key="A.java", lang="java", text=new, max_chunk_chars=400, parse_cache=cache)
+    assert upd.reparsed
+    assert upd.chunks == chunk_text(lang="java", text=new, max_chunk_chars=400)
+    assert upd.shas == [_sha(p) for _, p in upd.chunks]
+    # only the edited method and the class around it
+    assert sorted({s for s, _, _ in upd.changed_spans}) == ["C7", "C7.m3"]
+    assert {sym for (sym, _), ch in zip(upd.chunks, upd.changed) if ch} == {"C7", "C7.m3"}
+
+def test_incremental_survives_a_new_process_through_the_disk_cache(tmp_path):
+    _need("java")
+    src = _java_src(8)
+    chunk_text_incremental(key="A.java", lang="java", text=src, max_chunk_chars=400, parse_cache=ParseCache(str(tmp_path)))
+
+    # a fresh cache has no trees: full parse, but the changes are still known
+    new = "// header\n" + src.replace("int m5(int x) {\n        return x * 5 + 2;", "int m5(int x) {\n        return 0;")
+    upd = chunk_text_incremental(key="A.java", lang="java", text=new, max_chunk_chars=400, parse_cache=ParseCache(str(tmp_path)))
+    assert not upd.reparsed
+    assert upd.chunks == chunk_text(lang="java", text=new, max_chunk_chars=400)
+    assert sorted({s for s, _, _ in upd.changed_spans}) == ["C2", "C2.m5"]
+
+def test_unchanged_defs_are_not_split_again_and_keep_their_rows(monkeypatch, tmp_path):
+    _need("java")
+    cache = ParseCache(str(tmp_path))
+    src = _java_src(4)
+    chunk_text_incremental(key="A.java", lang="java", text=src, max_chunk_chars=60, parse_cache=cache, tag="v1")
+
+    split = []
+    real_split = incremental.split_spans
+    monkeypatch.setattr(incremental, "split_spans", lambda code, n: split.append(code) or real_split(code, n))
+    # one more method at the end of C3: every earlier chunk keeps its index
+    new = src.replace("return x * 5 + 3;\n    }", "return x * 5 + 3;\n    }\n    void z() {}")
+    upd = chunk_text_incremental(key="A.java", lang="java", text=new, max_chunk_chars=60, parse_cache=cache, tag="v2")
+    assert upd.chunks == chunk_text(lang="java", text=new, max_chunk_chars=60)
+    assert [c.split("{")[0].strip() for c in split] == ["class C3", "void z()"]
+    assert upd.prev_tag == "v1"
+    old = chunk_text(lang="java", text=src, max_chunk_chars=60)
+    assert upd.in_place == [i < len(old) and old[i] == c for i, c in enumerate(upd.chunks)]
+    # C3 is the last class, so no unchanged def moved to another index
+    assert all(keep for keep, ch in zip(upd.in_place, upd.changed) if not ch)
+
+def test_cache_files_hold_no_source(tmp_path):
+    _need("python")
+    secret = "def f():\n    return 'hunter2'\n"
+    chunk_text_incremental(key="a.py", lang="python", text=secret, max_chunk_chars=100, parse_cache=ParseCache(str(tmp_path)))
+    (cached,) = tmp_path.iterdir()
+    assert "hunter2" not in cached.read_text(encoding="utf-8")
+
+def test_failed_reparse_falls_back_to_a_full_parse(tmp_path):
+    _need("python")
+    cache = ParseCache(str(tmp_path))
+    src = "def f():\n    return 1\n\ndef g():\n    return 2\n"
+    chunk_text_incremental(key="a.py", lang="python", text=src, max_chunk_chars=100, parse_cache=cache)
+
+    class BrokenTree:
+        def edit(self, **kw):
+            raise ValueError("tree no longer matches its bytes")
+
+    cache.get("a.py").tree = BrokenTree()
+    new = src.replace("return 2", "return 3")
+    upd = chunk_text_incremental(key="a.py", lang="python", text=new, max_chunk_chars=100, parse_cache=cache)
+    assert upd.chunks == chunk_text(lang="python", text=new, max_chunk_chars=100)
+    assert not upd.reparsed and [s for s, _, _ in upd.changed_spans] == ["g"]
+
+def test_edit_into_broken_syntax_matches_a_fresh_parse(tmp_path):
+    # tree-sitter recovers from these errors differently when handed the old tree
+    _need("java")
+    src = (
+        '        return new MockMultip(ar(t(File(\n'
+        '                "image/jpeg", // Lies!\n'
+        '           garbageData\n'
+        '        );\n'
+        '    }  private MockMultiparFile loadTestImage(String filename) {\n'
+        '        try (InputStream is = getClass().getResourceAsStream("/images/" + filename)) {\n'
+        'null) {\n'
+        '    }\n'
+        '    protected <T extends Notification> List<T> constructAndSaveDummyNotifications(List<Animal> animals, User registeredBy, Class<T> clazz) throws IOException {\n'
+        '        for (int i = 0; i < notificat;ions.size(); i++) {\n'
+        '            notification.setCreatxt(LocalDateTime.now()).minuays(i));\n'
+        '            if (\n'
+        'animals.size() == 1) {\n'
+        '    }}}'
+    )
+    new = src.replace("garbageData\n", "garbageData\n(")
+    cache = ParseCache(str(tmp_path))
+    chunk_text_incremental(key="A.java", lang="java", text=src, max_chunk_chars=400, parse_cache=cache)
+    upd = chunk_text_incremental(key="A.java", lang="java", text=new, max_chunk_chars=400, parse_cache=cache)
+    assert upd.chunks == chunk_text(lang="java", text=new, max_chunk_chars=400)
+    assert not upd.reparsed
+
+def test_incremental_random_edits_match_full_chunking(tmp_path):
+    _need("python")
+    rng = random.Random(11)
+    lines = []
+    for c in range(10):
+        lines.append(f"class K{c}:")
+        for m in range(5):
+            lines += [f"    def f{m}(self, x):", f"        return x + {c * m}", ""]
+    cache = ParseCache(str(tmp_path), max_trees=1)
+    for step in range(30):
+        j = rng.randrange(len(lines))
+        op = rng.random()
+        if op < 0.5:
+            lines[j] = lines[j] + "  # edit"
+        elif op < 0.8:
+            lines.insert(j, "    ")
+        else:
+            lines[j] = lines[j].replace("return", "return -")
+        text = "\n".join(lines) + "\n"
+        # another key in between evicts the tree now and then (max_trees=1)
+        if step % 4 == 0:
+            chunk_text_incremental(key="other.py", lang="python", text="def g(): pass\n", max_chunk_chars=120, parse_cache=cache)
+        upd = chunk_text_incremental(key="k.py", lang="python", text=text, max_chunk_chars=120, parse_cache=cache)
+        assert upd.chunks == chunk_text(lang="python", text=text, max_chunk_chars=120)
+        assert upd.shas == [_sha(p) for _, p in upd.chunks]
+
+def test_unchanged_text_needs_no_parse(tmp_path):
+    parser = _need("python")
+    cache = ParseCache(str(tmp_path))
+    src = "class A:\n    def m(self):\n        return 1\n"
+    first = chunk_text_incremental(key="a.py", lang="python", text=src, max_chunk_chars=100, parse_cache=cache,
+                                   ts_parser_cache={"python": parser})
+
+    class NoParse:
+        language = parser.language
+
+        def parse(self, *a, **kw):
+            raise AssertionError("parsed an unchanged file")
+
+    again = chunk_text_incremental(key="a.py", lang="python", text=src, max_chunk_chars=100,
+                                   parse_cache=ParseCache(str(tmp_path)), ts_parser_cache={"python": NoParse()})
+    assert again.chunks == first.chunks and not any(again.changed)
+
+def test_plain_fallback_is_all_changed_and_not_cached(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    upd = chunk_text_incremental(key="n.txt", lang="text", text="hello\n\nworld", max_chunk_chars=100, parse_cache=cache)
+    assert upd.chunks == chunk_text(lang="text", text="hello\n\nworld", max_chunk_chars=100)
+    assert all(upd.changed)
+    assert cache.get("n.txt") is None
+
+def test_prune_and_forget(tmp_path):
+    _need("python")
+    cache = ParseCache(str(tmp_path))
+    for key in ("a.py", "b.py", "c.py"):
+        chunk_text_incremental(key=key, lang="python", text="def f(): pass\n", max_chunk_chars=100, parse_cache=cache)
+    cache.prune({"a.py", "b.py"})
+    cache.forget("b.py")
+    fresh = ParseCache(str(tmp_path))
+    assert fresh.get("a.py") is not None
+    assert fresh.get("b.py") is None and fresh.get("c.py") is None
+    assert len(list(tmp_path.iterdir())) == 1  # a.py's defs
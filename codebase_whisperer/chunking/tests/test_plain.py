@@ -65,3 +65,22 @@ def test_preserves_order_and_content_after_splitting_and_merging():
     chunks = chunk_plain(text, max_chars=10, min_chars=15)
     # Should end up with two merged chunks: "alpha\n\nbeta" and "gamma\n\ndelta"
     assert chunks == ["alpha\n\nbeta\n\ngamma", "delta"]
+
+def test_matches_reference_implementation_byte_for_byte():
+    import random
+    from ._plain_reference import chunk_plain as chunk_plain_reference
+
+    rng = random.Random(1234)
+    alphabet = ["a", "b", " ", "\n", "\n\n", "\t", "xyz", " \n ", "word "]
+    for _ in range(3000):
+        text = "".join(rng.choice(alphabet) * rng.randint(1, 30) for _ in range(rng.randint(0, 40)))
+        max_chars, min_chars = rng.randint(1, 120), rng.randint(0, 200)
+        assert chunk_plain(text, max_chars, min_chars) == chunk_plain_reference(text, max_chars, min_chars)
+
+def test_large_min_merge():
+    # ~20k tiny paragraphs collapsed into a handful of huge chunks (the old
+    # implementation was quadratic here; benchmarks/bench_chunk_plain.py times it)
+    text = "\n\n".join(f"key{i}=value{i}" for i in range(20000))
+    chunks = chunk_plain(text, max_chars=40, min_chars=100000)
+    assert "\n\n".join(chunks) == text
+    assert all(len(c) >= 100000 for c in chunks[:-1])
@@ -0,0 +1,40 @@
+# tests/test_pool.py
+from types import SimpleNamespace
+
+from .. import driver
+from ..driver import chunk_text
+from ..pool import ChunkPool
+
+JAVA = """
+package com.example;
+public class Foo {
+    public Foo() {}
+    public String bar(int n) { return "" + n; }
+}
+"""
+TEXT = "\n\n".join(f"paragraph {i} " + "y" * 80 for i in range(20))
+
+
+def test_chunk_pool_matches_chunk_text():
+    recs = [
+        SimpleNamespace(lang="java", content=JAVA),
+        SimpleNamespace(lang="text", content=TEXT),
+        SimpleNamespace(lang=None, content=""),
+    ]
+    expected = [
+        chunk_text(lang=r.lang or "text", text=r.content, max_chunk_chars=300, min_chunk_chars=50)
+        for r in recs
+    ]
+    with ChunkPool(2, max_chunk_chars=300, min_chunk_chars=50) as pool:
+        assert pool.chunk_files(recs) == expected
+        assert pool.chunk_files([]) == []
+
+
+def test_chunk_text_fills_callers_empty_parser_cache(monkeypatch):
+    built = []
+    monkeypatch.setattr(driver, "get_ts_parser", lambda lang: (built.append(lang) or object(), None))
+    monkeypatch.setattr(driver.tcore, "extract_defs", lambda *a: [])
+    cache = {}
+    for _ in range(3):
+        chunk_text(lang="java", text="class A {}", max_chunk_chars=100, ts_parser_cache=cache)
+    assert built == ["java"] and "java" in cache
@@ -168,4 +168,142 @@ def test_chunk_defs_with_limits_splits_large_defs():
     assert any(s <= 1000 for s in sizes)
     # symbols preserved
     syms = [s for _, s in chunks]
-    assert "Foo.bar" in syms and "Foo" in syms
\ No newline at end of file
+    assert "Foo.bar" in syms and "Foo" in syms
+
+
+# -----------------------
+# Cached descendant name lookup (fake nodes, no grammar needed)
+# -----------------------
+
+class _Node:
+    """Minimal tree-sitter-like node: type, byte span, children (access counted)."""
+    visits = 0
+
+    def __init__(self, type_, start, end, children=()):
+        self.type, self.start_byte, self.end_byte = type_, start, end
+        self._children = list(children)
+
+    @property
+    def children(self):
+        _Node.visits += 1
+        return self._children
+
+def _random_tree(rng, utf8_len, depth=0):
+    start = rng.randrange(utf8_len)
+    kids = [] if depth > 5 else [_random_tree(rng, utf8_len, depth + 1) for _ in range(rng.randint(0, 3))]
+    return _Node(rng.choice(["identifier", "block", "modifiers", "type_identifier"]), start, min(utf8_len, start + 4), kids)
+
+def test_cached_descendant_lookup_matches_bfs():
+    import random
+    from ..t_sitter.walkers import DescendantNames, _descendant_text_by_type
+
+    rng = random.Random(3)
+    utf8 = bytes(rng.choice(b"abcdefgh ") for _ in range(400))
+    for _ in range(50):
+        root = _random_tree(rng, len(utf8))
+        cached = DescendantNames()
+        nodes, stack = [], [root]
+        while stack:
+            n = stack.pop()
+            nodes.append(n)
+            stack.extend(n._children)
+        for n in nodes:  # top-down, like the walkers
+            for t in ("identifier", "type_identifier", "missing"):
+                assert cached(utf8, n, t) == _descendant_text_by_type(utf8, n, t)
+
+def test_cached_descendant_lookup_is_linear():
+    from ..t_sitter.walkers import DescendantNames
+
+    # a "class" of 2000 nested blocks with no identifier anywhere: every level
+    # misses, which made the BFS re-walk the whole remaining chain each time
+    node = _Node("block", 0, 1)
+    chain = [node]
+    for _ in range(2000):
+        node = _Node("block", 0, 1, [node])
+        chain.append(node)
+    cached = DescendantNames()
+    _Node.visits = 0
+    for n in reversed(chain):
+        assert cached(b"x", n, "identifier") is None
+    assert _Node.visits <= len(chain)
+
+# -----------------------
+# Query engine vs walkers
+# -----------------------
+
+_ENGINE_FIXTURES = [
+    ("java", """
+package com.example;
+public class Outer {
+    public Outer() {}
+    void a() {}
+    interface Cb { void call(); }
+    static class Inner { int b(int x) { return x; } enum E { X; } }
+    void c() { new Runnable() { public void run() {} }; }
+}
+class Next { void d() {} }
+"""),
+    ("typescript", """
+export class Greeter {
+  greet(name: string) { return `hi ${name}`; }
+  nested() { class Local { m() {} } return Local; }
+}
+export default function deeplyNestedName() { return 1; }
+function top(a: number): number { return a + 1; }
+"""),
+    ("python", """
+class A:
+    def m(self): return 1
+    class B:
+        def n(self):
+            def inner(): pass
+            return inner
+
+def top(): pass
+def top(): pass
+"""),
+    ("markdown", "# Title\n\ntext\n\n## Sub\n\nmore\n\nSetext\n======\n"),
+    ("xml", """
+<mapper namespace="com.foo.UserMapper">
+  <resultMap id="UserMap" type="User"/>
+  <select id="findById" resultMap="UserMap">
+    SELECT * FROM users <where><if test="id != null">id = #{id}</if></where>
+  </select>
+  <sql id="cols">a, b</sql>
+</mapper>
+<mapper><insert id="add">INSERT</insert></mapper>
+"""),
+]
+
+@pytest.mark.parametrize("lang,src", _ENGINE_FIXTURES, ids=[l for l, _ in _ENGINE_FIXTURES])
+def test_query_engine_matches_walkers(lang, src):
+    from ..t_sitter.core import extract_defs as core_extract
+
+    parser = _need(lang)
+    by_query = core_extract(lang, parser, src, engine="query")
+    assert by_query
+    assert by_query == core_extract(lang, parser, src, engine="walk")
+
+def test_query_engine_compiles_once_and_skips_unknown_types():
+    from ..t_sitter.queries import defs_query
+
+    parser = _need("python")
+    q = defs_query(parser.language, {"class_definition", "function_definition", "no_such_node"})
+    assert q is not None
+    assert defs_query(parser.language, {"function_definition", "class_definition", "no_such_node"}) is q
+    assert defs_query(parser.language, {"no_such_node"}) is None
+
+def test_unknown_engine_rejected():
+    parser = _need("python")
+    with pytest.raises(ValueError):
+        extract_defs("python", parser, "def f(): pass", engine="fast")
+
+def test_query_cache_shared_across_parsers_of_one_grammar():
+    from ..t_sitter.queries import defs_query
+
+    first, _ = get_ts_parser("python")
+    second, _ = get_ts_parser("python")
+    if not first or not second:
+        pytest.skip("tree-sitter parser not available for python")
+    types = {"class_definition", "function_definition"}
+    assert defs_query(first.language, types) is defs_query(second.language, types)
@@ -22,6 +22,8 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "embed_model": "nomic-embed-text",  # mirrored from embedding.model
         "chat_model": "qwen2.5-coder:14b",
         "chat_context": 8192,
+        "pool_size": 10,       # pooled HTTP connections per host
+        "keep_alive": True,    # reuse TCP connections between requests
     },
     "indexing": {
         "include_globs": [
@@ -37,14 +39,37 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "min_chunk_chars": 200,
         "use_tree_sitter_java": True,
         "embed_batch_size": 24,
+        "embed_concurrency": 1,  # embed batches kept in flight at once
+        "reader_workers": 4,     # threads reading + hashing files
+        "chunker_workers": 1,    # threads running chunk_text
+        "chunk_processes": 0,    # > 0: chunk in a process pool of this size instead
+        "chunk_files_per_task": 8,  # files sent to a chunk process per task
+        "queue_size": 64,        # bound on each queue between ingest stages
+        "max_files_in_flight": 256,  # files between the walker and the embedder
         "flush_every": 2000,
+        "checkpoint_every_s": 30.0,  # flush at least this often so finished files survive a crash
+        "skip_unchanged": True,  # skip files whose (size, mtime) match the last ingest
+        "storage": "rows",       # "dedup": content + vector stored once per content_sha in "<table>_content"
+        "incremental_parse": False,  # keep def spans + chunk hashes (no source) in "<db_dir>/<table>_parse_cache"; re-chunk only changed defs
+        "parse_cache_trees": 64,  # incremental_parse: syntax trees kept in memory for tree-sitter re-parses
+        "delete_stale": True,    # drop rows for removed files / chunks past a file's new end
         "include_hidden": True,
         "follow_symlinks": False,
+        "walk_workers": 1,       # > 1: list directories on a thread pool (NFS etc.)
+        "walk_ordered": True,    # parallel walk still yields files in serial-walk order
+        "ignore_files": [],      # per-dir ignore files the walk honors, e.g. [".gitignore", ".ignore"]
+        "file_source": "walk",   # "git": list tracked files from the git index, re-ingest only changes
+        "watch_backend": "auto",  # watch mode: "watchdog" (inotify etc.), "poll", or "auto" (watchdog if installed)
+        "watch_debounce_s": 1.0,  # watch mode: quiet time that ends a batch of changes
+        "watch_max_wait_s": 10.0, # watch mode: cap on how long one batch keeps collecting
+        "watch_poll_s": 2.0,      # watch mode: re-walk interval for the polling backend
+        "watch_retry_s": 30.0,    # watch mode: retry a failed ingest after this long if nothing else changes
         "encodings": ["utf-8", "utf-8-sig", "cp932", "shift_jis", "cp1252", "latin-1"],
     },
     "retrieval": {
         "top_k": 12,
         "max_context_chars": 14000,
+        "collapse_duplicates": True,  # storage="dedup": one hit per distinct chunk, with all its locations
     },
 }
 
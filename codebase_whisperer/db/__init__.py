@@ -3,11 +3,24 @@ from .io import (
     open_db,                       # (db_dir) -> conn
     ensure_chunks,                 # (conn, table_name, embedding_dim) -> tbl
     ensure_vec_cache,              # (conn, embedding_dim) -> tbl
+    ensure_chunk_refs,             # (conn, table_name) -> tbl  (storage="dedup")
+    ensure_chunk_content,          # (conn, table_name, embedding_dim) -> tbl  ("<table>_content")
+    ensure_manifest,               # (conn, table_name) -> tbl  ("<table>_files")
+    load_manifest,                 # (manifest_tbl) -> {relpath: (size, mtime, sha256)}
+    ensure_meta,                   # (conn, table_name) -> tbl  ("<table>_meta")
+    load_meta,                     # (meta_tbl) -> {key: value}
+    ensure_checkpoint,             # (conn, table_name) -> tbl  ("<table>_checkpoint")
+    load_checkpoint,               # (checkpoint_tbl) -> {relpath: (size, mtime, chunks)}
     ensure_vector_index,           # (tbl, metric="cosine") -> None
     try_add_missing_columns,       # (tbl, {name: pa.type}) -> None
     upsert_rows,                   # (tbl, rows, on) -> None
     delete_where,                  # (tbl, where_sql) -> None
+    distinct_values,               # (tbl, column) -> set
+    rows_where,                    # (tbl, where_sql, columns) -> [dict]
+    sql_str,                       # (value) -> quoted SQL string literal
     load_vec_cache_map,            # (vcache_tbl, model) -> {sha: [float]}
+    load_vec_cache_matrix,         # (vcache_tbl, model) -> VecCacheMatrix {sha: row} + float32 matrix
+    VecCacheMatrix,
     validate_vectors,              # (rows, dim) -> None (raise on bad)
     table_counts,                  # (conn) -> {name: int}
     vacuum_table,                  # (tbl) -> None
@@ -1,12 +1,23 @@
 # codebase_whisperer/db/io.py
 from __future__ import annotations
 import os
-from typing import Dict, List
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import lancedb
 from rich import print as rprint
-from .schema import chunks_schema, vec_cache_schema
+from .schema import (
+    chunks_schema,
+    chunk_refs_schema,
+    chunk_content_schema,
+    vec_cache_schema,
+    manifest_schema,
+    meta_schema,
+    checkpoint_schema,
+)
 
 
 def open_db(db_dir: str) -> lancedb.db.DBConnection:
@@ -27,10 +38,90 @@ def ensure_chunks(db, table_name: str, embedding_dim: int):
     return _ensure_table(db, table_name, chunks_schema(embedding_dim))
 
 
+def content_table_name(table_name: str) -> str:
+    return f"{table_name}_content"
+
+
+def ensure_chunk_refs(db, table_name: str):
+    """storage="dedup": per-location rows, pointing at the content table by content_sha."""
+    return _ensure_table(db, table_name, chunk_refs_schema())
+
+
+def ensure_chunk_content(db, table_name: str, embedding_dim: int):
+    """storage="dedup": one (content, vector) row per content_sha, next to `table_name`."""
+    return _ensure_table(db, content_table_name(table_name), chunk_content_schema(embedding_dim))
+
+
 def ensure_vec_cache(db, embedding_dim: int):
     return _ensure_table(db, "vec_cache", vec_cache_schema(embedding_dim))
 
 
+def manifest_table_name(table_name: str) -> str:
+    return f"{table_name}_files"
+
+
+def ensure_manifest(db, table_name: str):
+    """Per-file (size, mtime, sha256) manifest stored next to `table_name`."""
+    return _ensure_table(db, manifest_table_name(table_name), manifest_schema())
+
+
+def load_manifest(manifest_tbl) -> Dict[str, Tuple[int, float, str]]:
+    """{relpath: (size, mtime, sha256)}; small table, read columnar."""
+    tbl = manifest_tbl.to_arrow()
+    if tbl.num_rows == 0:
+        return {}
+    return {
+        rel: (int(size), float(mtime), sha)
+        for rel, size, mtime, sha in zip(
+            tbl.column("relpath").to_pylist(),
+            tbl.column("size").to_pylist(),
+            tbl.column("mtime").to_pylist(),
+            tbl.column("sha256").to_pylist(),
+        )
+    }
+
+
+def meta_table_name(table_name: str) -> str:
+    return f"{table_name}_meta"
+
+
+def ensure_meta(db, table_name: str):
+    """Per-table key/value state (e.g. last ingested git commit) next to `table_name`."""
+    return _ensure_table(db, meta_table_name(table_name), meta_schema())
+
+
+def load_meta(meta_tbl) -> Dict[str, str]:
+    tbl = meta_tbl.to_arrow()
+    if tbl.num_rows == 0:
+        return {}
+    return dict(zip(tbl.column("key").to_pylist(), tbl.column("value").to_pylist()))
+
+
+def checkpoint_table_name(table_name: str) -> str:
+    return f"{table_name}_checkpoint"
+
+
+def ensure_checkpoint(db, table_name: str):
+    """Files fully written by the current (possibly interrupted) ingest of `table_name`."""
+    return _ensure_table(db, checkpoint_table_name(table_name), checkpoint_schema())
+
+
+def load_checkpoint(checkpoint_tbl) -> Dict[str, Tuple[int, float, int]]:
+    """{relpath: (size, mtime, chunk count)}; chunk count -1 = not re-chunked."""
+    tbl = checkpoint_tbl.to_arrow()
+    if tbl.num_rows == 0:
+        return {}
+    return {
+        rel: (int(size), float(mtime), int(n))
+        for rel, size, mtime, n in zip(
+            tbl.column("relpath").to_pylist(),
+            tbl.column("size").to_pylist(),
+            tbl.column("mtime").to_pylist(),
+            tbl.column("chunks").to_pylist(),
+        )
+    }
+
+
 def try_add_missing_columns(tbl, columns: Dict[str, pa.DataType]):
     """
     Best-effort migration: add missing columns to an existing LanceDB table.
@@ -106,22 +197,102 @@ def try_add_missing_columns(tbl, columns: Dict[str, pa.DataType]):
     except Exception as e:
         rprint(f"[yellow]Schema check/add columns skipped: {e}[/yellow]")
 
+def sql_str(v: str) -> str:
+    """Quote `v` as a SQL string literal for a where clause."""
+    return "'" + v.replace("'", "''") + "'"
+
+
+def _scan_vec_cache(vcache_tbl, model: str) -> pa.Table:
+    """
+    Read only (chunk_sha, vector) for `model`, with the filter pushed down to
+    LanceDB. Falls back to a full to_arrow() + Arrow-side filter on builds
+    without where()/select() on an empty query.
+    """
+    try:
+        return (
+            vcache_tbl.search()
+            .where(f"model = {sql_str(model)}")
+            .select(["chunk_sha", "vector"])
+            .limit(None)
+            .to_arrow()
+        )
+    except (AttributeError, TypeError, NotImplementedError):
+        # older builds: no search() without a query vector, or no where()/select()
+        tbl = vcache_tbl.to_arrow()
+        tbl = tbl.filter(pc.equal(tbl["model"], model))
+        return tbl.select(["chunk_sha", "vector"])
+
+
 def load_vec_cache_map(vcache_tbl, model: str) -> Dict[str, List[float]]:
     """
-    Build {chunk_sha: vector} for the given model without assuming .scan()
-    or columns= support on to_arrow(). Normalize vector floats to avoid
-    float32 noise in equality checks.
+    Build {chunk_sha: vector} for the given model. Normalize vector floats to
+    avoid float32 noise in equality checks.
+    Prefer load_vec_cache_matrix() for large caches; this materializes every float.
     """
     cache: Dict[str, List[float]] = {}
-    tbl = vcache_tbl.to_arrow()
-    for row in tbl.to_pylist():
-        if row.get("model") == model:
-            vec = row["vector"]
-            # Normalize floats so tests comparing lists pass deterministically.
-            norm = [round(float(x), 6) for x in vec]
-            cache[row["chunk_sha"]] = norm
+    for row in _scan_vec_cache(vcache_tbl, model).to_pylist():
+        # Normalize floats so tests comparing lists pass deterministically.
+        cache[row["chunk_sha"]] = [round(float(x), 6) for x in row["vector"]]
     return cache
 
+
+@dataclass
+class VecCacheMatrix:
+    """
+    Compact vec_cache view: {chunk_sha: row} over one contiguous float32 matrix.
+    Supports `sha in m`, `m[sha]` (a float32 row view) and `m[sha] = vec`; vectors
+    added after loading live in a small side dict instead of growing the matrix.
+    """
+    index: Dict[str, int]
+    vectors: np.ndarray                       # shape (n, dim), float32
+    added: Dict[str, List[float]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.index) + sum(1 for k in self.added if k not in self.index)
+
+    def __contains__(self, sha: object) -> bool:
+        return sha in self.added or sha in self.index
+
+    def __getitem__(self, sha: str):
+        if sha in self.added:
+            return self.added[sha]
+        return self.vectors[self.index[sha]]
+
+    def __setitem__(self, sha: str, vec: List[float]) -> None:
+        self.added[sha] = vec
+
+    def get(self, sha: str, default=None):
+        return self[sha] if sha in self else default
+
+
+def load_vec_cache_matrix(vcache_tbl, model: str) -> VecCacheMatrix:
+    """
+    Columnar loader: filter on `model` in LanceDB, read only chunk_sha + vector as
+    Arrow, and view the vectors as one (n, dim) float32 NumPy matrix without
+    creating per-float Python objects. Duplicate shas keep the last row.
+    """
+    tbl = _scan_vec_cache(vcache_tbl, model)
+    vec_type = vcache_tbl.schema.field("vector").type
+    dim = int(getattr(vec_type, "list_size", 0) or 0)
+
+    vec_col = tbl.column("vector").combine_chunks()
+    if tbl.num_rows == 0:
+        return VecCacheMatrix(index={}, vectors=np.empty((0, dim), dtype=np.float32))
+
+    if isinstance(vec_col, pa.FixedSizeListArray):
+        dim = vec_col.type.list_size
+        # .values ignores the parent's offset; flatten() honours it
+        flat = vec_col.flatten()
+    else:
+        # variable-size list<float> tables (older schemas): all rows must agree
+        flat = vec_col.flatten()
+        dim = len(flat) // tbl.num_rows
+    vectors = flat.to_numpy(zero_copy_only=False).astype(np.float32, copy=False).reshape(-1, dim)
+
+    shas = tbl.column("chunk_sha").to_pylist()
+    index = {sha: i for i, sha in enumerate(shas)}
+    return VecCacheMatrix(index=index, vectors=vectors)
+
 def upsert_rows(tbl, rows: List[dict], on: str | List[str]) -> None:
     if not rows:
         return
@@ -165,7 +336,6 @@ def upsert_rows(tbl, rows: List[dict], on: str | List[str]) -> None:
                 tbl.add(rows)
 
 # ---- extras: safe, optional helpers for DB black box -----------------
-from typing import Iterable, Optional
 
 def ensure_vector_index(tbl, *, column: str = "vector", metric: str = "cosine") -> None:
     """
@@ -230,6 +400,26 @@ def delete_where(tbl, where_sql: str) -> None:
         return
 
 
+def distinct_values(tbl, column: str) -> set:
+    """
+    Distinct values of one column, reading only that column when the build
+    supports select() on an empty query.
+    """
+    try:
+        arr = tbl.search().select([column]).limit(None).to_arrow().column(column)
+    except Exception:
+        arr = tbl.to_arrow().column(column)
+    return set(pc.unique(arr).to_pylist())
+
+
+def rows_where(tbl, where_sql: str, columns: List[str]) -> List[dict]:
+    """Rows matching `where_sql`, only `columns`; filtered in Lance when the build allows."""
+    try:
+        return tbl.search().where(where_sql).select(columns).limit(None).to_arrow().to_pylist()
+    except Exception:
+        return tbl.to_lance().to_table(columns=columns, filter=where_sql).to_pylist()
+
+
 def validate_vectors(rows: Iterable[dict], dim: int, *, key: str = "vector") -> list[dict]:
     """
     Ensure vectors are present & correct length. Coerce to float and normalize precision.
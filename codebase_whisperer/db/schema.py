@@ -19,9 +19,44 @@ def chunks_schema(embedding_dim: int) -> pa.schema:
         ("vector", pa.list_(pa.float32(), embedding_dim)),# embedding vector,  # embedding vector
     ])
 
+def chunk_refs_schema() -> pa.schema:
+    """storage="dedup": chunks_schema minus content/vector, which live in the content table."""
+    return pa.schema([f for f in chunks_schema(1) if f.name not in ("content", "vector")])
+
+def chunk_content_schema(embedding_dim: int) -> pa.schema:
+    return pa.schema([
+        ("content_sha", pa.string()), # sha256(text content) (key)
+        ("content", pa.string()),     # text content, stored once however many files repeat it
+        ("vector", pa.list_(pa.float32(), embedding_dim)),
+    ])
+
 def vec_cache_schema(embedding_dim: int) -> pa.schema:
     return pa.schema([
         ("chunk_sha", pa.string()),   # content_sha
         ("model", pa.string()),
         ("vector", pa.list_(pa.float32(), embedding_dim)),
-    ])
\ No newline at end of file
+    ])
+
+def manifest_schema() -> pa.schema:
+    return pa.schema([
+        ("relpath", pa.string()),     # path relative to repo root (key)
+        ("size", pa.int64()),         # st_size at ingest time
+        ("mtime", pa.float64()),      # st_mtime at ingest time
+        ("sha256", pa.string()),      # file-byte hash of REAL file
+    ])
+
+
+def meta_schema() -> pa.schema:
+    return pa.schema([
+        ("key", pa.string()),         # e.g. "git_commit"
+        ("value", pa.string()),
+    ])
+
+
+def checkpoint_schema() -> pa.schema:
+    return pa.schema([
+        ("relpath", pa.string()),     # file whose rows all landed in the current run (key)
+        ("size", pa.int64()),         # st_size it was ingested at
+        ("mtime", pa.float64()),      # st_mtime it was ingested at
+        ("chunks", pa.int64()),       # its new chunk count; -1 = not re-chunked
+    ])
@@ -9,6 +9,7 @@ from ..io import (
     ensure_vec_cache,
     try_add_missing_columns,
     load_vec_cache_map,
+    load_vec_cache_matrix,
     upsert_rows,
 )
 from ..schema import chunks_schema, vec_cache_schema
@@ -109,4 +110,37 @@ def test_load_vec_cache_map_filters_by_model(tmp_path: Path):
     assert set(cache_m1.keys()) == {"X","Z"}
     assert set(cache_m2.keys()) == {"Y"}
     assert cache_m1["X"] == [0.1,0.2,0.3,0.4]
-    assert cache_m2["Y"] == [0.9,0.8,0.7,0.6]
\ No newline at end of file
+    assert cache_m2["Y"] == [0.9,0.8,0.7,0.6]
+
+
+def test_load_vec_cache_matrix_is_columnar_and_model_filtered(tmp_path: Path):
+    import numpy as np
+
+    db = open_db(str(tmp_path / "ldb"))
+    vcache = ensure_vec_cache(db, embedding_dim=4)
+    rows = [
+        {"chunk_sha":"X", "model":"m1", "vector":[0.1,0.2,0.3,0.4]},
+        {"chunk_sha":"Y", "model":"m'2", "vector":[0.9,0.8,0.7,0.6]},
+        {"chunk_sha":"Z", "model":"m1", "vector":[0.0,0.0,1.0,1.0]},
+    ]
+    upsert_rows(vcache, rows, on=["chunk_sha","model"])
+
+    m1 = load_vec_cache_matrix(vcache, "m1")
+    assert set(m1.index) == {"X","Z"}
+    assert m1.vectors.dtype == np.float32
+    assert m1.vectors.shape == (2, 4)
+    assert np.allclose(m1["Z"], [0.0,0.0,1.0,1.0])
+    assert "Y" not in m1
+
+    # quotes in the model name are escaped in the pushed-down filter
+    m2 = load_vec_cache_matrix(vcache, "m'2")
+    assert list(m2.index) == ["Y"]
+
+    # vectors added after loading are visible without touching the matrix
+    m1["W"] = [1.0, 1.0, 1.0, 1.0]
+    assert "W" in m1 and len(m1) == 3
+    assert m1.vectors.shape == (2, 4)
+
+    empty = load_vec_cache_matrix(vcache, "nope")
+    assert len(empty) == 0
+    assert empty.vectors.shape == (0, 4)
@@ -0,0 +1,124 @@
+# codebase_whisperer/indexing/gitsource.py
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+
+from .walker import WalkEntry, compile_globs
+
+# File listing from git instead of a filesystem walk:
+#   - tracked_files(): paths + blob SHAs straight from the index (`git ls-files -s`)
+#   - changed_files(): paths that differ between a commit and the working tree
+#     (`git diff <commit>`: commits since then, staged and unstaged edits)
+# Only tracked files are considered, so .gitignore'd trees never show up.
+
+_MODE_SYMLINK = "120000"
+_MODE_SUBMODULE = "160000"
+
+
+def _git(root: str | os.PathLike[str], *args: str) -> Optional[bytes]:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(root), *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout
+
+
+def is_git_checkout(root: str | os.PathLike[str]) -> bool:
+    out = _git(root, "rev-parse", "--is-inside-work-tree")
+    return out is not None and out.strip() == b"true"
+
+
+def head_commit(root: str | os.PathLike[str]) -> Optional[str]:
+    out = _git(root, "rev-parse", "--verify", "--quiet", "HEAD")
+    return out.decode().strip() if out else None
+
+
+def tracked_files(root: str | os.PathLike[str], *, follow_symlinks: bool = False) -> Dict[str, str]:
+    """{relpath (POSIX, relative to root): blob sha} for files in the index; no submodules."""
+    out = _git(root, "ls-files", "-s", "-z")
+    if out is None:
+        return {}
+    files: Dict[str, str] = {}
+    for rec in out.split(b"\0"):
+        if not rec:
+            continue
+        meta, _, path = rec.partition(b"\t")
+        mode, blob, _stage = meta.decode().split(" ")
+        if mode == _MODE_SUBMODULE or (mode == _MODE_SYMLINK and not follow_symlinks):
+            continue
+        files[os.fsdecode(path)] = blob  # merge conflicts list a path per stage; any blob will do
+    return files
+
+
+def changed_files(root: str | os.PathLike[str], since: str) -> Optional[Set[str]]:
+    """
+    Relpaths that differ between commit `since` and the working tree (added,
+    modified, deleted, either side of a rename). None if `since` is unknown
+    (e.g. history was rewritten): callers should treat everything as changed.
+    """
+    out = _git(root, "diff", "--name-only", "--no-renames", "--relative", "-z", since, "--")
+    if out is None:
+        return None
+    return {os.fsdecode(p) for p in out.split(b"\0") if p}
+
+
+def iter_git_entries(
+    root: str | os.PathLike[str],
+    include_globs: Iterable[str],
+    exclude_globs: Iterable[str],
+    *,
+    max_file_mb: Optional[float] = None,
+    follow_symlinks: bool = False,
+    include_hidden: bool = True,
+    tracked: Optional[Dict[str, str]] = None,
+    only: Optional[Set[str]] = None,
+    on_skipped: Optional[Callable[[str], None]] = None,
+) -> Iterator[WalkEntry]:
+    """
+    iter_entries' counterpart for git checkouts: tracked files that pass the same
+    glob / hidden / size filters, without listing a single directory. `only`
+    restricts the output (e.g. to changed_files()); other files aren't stat()ed,
+    they're just reported to on_skipped(relpath).
+    """
+    root_path = Path(root).resolve()
+    if tracked is None:
+        tracked = tracked_files(root_path, follow_symlinks=follow_symlinks)
+    matcher = compile_globs(include_globs, exclude_globs)
+    max_bytes = int(max_file_mb * 1024 * 1024) if max_file_mb else None
+
+    for rel in tracked:
+        if not include_hidden and any(part.startswith(".") for part in rel.split("/")):
+            continue
+        if not matcher(rel):
+            continue
+        if only is not None and rel not in only:
+            if on_skipped is not None:
+                on_skipped(rel)
+            continue
+        full = os.path.join(str(root_path), rel)
+        try:
+            # tracked_files() already dropped symlinks unless we follow them
+            is_link = follow_symlinks and os.path.islink(full)
+            st = os.stat(full)
+        except OSError:
+            continue  # deleted in the working tree (or a dangling link)
+        if max_bytes is not None and st.st_size > max_bytes:
+            continue
+        real = os.path.realpath(full) if is_link else full
+        yield WalkEntry(
+            path=full,
+            relpath=rel,
+            realpath=real,
+            is_symlink=is_link,
+            size=int(st.st_size),
+            mtime=float(st.st_mtime),
+        )
+
@@ -0,0 +1,169 @@
+# codebase_whisperer/indexing/ignore.py
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+# .gitignore-style rules, compiled once per ignore file. Supported:
+#   comments (#), blank lines, '\' escapes, negation (!), dir-only rules (trailing /),
+#   anchoring (leading or inner /), *, ?, [...] and **/ , /** , /**/ .
+# Rules from deeper ignore files win over shallower ones; within a file the last
+# matching rule wins (git's semantics). Files under an ignored directory are never
+# re-included, which the walker gets for free by pruning the directory.
+
+# (regex, negate, dir_only)
+_Rule = Tuple[Pattern[str], bool, bool]
+
+
+def _segment_regex(seg: str) -> str:
+    out: List[str] = []
+    i, n = 0, len(seg)
+    while i < n:
+        c = seg[i]
+        if c == "\\" and i + 1 < n:
+            out.append(re.escape(seg[i + 1]))
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = seg.find("]", i + 2 if seg[i + 1:i + 2] in ("!", "^") else i + 1)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body = seg[i + 1:j]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _pattern_regex(pat: str) -> str:
+    anchored = pat.startswith("/") or "/" in pat.rstrip("/")
+    parts = pat.strip("/").split("/")
+    rx: List[str] = []
+    for idx, part in enumerate(parts):
+        last = idx == len(parts) - 1
+        if part == "**":
+            rx.append(".*" if last else "(?:.*/)?")
+        else:
+            rx.append(_segment_regex(part) + ("" if last else "/"))
+    body = "".join(rx)
+    return ("^" if anchored else "^(?:.*/)?") + body + "$"
+
+
+def parse_rules(lines: Iterable[str]) -> List[_Rule]:
+    rules: List[_Rule] = []
+    for raw in lines:
+        line = raw.rstrip("\n").rstrip("\r")
+        # trailing spaces are ignored unless escaped
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\#") or line.startswith("\\!"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        if not line.strip("/"):
+            continue
+        rules.append((re.compile(_pattern_regex(line)), negate, dir_only))
+    return rules
+
+
+class IgnoreFile:
+    """Rules of one ignore file, matched against paths relative to its directory."""
+
+    def __init__(self, base: str, rules: List[_Rule]) -> None:
+        self.base = base  # POSIX dir relative to the walk root ('' for root)
+        self.rules = rules
+        # one regex for the common "no rule applies" case
+        self._any = re.compile("|".join(f"(?:{r.pattern})" for r, _, _ in rules))
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str], base: str) -> Optional["IgnoreFile"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                rules = parse_rules(f)
+        except OSError:
+            return None
+        return cls(base, rules) if rules else None
+
+    def decide(self, rel_posix: str, is_dir: bool) -> Optional[bool]:
+        """True = ignored, False = re-included by a '!' rule, None = no rule matched."""
+        if self.base:
+            if not rel_posix.startswith(self.base + "/"):
+                return None
+            rel_posix = rel_posix[len(self.base) + 1:]
+        if not self._any.match(rel_posix):
+            return None
+        for rx, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if rx.match(rel_posix):
+                return not negate
+        return None
+
+
+# ignore files in effect for a directory, shallowest first
+IgnoreStack = Tuple[IgnoreFile, ...]
+
+
+def is_ignored(stack: IgnoreStack, rel_posix: str, is_dir: bool) -> bool:
+    for ig in reversed(stack):
+        verdict = ig.decide(rel_posix, is_dir)
+        if verdict is not None:
+            return verdict
+    return False
+
+
+class IgnoreLookup:
+    """
+    is_ignored() for arbitrary paths outside a walk (e.g. watch events): loads
+    and caches each directory's ignore stack, and treats a file under an
+    ignored directory as ignored, as the walker's pruning would.
+    """
+
+    def __init__(self, root: str | os.PathLike[str], names: Iterable[str]) -> None:
+        self.root = os.fspath(root)
+        self.names = tuple(names)
+        self._stacks: Dict[str, IgnoreStack] = {}
+        self._dir_ignored: Dict[str, bool] = {"": False}
+
+    def stack_for(self, rel_dir: str) -> IgnoreStack:
+        stack = self._stacks.get(rel_dir)
+        if stack is not None:
+            return stack
+        parent = self.stack_for(rel_dir.rpartition("/")[0]) if rel_dir else ()
+        stack = parent
+        for name in self.names:
+            ig = IgnoreFile.load(os.path.join(self.root, rel_dir, name), rel_dir)
+            if ig is not None:
+                stack = stack + (ig,)
+        self._stacks[rel_dir] = stack
+        return stack
+
+    def _ignored_dir(self, rel_dir: str) -> bool:
+        hit = self._dir_ignored.get(rel_dir)
+        if hit is None:
+            parent = rel_dir.rpartition("/")[0]
+            hit = self._ignored_dir(parent) or is_ignored(self.stack_for(parent), rel_dir, True)
+            self._dir_ignored[rel_dir] = hit
+        return hit
+
+    def __call__(self, rel_posix: str, is_dir: bool = False) -> bool:
+        if not self.names:
+            return False
+        parent = rel_posix.rpartition("/")[0]
+        if self._ignored_dir(parent):
+            return True
+        return is_ignored(self.stack_for(parent), rel_posix, is_dir)
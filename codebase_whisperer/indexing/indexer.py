@@ -4,7 +4,7 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Iterator, Optional
+from typing import Callable, Iterable, Iterator, Optional
 
 from rich import print as rprint
 
@@ -15,11 +15,13 @@ from codebase_whisperer.indexing.languages import (
 )
 from codebase_whisperer.indexing.util import (
     approx_language,
-    read_text,
-    file_sha256,
+    read_bytes,
+    decode_bytes,
     sha256_bytes,
+    utf8_identical,
 )
-from .walker import iter_files  # use your walker; do NOT re-implement traversal
+from .walker import WalkEntry, iter_entries  # use your walker; do NOT re-implement traversal
+from .gitsource import changed_files, is_git_checkout, iter_git_entries
 
 # -------------------------
 # debug helpers (opt-in)
@@ -34,6 +36,9 @@ def _log(*args):
 # -------------------------
 # public data model
 # -------------------------
+# (relpath, size_bytes, mtime) -> True to skip the file without reading it
+UnchangedFn = Callable[[str, int, float], bool]
+
 @dataclass(frozen=True)
 class FileRecord:
     # core
@@ -80,6 +85,12 @@ def index_repo(
     max_file_mb: Optional[float] = None,
     follow_symlinks: Optional[bool] = None,
     include_hidden: Optional[bool] = None,
+    walk_workers: Optional[int] = None,
+    walk_ordered: Optional[bool] = None,
+    ignore_files: Optional[Iterable[str]] = None,
+    source: Optional[str] = None,
+    since_commit: Optional[str] = None,
+    is_unchanged: Optional[UnchangedFn] = None,
 ) -> Iterator[FileRecord]:
     """
     High-level generator:
@@ -90,6 +101,12 @@ def index_repo(
       - yields FileRecord per file
 
     Optional kwargs override values from config for testing/CLI convenience.
+    source="git" (indexing.file_source) lists tracked files from the git index
+    instead of walking; with since_commit, only files that changed between that
+    commit and the working tree are yielded (the rest aren't even stat()ed).
+    Falls back to the walk when root isn't inside a git checkout.
+    `is_unchanged(relpath, size, mtime)` lets callers skip files from stat alone
+    (no read, no hashing); see index_file.
     """
     cfg, cfg_file = load_config(config_path)
     idx_cfg = cfg.get("indexing", {}) if isinstance(cfg, dict) else {}
@@ -101,6 +118,10 @@ def index_repo(
     final_max_mb = float(max_file_mb) if max_file_mb is not None else float(idx_cfg.get("max_file_mb", 1.5))
     final_follow = bool(follow_symlinks) if follow_symlinks is not None else bool(idx_cfg.get("follow_symlinks", False))
     final_hidden = bool(include_hidden) if include_hidden is not None else bool(idx_cfg.get("include_hidden", True))
+    final_workers = int(walk_workers) if walk_workers is not None else int(idx_cfg.get("walk_workers", 1))
+    final_ordered = bool(walk_ordered) if walk_ordered is not None else bool(idx_cfg.get("walk_ordered", True))
+    final_ignore = list(ignore_files) if ignore_files is not None else list(idx_cfg.get("ignore_files", []))
+    final_source = str(source) if source is not None else str(idx_cfg.get("file_source", "walk"))
 
     root = Path(repo_root).resolve()
     _log(f"repo_root={root}")
@@ -108,57 +129,102 @@ def index_repo(
         _log(f"loaded config from {cfg_file}")
     _log(
         f"include={final_include} exclude={final_exclude} encodings={final_encodings} "
-        f"max_file_mb={final_max_mb} follow_symlinks={final_follow} include_hidden={final_hidden}"
+        f"max_file_mb={final_max_mb} follow_symlinks={final_follow} include_hidden={final_hidden} "
+        f"walk_workers={final_workers} walk_ordered={final_ordered} ignore_files={final_ignore} "
+        f"source={final_source} since_commit={since_commit}"
     )
 
     max_bytes = int(final_max_mb * 1024 * 1024)
 
-    for path in iter_files(
-        root=str(root),
-        include_globs=final_include,
-        exclude_globs=final_exclude,
-        follow_symlinks=final_follow,
-        include_hidden=final_hidden,
-    ):
+    if final_source == "git" and is_git_checkout(root):
+        only = changed_files(root, since_commit) if since_commit else None
+        entries = iter_git_entries(
+            root,
+            final_include,
+            final_exclude,
+            follow_symlinks=final_follow,
+            include_hidden=final_hidden,
+            only=only,
+        )
+    else:
+        if final_source == "git":
+            _log(f"{root} is not a git checkout; walking the filesystem")
+        entries = iter_entries(
+            root=str(root),
+            include_globs=final_include,
+            exclude_globs=final_exclude,
+            follow_symlinks=final_follow,
+            include_hidden=final_hidden,
+            walk_workers=final_workers,
+            ordered=final_ordered,
+            ignore_files=final_ignore,
+        )
+
+    for path in entries:
         try:
             rec = index_file(
                 path=path,
                 repo_root=root,
                 encodings=final_encodings,
                 max_bytes=max_bytes,
+                is_unchanged=is_unchanged,
             )
             if rec is None:
                 continue
             yield rec
             _log(f"[ok] {rec.relpath} ({rec.lang}, {rec.size_bytes} bytes)")
         except Exception as e:
-            rprint(f"[yellow][indexer] failed {path}: {e}[/yellow]")
+            rprint(f"[yellow][indexer] failed {os.fspath(path)}: {e}[/yellow]")
 
 def index_file(
     *,
-    path: str | os.PathLike[str],
+    path: str | os.PathLike[str] | WalkEntry,
     repo_root: str | os.PathLike[str],
     encodings: Iterable[str],
     max_bytes: int,
+    is_unchanged: Optional[UnchangedFn] = None,
 ) -> Optional[FileRecord]:
     """
     Index a single file path into a FileRecord or None (if skipped).
-    Skips files larger than max_bytes.
+    Skips files larger than max_bytes, and files for which
+    is_unchanged(relpath, size, mtime) is True (checked before reading).
+    `path` may be a WalkEntry from iter_entries; its stat data and relpath are
+    used as-is instead of being recomputed.
     """
-    p = Path(path)
-    real = Path(os.path.realpath(p))
-    try:
-        st = real.stat()
-    except FileNotFoundError:
-        return None  # broken symlink or race
-
-    size = int(getattr(st, "st_size", 0))
-    if size > max_bytes:
-        _log(f"[skip too large] {p} ({size} bytes > {max_bytes})")
+    if isinstance(path, WalkEntry):
+        # the walk already stat()ed and resolved this file
+        real = Path(path.realpath)
+        abs_path, is_link = path.realpath, path.is_symlink
+        size, mtime, rel = path.size, path.mtime, path.relpath
+        if size > max_bytes:
+            _log(f"[skip too large] {path.path} ({size} bytes > {max_bytes})")
+            return None
+    else:
+        p = Path(path)
+        real = Path(os.path.realpath(p))
+        try:
+            st = real.stat()
+        except FileNotFoundError:
+            return None  # broken symlink or race
+
+        size = int(getattr(st, "st_size", 0))
+        if size > max_bytes:
+            _log(f"[skip too large] {p} ({size} bytes > {max_bytes})")
+            return None
+
+        root_abs = Path(repo_root).absolute()
+        p_abs = Path(path).absolute()  # absolute() does NOT resolve symlinks
+        rel = p_abs.relative_to(root_abs).as_posix()
+        mtime = float(getattr(st, "st_mtime", 0.0))
+        abs_path, is_link = str(p.resolve()), p.is_symlink()
+
+    if is_unchanged is not None and is_unchanged(rel, size, mtime):
+        _log(f"[skip unchanged] {rel}")
         return None
 
-    # decode text (uses your util.read_text)
-    text = read_text(str(real), encodings=encodings)
+    # one read: decode candidates and both hashes all work off this buffer
+    data = read_bytes(str(real))
+    text, encoding = decode_bytes(data, encodings=encodings, path=str(real))
 
     # language classification (uses your language maps)
     lang = approx_language(
@@ -169,22 +235,21 @@ def index_file(
     )
 
     # hashes + paths
-    file_hash = file_sha256(str(real))
-    content_hash = sha256_bytes(text.encode("utf-8", "replace"))
-
-    root_abs = Path(repo_root).absolute()
-    p_abs = Path(path).absolute()  # absolute() does NOT resolve symlinks
-    rel = p_abs.relative_to(root_abs).as_posix()
+    file_hash = sha256_bytes(data)
+    if utf8_identical(data, encoding):
+        content_hash = file_hash  # text.encode("utf-8") would give back `data`
+    else:
+        content_hash = sha256_bytes(text.encode("utf-8", "replace"))
 
     return FileRecord(
-        path=str(Path(path).resolve()),
+        path=abs_path,
         realpath=str(real),
-        is_symlink=Path(path).is_symlink(),
+        is_symlink=is_link,
         relpath=rel,
         lang=lang,
         sha256=file_hash,
         content_sha=content_hash,
-        mtime=float(getattr(st, "st_mtime", 0.0)),
+        mtime=mtime,
         size_bytes=size,
         content=text,
     )
\ No newline at end of file
@@ -0,0 +1,65 @@
+# tests/test_gitsource.py
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ..gitsource import changed_files, head_commit, is_git_checkout, tracked_files
+from ..indexer import index_repo
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def git_repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    git(repo, "config", "user.email", "t@example.com")
+    git(repo, "config", "user.name", "t")
+    (repo / "src").mkdir()
+    (repo / "src/A.java").write_text("class A {}", encoding="utf-8")
+    (repo / "src/B.java").write_text("class B {}", encoding="utf-8")
+    (repo / "README.md").write_text("# readme", encoding="utf-8")
+    (repo / ".gitignore").write_text("out/\n", encoding="utf-8")
+    (repo / "out").mkdir()
+    (repo / "out/Gen.java").write_text("class Gen {}", encoding="utf-8")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "init")
+    return repo
+
+
+def test_tracked_files_come_from_the_index(git_repo: Path):
+    assert is_git_checkout(git_repo)
+    files = tracked_files(git_repo)
+    assert sorted(files) == [".gitignore", "README.md", "src/A.java", "src/B.java"]
+    assert files["src/A.java"] == git(git_repo, "rev-parse", "HEAD:src/A.java")
+    assert not is_git_checkout(git_repo.parent)
+
+
+def test_changed_files_cover_commits_and_working_tree(git_repo: Path):
+    base = head_commit(git_repo)
+    (git_repo / "src/A.java").write_text("class A { int x; }", encoding="utf-8")
+    git(git_repo, "rm", "-q", "src/B.java")
+    git(git_repo, "commit", "-q", "-am", "edit")
+    (git_repo / "README.md").write_text("# dirty", encoding="utf-8")  # uncommitted
+    assert changed_files(git_repo, base) == {"src/A.java", "src/B.java", "README.md"}
+    assert changed_files(git_repo, "0" * 40) is None
+
+
+def test_index_repo_git_source_skips_walk_and_unchanged(git_repo: Path):
+    base = head_commit(git_repo)
+    kw = dict(include_globs=["**/*.java", "*.md"], exclude_globs=[], encodings=["utf-8"], source="git")
+
+    assert sorted(r.relpath for r in index_repo(git_repo, **kw)) == ["README.md", "src/A.java", "src/B.java"]
+
+    (git_repo / "src/B.java").write_text("class B { }", encoding="utf-8")
+    git(git_repo, "commit", "-q", "-am", "touch B")
+    assert [r.relpath for r in index_repo(git_repo, since_commit=base, **kw)] == ["src/B.java"]
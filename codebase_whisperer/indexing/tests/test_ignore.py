@@ -0,0 +1,84 @@
+# tests/test_ignore.py
+from pathlib import Path
+
+from ..ignore import IgnoreFile, is_ignored, parse_rules
+from ..walker import iter_files
+
+
+def _ig(text: str, base: str = "") -> IgnoreFile:
+    return IgnoreFile(base, parse_rules(text.splitlines()))
+
+
+def test_gitignore_rule_semantics():
+    ig = _ig(
+        "# comment\n"
+        "*.log\n"
+        "!keep.log\n"
+        "build/\n"
+        "/root_only.txt\n"
+        "docs/*.tmp\n"
+        "**/gen/**\n"
+        "a/**/z.py\n"
+        "\\#literal\n"
+        "trailing   \n"
+    )
+    cases = {
+        ("x.log", False): True,
+        ("sub/x.log", False): True,
+        ("sub/keep.log", False): False,
+        ("build", True): True,
+        ("src/build", True): True,
+        ("build", False): False,           # dir-only rule doesn't hit files
+        ("root_only.txt", False): True,
+        ("sub/root_only.txt", False): False,
+        ("docs/a.tmp", False): True,
+        ("docs/sub/a.tmp", False): False,  # '*' doesn't cross '/'
+        ("x/gen/y.py", False): True,
+        ("a/z.py", False): True,
+        ("a/b/c/z.py", False): True,
+        ("#literal", False): True,
+        ("trailing", False): True,
+        ("src/main.py", False): False,
+    }
+    for (rel, is_dir), expected in cases.items():
+        assert is_ignored((ig,), rel, is_dir) is expected, rel
+
+
+def test_nested_ignore_files_deeper_wins():
+    root = _ig("*.txt\n")
+    sub = _ig("!notes.txt\n", base="pkg")
+    stack = (root, sub)
+    assert is_ignored(stack, "a.txt", False)
+    assert is_ignored(stack, "pkg/a.txt", False)
+    assert not is_ignored(stack, "pkg/notes.txt", False)
+    assert is_ignored(stack, "notes.txt", False)  # sub's rules only cover pkg/
+
+
+def test_walker_prunes_gitignored_subtrees(tmp_path: Path, monkeypatch):
+    import os
+
+    def touch(rel):
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("x", encoding="utf-8")
+
+    touch("src/A.java")
+    touch("gen/proto/B.java")
+    touch("src/vendor/C.java")
+    touch("src/keep/D.java")
+    (tmp_path / ".gitignore").write_text("gen/\n", encoding="utf-8")
+    (tmp_path / "src/.ignore").write_text("vendor\n*.java\n!keep/**\n", encoding="utf-8")
+
+    listed = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda p: listed.append(Path(p).name) or real_scandir(p))
+
+    got = sorted(
+        Path(p).relative_to(tmp_path).as_posix()
+        for p in iter_files(tmp_path, ["**/*.java"], [], ignore_files=[".gitignore", ".ignore"])
+    )
+    assert got == ["src/keep/D.java"]
+    assert "gen" not in listed and "vendor" not in listed
+
+    # off by default at the walker level
+    assert len(list(iter_files(tmp_path, ["**/*.java"], []))) == 4
@@ -188,4 +188,80 @@ def test_filename_language_override_beats_extension(tmp_path: Path):
         )
     )
     assert len(recs) == 1
-    assert recs[0].language == "xml"
\ No newline at end of file
+    assert recs[0].language == "xml"
+
+
+def test_is_unchanged_skips_before_reading(tmp_path: Path, monkeypatch):
+    import codebase_whisperer.indexing.indexer as indexer
+
+    _write_text(tmp_path / "a.txt", "aaa")
+    _write_text(tmp_path / "b.txt", "bbbb")
+    st_a = (tmp_path / "a.txt").stat()
+
+    reads = []
+    real_read = indexer.read_bytes
+    monkeypatch.setattr(indexer, "read_bytes", lambda path: reads.append(Path(path).name) or real_read(path))
+
+    seen = []
+    def is_unchanged(rel, size, mtime):
+        seen.append(rel)
+        return rel == "a.txt" and size == st_a.st_size and mtime == st_a.st_mtime
+
+    recs = list(index_repo(
+        repo_root=str(tmp_path),
+        include_globs=["**/*.txt"],
+        exclude_globs=[],
+        encodings=["utf-8"],
+        is_unchanged=is_unchanged,
+    ))
+    assert [r.rel_path for r in recs] == ["b.txt"]
+    assert reads == ["b.txt"]
+    assert sorted(seen) == ["a.txt", "b.txt"]
+
+def test_index_file_reads_once_and_matches_text_mode_decode(tmp_path: Path, monkeypatch):
+    import codebase_whisperer.indexing.indexer as indexer
+    from ..indexer import index_file
+
+    files = {
+        "sjis.txt": "設定ファイル\r\nline two\r".encode("cp932"),
+        "plain.txt": "plain ascii\nok\n".encode("utf-8"),
+        "bom.txt": b"\xef\xbb\xbfwith bom\n",
+    }
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+
+    opened = []
+    real_read = indexer.read_bytes
+    monkeypatch.setattr(indexer, "read_bytes", lambda path: opened.append(Path(path).name) or real_read(path))
+
+    encodings = ["utf-8", "cp932", "latin-1"]
+    for name, data in files.items():
+        rec = index_file(path=tmp_path / name, repo_root=tmp_path, encodings=encodings, max_bytes=1 << 20)
+        # same text and hashes as the old open(..., "r", encoding=enc) + re-read path
+        for enc in encodings:
+            try:
+                with open(tmp_path / name, "r", encoding=enc) as f:
+                    expected = f.read()
+                break
+            except UnicodeDecodeError:
+                continue
+        assert rec.content == expected
+        assert rec.sha256 == _sha256_bytes(data)
+        assert rec.content_sha == _sha256_text(expected)
+    assert opened == list(files)
+
+def test_index_file_uses_walk_entry_without_restat(tmp_path: Path, monkeypatch):
+    from ..indexer import index_file
+    from ..walker import iter_entries
+
+    _write_text(tmp_path / "src/A.java", "class A {}")
+    entry = next(iter_entries(tmp_path, ["**/*.java"], []))
+    by_path = index_file(path=entry.path, repo_root=tmp_path, encodings=["utf-8"], max_bytes=1 << 20)
+
+    def no_stat(*a, **kw):
+        raise AssertionError("index_file re-stat()ed a walk entry")
+
+    monkeypatch.setattr(Path, "stat", no_stat)
+    monkeypatch.setattr(Path, "resolve", no_stat)
+    by_entry = index_file(path=entry, repo_root=tmp_path, encodings=["utf-8"], max_bytes=1 << 20)
+    assert by_entry == by_path
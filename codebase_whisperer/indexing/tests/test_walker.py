@@ -122,3 +122,117 @@ def test_symlink_behavior(tmp_path: Path):
         assert got_follow == ["link.txt", "real.txt"]
     else:
         assert got_follow == ["real.txt"]
+
+
+def test_compiled_globs_match_fnmatch_semantics():
+    import fnmatch
+
+    from ..walker import compile_globs
+
+    def ref_match(rel, pat):
+        # the original per-pattern rule: fnmatch, plus '**/'-stripped fallback
+        return fnmatch.fnmatch(rel, pat) or (pat.startswith("**/") and fnmatch.fnmatch(rel, pat[3:]))
+
+    file_globs = [
+        "**/*.java", "*.xml", "**/pom.xml", "README.md", "docs/*.md",
+        "**/*.tar.gz", "src/**/test_*.py", "**/[Mm]akefile", "*.",
+    ]
+    paths = [
+        "A.java", "src/main/A.java", "a.java.bak", ".java", "pom.xml", "mod/pom.xml",
+        "mod/pom.xml.orig", "x.xml", "deep/er/x.xml", "README.md", "docs/README.md",
+        "docs/guide.md", "docs/sub/guide.md", "a.tar.gz", "lib/b.tar.gz", "c.gz",
+        "src/pkg/test_a.py", "src/test_a.py", "Makefile", "sub/makefile", "weird.",
+    ]
+    for pat in file_globs:
+        m = compile_globs([pat], [])
+        for rel in paths:
+            assert m(rel) == ref_match(rel, pat), (pat, rel)
+
+    m = compile_globs(file_globs, ["**/target/**", "**/*.orig", "docs/guide.md"])
+    for rel in paths + ["target/A.java", "mod/target/gen/B.java", "targets/A.java"]:
+        expected = (
+            any(ref_match(rel, p) for p in file_globs)
+            and not any(ref_match(rel, p) for p in ["**/*.orig", "docs/guide.md"])
+            and "target" not in rel.split("/")
+        )
+        assert m(rel) == expected, rel
+
+    # compiled once, reused across walks with the same globs
+    assert compile_globs(file_globs, ["**/target/**"]) is compile_globs(list(file_globs), ("**/target/**",))
+
+
+def test_iter_entries_carry_stat_and_walk_order(tmp_path: Path):
+    import os
+
+    from ..walker import iter_entries
+
+    _touch(tmp_path / "b.txt", "bb")
+    _touch(tmp_path / "a/x.txt", "xxx")
+    _touch(tmp_path / "a/b/y.txt", "yyyy")
+    _touch(tmp_path / "c/z.txt", "z")
+    _touch(tmp_path / "c/skip.bin", "z")
+
+    entries = list(iter_entries(tmp_path, ["**/*.txt"], []))
+    expected_order = []
+    for dirpath, dirnames, filenames in os.walk(tmp_path.resolve()):
+        for fn in filenames:
+            if fn.endswith(".txt"):
+                expected_order.append(os.path.join(dirpath, fn))
+    assert [e.path for e in entries] == expected_order
+    assert [e.path for e in entries] == list(iter_files(tmp_path, ["**/*.txt"], []))
+
+    for e in entries:
+        st = os.stat(e.path)
+        assert (e.size, e.mtime) == (st.st_size, st.st_mtime)
+        assert e.relpath == Path(e.path).relative_to(tmp_path.resolve()).as_posix()
+        assert e.realpath == e.path and not e.is_symlink
+        assert os.fspath(e) == e.path
+
+
+def test_parallel_walk_matches_serial(tmp_path: Path):
+    from ..walker import iter_entries
+
+    for i in range(6):
+        for j in range(4):
+            _touch(tmp_path / f"d{i}/s{j}/f{i}{j}.java")
+        _touch(tmp_path / f"d{i}/top{i}.java")
+        _touch(tmp_path / f"d{i}/target/gen{i}.java")
+        _touch(tmp_path / f"d{i}/.hidden/h{i}.java")
+    _touch(tmp_path / "root.java")
+
+    args = (tmp_path, ["**/*.java"], ["**/target/**"])
+    serial = list(iter_files(*args, include_hidden=False))
+    assert len(serial) == 6 * 5 + 1
+    assert list(iter_files(*args, include_hidden=False, walk_workers=4)) == serial
+    unordered = list(iter_files(*args, include_hidden=False, walk_workers=4, ordered=False))
+    assert sorted(unordered) == sorted(serial)
+
+    # stopping early shuts the pool down instead of finishing the walk
+    it = iter_entries(*args, walk_workers=4)
+    first = next(it)
+    it.close()
+    assert first.path == serial[0]
+
+
+def test_parallel_walk_lists_only_a_few_dirs_ahead():
+    from ..walker import WalkEntry, _walk_parallel
+
+    # a root with 500 subdirs, one file each; listing is the only work
+    listed = []
+
+    def scan(task):
+        listed.append(task[1])
+        if task[1] == "":
+            return [], [(f"/r/d{i}", f"d{i}", False, ()) for i in range(500)]
+        return [WalkEntry(path=task[0] + "/f", relpath=task[1] + "/f", realpath=task[0] + "/f",
+                          is_symlink=False, size=0, mtime=0.0)], []
+
+    for ordered in (True, False):
+        listed.clear()
+        it = _walk_parallel(("/r", "", False, ()), scan, workers=2, ordered=ordered, max_pending=8)
+        got = [next(it) for _ in range(10)]
+        assert len(got) == 10
+        # root + what was consumed + at most max_pending listed ahead
+        assert len(listed) <= 1 + 10 + 8
+        rest = list(it)
+        assert len(got) + len(rest) == 500 and len(listed) == 501
@@ -1,6 +1,7 @@
+import codecs
 import hashlib
 import os
-from typing import Optional, Dict, Iterable, List
+from typing import Optional, Dict, Iterable, List, Tuple
 from pathlib import Path
 from rich import print as rprint
 from .languages import FILENAME_LANGUAGE_MAP, EXT_LANGUAGE_MAP
@@ -41,25 +42,61 @@ def approx_language(
 
     return default
 
-def read_text(
-        path: str | os.PathLike[str],
+def read_bytes(path: str | os.PathLike[str]) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _translate_newlines(text: str) -> str:
+    # what open(..., "r") does by default (universal newlines)
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+def decode_bytes(
+        data: bytes,
         *,
         encodings: Optional[Iterable[str]] = None,
-        ) -> str:
+        path: str | os.PathLike[str] = "",
+        ) -> Tuple[Optional[str], Optional[str]]:
     """
-    Try multiple encodings until one works. The list of encodings should
-    come from config.py (indexing.encodings).
+    Decode an in-memory buffer, trying each encoding in turn (no re-reads).
+    Returns (text, encoding used); text matches what read_text(path) returns.
     """
-
     candidates: List[str] = list(encodings) if encodings else ["utf-8"]
     num_tries = 0
     for enc in candidates:
         try:
-            with open(path, "r", encoding=enc, errors="strict") as f:
-                return f.read()
+            return _translate_newlines(data.decode(enc, errors="strict")), enc
         except Exception as e:
             num_tries += 1
             if num_tries == len(candidates) - 1:
                 rprint(f"[yellow]Failed to read {path}: {e}[/yellow]")
             continue
-        return ""
+    return None, None
+
+def utf8_identical(data: bytes, encoding: Optional[str]) -> bool:
+    """
+    True when decode_bytes(data) with `encoding` round-trips to `data` under
+    UTF-8 encoding, i.e. sha256 of the text's UTF-8 bytes equals sha256(data).
+    """
+    if encoding is None or b"\r" in data:
+        return False
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    if name in ("utf-8", "ascii"):
+        return True
+    return name == "utf-8-sig" and not data.startswith(codecs.BOM_UTF8)
+
+def read_text(
+        path: str | os.PathLike[str],
+        *,
+        encodings: Optional[Iterable[str]] = None,
+        ) -> str:
+    """
+    Try multiple encodings until one works. The list of encodings should
+    come from config.py (indexing.encodings). The file is read once.
+    """
+    text, _enc = decode_bytes(read_bytes(path), encodings=encodings, path=path)
+    return text
@@ -2,11 +2,18 @@
 from __future__ import annotations
 
 import os
+import re
+import stat
 import fnmatch
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
 from rich import print as rprint
 
+from .ignore import IgnoreFile, IgnoreLookup, IgnoreStack, is_ignored
+
 
 def _to_posix(p: str) -> str:
     """Normalize path separators to '/' for consistent glob matching on all OSes."""
@@ -31,20 +38,120 @@ def _split_globs(globs: Iterable[str]) -> Tuple[List[str], List[str]]:
     return dir_globs, file_globs
 
 
-def _fnmatch_with_double_star(rel_posix: str, pattern: str) -> bool:
+_GLOB_CHARS = frozenset("*?[")
+# fnmatch compares os.path.normcase()d strings: case-insensitive on Windows
+_CASE_FOLD = os.path.normcase("A") == "a"
+
+
+def _is_literal(pattern: str) -> bool:
+    return not (_GLOB_CHARS & set(pattern))
+
+
+class _PatternSet:
+    """
+    File globs compiled for one-shot matching, with the same results as fnmatch
+    plus the '**/' root fallback (fnmatch doesn't treat '**' specially, so
+    '**/*.txt' also has to match 'a.txt' at root):
+      - '*.ext' / '**/*.ext'     -> extension lookup on the basename
+      - '**/name'                -> basename lookup
+      - 'literal/path'           -> exact lookup
+      - anything else            -> one alternation regex over all patterns
+    so the cost per path doesn't grow with the number of globs.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        exts: Set[str] = set()
+        names: Set[str] = set()
+        exact: Set[str] = set()
+        regexes: List[str] = []
+        for pat in patterns:
+            if _CASE_FOLD:
+                pat = pat.lower()
+            tail = pat[3:] if pat.startswith("**/") else None
+            body = tail if tail is not None else pat
+            ext = body[1:]
+            if body.startswith("*.") and _is_literal(ext) and "/" not in ext and ext.count(".") == 1:
+                # '*' also matches '/', so with or without '**/' this is "ends with ext"
+                exts.add(ext)
+            elif tail is not None and _is_literal(tail) and "/" not in tail:
+                names.add(tail)
+            elif tail is None and _is_literal(pat):
+                exact.add(pat)
+            else:
+                regexes.append(fnmatch.translate(pat))
+                if tail is not None:
+                    regexes.append(fnmatch.translate(tail))
+        self.exts = frozenset(exts)
+        self.names = frozenset(names)
+        self.exact = frozenset(exact)
+        self.regex = re.compile("|".join(regexes)) if regexes else None
+        self.empty = not (exts or names or exact or regexes)
+
+    def match(self, rel_posix: str) -> bool:
+        if _CASE_FOLD:
+            rel_posix = rel_posix.lower()
+        base = rel_posix[rel_posix.rfind("/") + 1:]
+        if self.exts:
+            dot = base.rfind(".")
+            if dot >= 0 and base[dot:] in self.exts:
+                return True
+        if base in self.names or rel_posix in self.exact:
+            return True
+        return self.regex is not None and self.regex.match(rel_posix) is not None
+
+
+class GlobMatcher:
     """
-    fnmatch doesn't treat '**' specially; '**/*.txt' won't match 'a.txt' at root.
-    Workaround: if pattern starts with '**/', also try it without that prefix.
+    include/exclude globs compiled once (see compile_globs) and reused for every
+    file of every walk with the same globs.
+      - prune_dir(name): True for directories an exclude '.../name/**' removes
+      - __call__(rel_posix): True if the file passes excludes and includes
     """
-    if fnmatch.fnmatch(rel_posix, pattern):
-        return True
-    if pattern.startswith("**/"):
-        return fnmatch.fnmatch(rel_posix, pattern[3:])
-    return False
 
+    def __init__(self, include_globs: Iterable[str], exclude_globs: Iterable[str]) -> None:
+        include_globs = list(include_globs)
+        ex_dir_globs, ex_file_globs = _split_globs(exclude_globs)
+        in_dir_globs, in_file_globs = _split_globs(include_globs)
+
+        self.has_includes = bool(include_globs)
+        self.exclude = _PatternSet(ex_file_globs)
+        self.include = _PatternSet(in_file_globs)
+        # For pruning, compare by basename (target, .git, etc.)
+        self.pruned_names = frozenset(
+            b for b in (_basename_from_dir_glob(g) for g in ex_dir_globs) if b
+        )
+        # directory includes like "src/main/**" admit the dir's whole subtree
+        self.in_dir_exact = frozenset(in_dir_globs)
+        self.in_dir_prefixes = tuple(g.rstrip("/") + "/" for g in in_dir_globs)
+
+    def prune_dir(self, name: str) -> bool:
+        return name in self.pruned_names
+
+    def __call__(self, rel_posix: str) -> bool:
+        # Exclude checks
+        if not self.exclude.empty and self.exclude.match(rel_posix):
+            return False
+        # Also guard against files within excluded dirs (by path segment)
+        if self.pruned_names and not self.pruned_names.isdisjoint(rel_posix.split("/")):
+            return False
+        # Include checks
+        if not self.has_includes:
+            return True
+        if self.include.match(rel_posix):
+            return True
+        return rel_posix in self.in_dir_exact or (
+            bool(self.in_dir_prefixes) and rel_posix.startswith(self.in_dir_prefixes)
+        )
+
+
+@lru_cache(maxsize=32)
+def _compile_globs_cached(include_globs: Tuple[str, ...], exclude_globs: Tuple[str, ...]) -> GlobMatcher:
+    return GlobMatcher(include_globs, exclude_globs)
 
-def _matches_any(rel_posix: str, patterns: List[str]) -> bool:
-    return any(_fnmatch_with_double_star(rel_posix, pat) for pat in patterns)
+
+def compile_globs(include_globs: Iterable[str], exclude_globs: Iterable[str]) -> GlobMatcher:
+    """Compiled matcher for these globs; repeat walks with the same globs share it."""
+    return _compile_globs_cached(tuple(include_globs), tuple(exclude_globs))
 
 
 def _basename_from_dir_glob(g: str) -> str:
@@ -58,17 +165,165 @@ def _basename_from_dir_glob(g: str) -> str:
     return g.split("/")[-1]
 
 
-def _path_contains_segment(rel_posix: str, segment: str) -> bool:
+@dataclass(frozen=True)
+class WalkEntry:
     """
-    True if rel_posix contains '/segment/' as a directory component (or equals segment).
-    Ex: rel='target/gen/Bar.java', segment='target' -> True
+    One file from iter_entries, carrying what the walk already learned so
+    index_file doesn't stat/resolve it again. os.fspath(entry) == entry.path.
     """
-    s = "/" + rel_posix.strip("/") + "/"
-    seg = "/" + segment.strip("/") + "/"
-    return seg in s or rel_posix == segment
+    path: str          # absolute path as yielded by iter_files
+    relpath: str       # POSIX path relative to the walk root
+    realpath: str      # symlinks resolved
+    is_symlink: bool
+    size: int          # from stat() (follows symlinks)
+    mtime: float
 
+    def __fspath__(self) -> str:
+        return self.path
 
-def iter_files(
+
+# (dirpath, rel_dir ('' for root), reached through a symlinked dir, ignore files in effect)
+_DirTask = Tuple[str, str, bool, IgnoreStack]
+
+
+def _scan_dir(
+    task: _DirTask,
+    *,
+    matcher: GlobMatcher,
+    max_bytes: Optional[int],
+    follow_symlinks: bool,
+    include_hidden: bool,
+    ignore_files: Tuple[str, ...] = (),
+) -> Tuple[List[WalkEntry], List[_DirTask]]:
+    """List one directory: (matching files, subdirectories to visit), both in scandir order."""
+    dirpath, rel_dir, under_link, ignores = task
+    try:
+        with os.scandir(dirpath) as it:
+            listing = list(it)
+    except OSError:
+        return [], []  # unreadable dir: os.walk skips these silently too
+
+    if ignore_files:
+        # compile this directory's ignore files once; children inherit the stack
+        present = {de.name: de.path for de in listing if de.name in ignore_files}
+        for name in ignore_files:
+            if name in present:
+                ig = IgnoreFile.load(present[name], rel_dir)
+                if ig is not None:
+                    ignores = ignores + (ig,)
+
+    files: List[WalkEntry] = []
+    subdirs: List[_DirTask] = []
+    for de in listing:
+        name = de.name
+        # Optionally hide dotfiles / dot-directories fast
+        if not include_hidden and name.startswith("."):
+            continue
+        try:
+            is_dir = de.is_dir()
+        except OSError:
+            is_dir = False
+        rel = f"{rel_dir}/{name}" if rel_dir else name
+
+        if is_dir:
+            # Directory-level pruning using exclude dir globs (by basename);
+            # symlinked dirs are only entered when following links
+            if matcher.prune_dir(name):
+                continue
+            is_link = de.is_symlink()
+            if is_link and not follow_symlinks:
+                continue
+            # ignored dirs are pruned, so nothing below them is listed or read
+            if ignores and is_ignored(ignores, rel, True):
+                continue
+            subdirs.append((de.path, rel, under_link or is_link, ignores))
+            continue
+
+        if not matcher(rel):
+            continue
+        if ignores and is_ignored(ignores, rel, False):
+            continue
+        try:
+            # Skip symlinked files unless following
+            is_link = de.is_symlink()
+            if is_link and not follow_symlinks:
+                continue
+            st = de.stat()
+        except OSError as e:
+            rprint(f"[yellow]Skipping {de.path}: {e}[/yellow]")
+            continue
+        # Size gating
+        if max_bytes is not None and st.st_size > max_bytes:
+            continue
+
+        real = os.path.realpath(de.path) if (is_link or under_link) else de.path
+        files.append(WalkEntry(
+            # Preserve symlink path when following so callers can see link names.
+            path=de.path if is_link else real,
+            relpath=rel,
+            realpath=real,
+            is_symlink=is_link,
+            size=int(st.st_size),
+            mtime=float(st.st_mtime),
+        ))
+    return files, subdirs
+
+
+def _walk_parallel(
+    root: _DirTask,
+    scan: Callable[[_DirTask], Tuple[List[WalkEntry], List[_DirTask]]],
+    workers: int,
+    ordered: bool,
+    max_pending: Optional[int] = None,
+) -> Iterator[WalkEntry]:
+    """
+    Directory listings run on a thread pool, submitted as the walk drains: at
+    most `max_pending` (default 4 * workers) are queued or running at once,
+    however wide the tree is. ordered=True lists ahead in serial-walk order and
+    yields in that order; ordered=False yields each directory's files as soon
+    as it is listed.
+    """
+    limit = max(1, max_pending if max_pending is not None else 4 * workers)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="walk")
+    try:
+        if ordered:
+            # [dir, its listing future or None]; the last one is next in serial order
+            stack: List[list] = [[root, None]]
+            running = 0
+            while stack:
+                # list ahead: the dirs the serial walk reaches next, up to the cap
+                for slot in reversed(stack):
+                    if running >= limit:
+                        break
+                    if slot[1] is None:
+                        slot[1] = pool.submit(scan, slot[0])
+                        running += 1
+                task, fut = stack.pop()
+                if fut is not None:
+                    running -= 1
+                    files, subdirs = fut.result()
+                else:
+                    # every slot is taken by dirs further down the stack
+                    files, subdirs = scan(task)
+                yield from files
+                stack.extend([sub, None] for sub in reversed(subdirs))
+        else:
+            todo: List[_DirTask] = [root]
+            pending: Set[Future] = set()
+            while todo or pending:
+                while todo and len(pending) < limit:
+                    pending.add(pool.submit(scan, todo.pop()))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    files, subdirs = fut.result()
+                    todo.extend(subdirs)
+                    yield from files
+    finally:
+        # consumer stopped early (or an error): drop listings not started yet
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_entries(
     root: str | os.PathLike[str],
     include_globs: Iterable[str],
     exclude_globs: Iterable[str],
@@ -76,86 +331,145 @@ def iter_files(
     max_file_mb: Optional[float] = None,
     follow_symlinks: bool = False,
     include_hidden: bool = True,
-) -> Iterator[str]:
+    walk_workers: int = 1,
+    ordered: bool = True,
+    ignore_files: Iterable[str] = (),
+) -> Iterator[WalkEntry]:
     """
-    Walk `root` and yield ABSOLUTE file paths that:
-      - match at least one include_glob (if include_globs non-empty)
-      - do NOT match any exclude_glob
-      - are <= max_file_mb (if provided)
+    iter_files, but yielding WalkEntry objects. Built on os.scandir so the file
+    type comes from the directory listing, globs are matched before any stat,
+    and each matching file is stat()ed exactly once. Same order as os.walk
+    (top-down: a directory's files, then each subdirectory in turn).
 
-    Globs are interpreted relative to `root`, using POSIX '/' separators, e.g.:
-      "**/*.java", "**/target/**", "src/main/**", "pom.xml"
+    walk_workers > 1 lists directories concurrently (for high-latency
+    filesystems such as NFS); with ordered=False files come out in listing
+    completion order instead of walk order.
 
-    Exclude globs ending with '/**' are used to prune entire subtrees early.
+    ignore_files (e.g. [".gitignore", ".ignore"]) names per-directory ignore
+    files; each is compiled once when its directory is listed and applies to
+    that subtree, with ignored directories pruned from the walk.
     """
     root_path = Path(root).resolve()
     if not root_path.is_dir():
         return
 
-    ex_dir_globs, ex_file_globs = _split_globs(exclude_globs)
-    in_dir_globs, in_file_globs = _split_globs(include_globs)
     max_bytes = int(max_file_mb * 1024 * 1024) if max_file_mb else None
+    scan = partial(
+        _scan_dir,
+        matcher=compile_globs(include_globs, exclude_globs),
+        max_bytes=max_bytes,
+        follow_symlinks=follow_symlinks,
+        include_hidden=include_hidden,
+        ignore_files=tuple(ignore_files),
+    )
+    top: _DirTask = (str(root_path), "", False, ())
 
-    # For pruning, compare by basename (target, .git, etc.)
-    pruned_name_set = { _basename_from_dir_glob(g) for g in ex_dir_globs if _basename_from_dir_glob(g) }
+    if walk_workers > 1:
+        yield from _walk_parallel(top, scan, int(walk_workers), ordered)
+        return
 
-    for dirpath, dirnames, filenames in os.walk(root_path, followlinks=follow_symlinks):
-        # Compute rel dir ('' for root)
-        rel_dir = _to_posix(os.path.relpath(dirpath, root_path))
-        if rel_dir == ".":
-            rel_dir = ""
+    stack: List[_DirTask] = [top]
+    while stack:
+        files, subdirs = scan(stack.pop())
+        yield from files
+        stack.extend(reversed(subdirs))
 
-        # Optionally hide dot-directories fast
-        if not include_hidden:
-            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
 
-        # Directory-level pruning using exclude dir globs (by basename)
-        if pruned_name_set:
-            dirnames[:] = [d for d in dirnames if d not in pruned_name_set]
+def stat_entry(
+    root: str,
+    rel: str,
+    *,
+    follow_symlinks: bool = False,
+    max_bytes: Optional[int] = None,
+) -> Optional[WalkEntry]:
+    """WalkEntry for one POSIX relpath under an already-resolved `root`; None if gone/skipped."""
+    full = os.path.join(root, *rel.split("/"))
+    try:
+        is_link = os.path.islink(full)
+        if is_link and not follow_symlinks:
+            return None
+        st = os.stat(full)
+    except OSError:
+        return None  # deleted (or a dangling link)
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    if max_bytes is not None and st.st_size > max_bytes:
+        return None
+    real = os.path.realpath(full)
+    return WalkEntry(
+        path=full if is_link else real,
+        relpath=rel,
+        realpath=real,
+        is_symlink=is_link,
+        size=int(st.st_size),
+        mtime=float(st.st_mtime),
+    )
 
-        # Handle files in this directory
-        for fn in filenames:
-            # Optionally hide dotfiles
-            if not include_hidden and fn.startswith("."):
-                continue
 
-            full = Path(dirpath) / fn
-            try:
-                # Skip symlinked files unless following
-                if full.is_symlink() and not follow_symlinks:
-                    continue
-                # Size gating
-                if max_bytes is not None and full.stat().st_size > max_bytes:
-                    continue
-            except OSError as e:
-                rprint(f"[yellow]Skipping {full}: {e}[/yellow]")
-                continue
+def iter_path_entries(
+    root: str | os.PathLike[str],
+    relpaths: Iterable[str],
+    include_globs: Iterable[str],
+    exclude_globs: Iterable[str],
+    *,
+    max_file_mb: Optional[float] = None,
+    follow_symlinks: bool = False,
+    include_hidden: bool = True,
+    ignore_files: Iterable[str] = (),
+) -> Iterator[WalkEntry]:
+    """
+    WalkEntry for each of `relpaths` (POSIX, relative to root) that the walk with
+    the same arguments would have produced; paths that are gone, excluded,
+    hidden or ignored are dropped. Nothing is listed, only these paths stat()ed.
+    """
+    root_path = Path(root).resolve()
+    matcher = compile_globs(include_globs, exclude_globs)
+    ignored = IgnoreLookup(root_path, ignore_files)
+    max_bytes = int(max_file_mb * 1024 * 1024) if max_file_mb else None
+    for rel in relpaths:
+        if not include_hidden and any(part.startswith(".") for part in rel.split("/")):
+            continue
+        if not matcher(rel) or ignored(rel):
+            continue
+        entry = stat_entry(str(root_path), rel, follow_symlinks=follow_symlinks, max_bytes=max_bytes)
+        if entry is not None:
+            yield entry
 
-            # Build rel path for glob matching
-            rel = _to_posix(os.path.relpath(full, root_path))
 
-            # Exclude checks
-            if ex_file_globs and _matches_any(rel, ex_file_globs):
-                continue
-            # Also guard against files within excluded dirs (by basename)
-            if pruned_name_set and any(_path_contains_segment(rel, seg) for seg in pruned_name_set):
-                continue
+def iter_files(
+    root: str | os.PathLike[str],
+    include_globs: Iterable[str],
+    exclude_globs: Iterable[str],
+    *,
+    max_file_mb: Optional[float] = None,
+    follow_symlinks: bool = False,
+    include_hidden: bool = True,
+    walk_workers: int = 1,
+    ordered: bool = True,
+    ignore_files: Iterable[str] = (),
+) -> Iterator[str]:
+    """
+    Walk `root` and yield ABSOLUTE file paths that:
+      - match at least one include_glob (if include_globs non-empty)
+      - do NOT match any exclude_glob
+      - are <= max_file_mb (if provided)
 
-            # Include checks
-            include_ok = True
-            if include_globs:
-                include_ok = _matches_any(rel, in_file_globs) or (
-                    # allow directory includes like "src/main/**"
-                    in_dir_globs and any(
-                        rel == g or rel.startswith(g.rstrip("/") + "/")
-                        for g in in_dir_globs
-                    )
-                )
-            if not include_ok:
-                continue
+    Globs are interpreted relative to `root`, using POSIX '/' separators, e.g.:
+      "**/*.java", "**/target/**", "src/main/**", "pom.xml"
 
-            # Preserve symlink path when following so callers can see link names.
-            if follow_symlinks and full.is_symlink():
-                yield str(full)
-            else:
-                yield str(full.resolve())
\ No newline at end of file
+    Exclude globs ending with '/**' are used to prune entire subtrees early.
+    See iter_entries for the same walk with stat data attached, and for
+    walk_workers / ordered (parallel directory listing) and ignore_files.
+    """
+    for entry in iter_entries(
+        root,
+        include_globs,
+        exclude_globs,
+        max_file_mb=max_file_mb,
+        follow_symlinks=follow_symlinks,
+        include_hidden=include_hidden,
+        walk_workers=walk_workers,
+        ordered=ordered,
+        ignore_files=ignore_files,
+    ):
+        yield entry.path
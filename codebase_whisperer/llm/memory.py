@@ -76,9 +76,6 @@ class Memory:
                 "summary": None
             }
             self._id_seq += 1
-            if self.cfg.embed_turns:
-                urec["embedding"] = self.client.embed(self.embed_model, [user_text])[0]
-            self.turns.append(urec)
 
             # assistant record
             arec = {
@@ -90,7 +87,11 @@ class Memory:
             }
             self._id_seq += 1
             if self.cfg.embed_turns:
-                arec["embedding"] = self.client.embed(self.embed_model, [assistant_text])[0]
+                # one embed call for both halves of the pair
+                urec["embedding"], arec["embedding"] = self.client.embed(
+                    self.embed_model, [user_text, assistant_text]
+                )
+            self.turns.append(urec)
             self.turns.append(arec)
 
         # Single non-blocking trigger for the whole pair
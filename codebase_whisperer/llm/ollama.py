@@ -5,14 +5,26 @@ import json
 import time
 import os
 import sys
+import threading
 from typing import Any, Callable, Dict, Iterable, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 def _olog(*a, **kw):
     if os.environ.get("OLLAMA_DEBUG") == "1":
         print(*a, file=sys.stderr, **kw)
 
+# Which embed endpoint each host speaks, learned on first use:
+#   "/api/embed"      -> multi-input batch endpoint (Ollama >= 0.3)
+#   "/api/embeddings" -> legacy one-prompt-per-request endpoint
+_EMBED_PATH_BY_HOST: Dict[str, str] = {}
+_EMBED_PATH_LOCK = threading.Lock()
+
+# Statuses an older server answers with when /api/embed does not exist.
+_EMBED_UNSUPPORTED_STATUSES = {404, 405, 501}
+
+
 class OllamaError(Exception):
     def __init__(self, msg: str, *, status: Optional[int] = None, body: Optional[str] = None):
         super().__init__(msg)
@@ -33,8 +45,9 @@ def _is_transient(status: Optional[int], err: Optional[BaseException]) -> bool:
 class OllamaClient:
     """
     Minimal, black-box client:
-      - _post(): retrying POST wrapper
-      - embed(): returns list[list[float]] (one call per input, stable behavior)
+      - _post(): retrying POST wrapper over one pooled requests.Session
+      - embed(): returns list[list[float]]; one POST to /api/embed per call when the
+        server supports it, else one POST to /api/embeddings per input
       - chat(): returns string; supports streaming with on_chunk callback
     """
 
@@ -46,12 +59,26 @@ class OllamaClient:
         retries: int = 2,
         backoff: float = 0.25,
         headers: Optional[Dict[str, str]] = None,
+        batch_embed: bool = True,
+        session: Optional[requests.Session] = None,
+        pool_size: int = 10,
+        keep_alive: bool = True,
     ) -> None:
         self.host = host.rstrip("/")
         self.timeout = timeout
         self.retries = retries
         self.backoff = backoff
+        self.batch_embed = batch_embed
         self._headers = {"Content-Type": "application/json", **(headers or {})}
+        if not keep_alive:
+            self._headers["Connection"] = "close"
+        # One session for embed/chat/streaming so TCP connections get reused.
+        # Pass `session=` to share a pool between clients or to stub HTTP in tests.
+        self._session = session if session is not None else _pooled_session(pool_size)
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        self._session.close()
 
     # ---- low-level ---------------------------------------------------------
     def _post(self, path: str, payload: Dict[str, Any], *, stream: bool = False) -> requests.Response:
@@ -62,8 +89,7 @@ class OllamaClient:
             try:
                 _olog(f"[OLLAMA] POST {url} attempt={attempt} stream={stream}")
                 _olog(f"[OLLAMA] payload={json.dumps(payload)[:500]}...")
-                # NOTE: tests monkeypatch requests.post; call it directly.
-                resp = requests.post(url, json=payload, timeout=self.timeout, headers=self._headers, stream=stream)
+                resp = self._session.post(url, json=payload, timeout=self.timeout, headers=self._headers, stream=stream)
                 _olog(f"[OLLAMA] status={resp.status_code}")
 
                 if 200 <= resp.status_code < 300:
@@ -107,14 +133,56 @@ class OllamaClient:
     # ---- high-level --------------------------------------------------------
     def embed(self, model: str, texts: Iterable[str]) -> List[List[float]]:
         """
-        Deterministic behavior for tests: one POST per input text.
         Returns a list of vectors (same order as inputs).
+        With batch_embed, the whole list goes to /api/embed in one POST; hosts that
+        don't know that endpoint fall back to one /api/embeddings POST per input,
+        and the choice is remembered per host.
+        """
+        items = list(texts)
+        if not items:
+            return []
+        if self.batch_embed and _EMBED_PATH_BY_HOST.get(self.host) != "/api/embeddings":
+            vecs = self._embed_batch(model, items)
+            if vecs is not None:
+                _remember_embed_path(self.host, "/api/embed")
+                return vecs
+            _olog(f"[OLLAMA] /api/embed unsupported on {self.host}; using /api/embeddings")
+            _remember_embed_path(self.host, "/api/embeddings")
+        return self._embed_each(model, items)
+
+    def _embed_batch(self, model: str, items: List[str]) -> Optional[List[List[float]]]:
         """
+        One POST to /api/embed. Returns None if the server doesn't support it;
+        raises OllamaError if it answers without one embedding per input.
+        """
+        try:
+            resp = self._post("/api/embed", {"model": model, "input": items}, stream=False)
+        except OllamaError as e:
+            # 404 is also what a missing *model* looks like; only treat it as a
+            # missing endpoint when the body doesn't talk about the model.
+            if e.status in _EMBED_UNSUPPORTED_STATUSES and "model" not in (e.body or "").lower():
+                return None
+            raise
+        data = _safe_json(resp)
+        vecs = data.get("embeddings") if isinstance(data, dict) else None
+        if not isinstance(vecs, list) or len(vecs) != len(items):
+            # the endpoint exists, so this is a bad answer, not an old server
+            got = len(vecs) if isinstance(vecs, list) else "no"
+            raise OllamaError(
+                f"Ollama POST /api/embed returned {got} embeddings for {len(items)} inputs",
+                status=resp.status_code,
+                body=json.dumps(data)[:500],
+            )
+        _olog(f"[OLLAMA] embed batch model={model} n={len(vecs)} len={len(vecs[0]) if vecs else 0}")
+        return vecs
+
+    def _embed_each(self, model: str, items: List[str]) -> List[List[float]]:
+        """Legacy path: one POST to /api/embeddings per input text."""
         out: List[List[float]] = []
-        for t in texts:
+        for t in items:
             resp = self._post("/api/embeddings", {"model": model, "prompt": t}, stream=False)
             data = _safe_json(resp)
-            _olog(f"[OLLAMA] chat non-stream raw={json.dumps(data)[:800]}...")
+            _olog(f"[OLLAMA] embeddings raw={json.dumps(data)[:800]}...")
             vec = data.get("embedding") or []
             _olog(f"[OLLAMA] embed model={model} len={len(vec)} first5={vec[:5] if isinstance(vec, list) else 'N/A'}")
             out.append(vec)
@@ -167,6 +235,19 @@ class OllamaClient:
 
         # -------- streaming (handle both message.content and response) --------
         resp = self._post("/api/chat", payload, stream=True)
+        try:
+            full = self._collect_stream(resp, on_chunk)
+        finally:
+            # hand the connection back to the pool even if we stopped reading early
+            close = getattr(resp, "close", None)
+            if callable(close):
+                close()
+
+        final = "".join(full)
+        _olog(f"[OLLAMA] chat stream final={(final[:400] + '...') if len(final) > 400 else final}")
+        return final
+
+    def _collect_stream(self, resp: requests.Response, on_chunk: Optional[Callable[[str], None]]) -> List[str]:
         full: List[str] = []
         for raw in resp.iter_lines(decode_unicode=True):
             if not raw:
@@ -195,10 +276,21 @@ class OllamaClient:
                     on_chunk(s)
                 except Exception as e:
                     _olog(f"[OLLAMA] on_chunk error: {e}")
+        return full
 
-        final = "".join(full)
-        _olog(f"[OLLAMA] chat stream final={(final[:400] + '...') if len(final) > 400 else final}")
-        return final
+
+def _pooled_session(pool_size: int) -> requests.Session:
+    """requests.Session with a keep-alive pool of `pool_size` connections per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _remember_embed_path(host: str, path: str) -> None:
+    with _EMBED_PATH_LOCK:
+        _EMBED_PATH_BY_HOST[host] = path
 
 
 def _safe_json(resp: requests.Response) -> Dict[str, Any]:
@@ -58,7 +58,11 @@ class OllamaChatSession:
         )
         pinned = mem_section.get("pinned") or []
 
-        client = OllamaClient(host)
+        client = OllamaClient(
+            host,
+            pool_size=int(cfg_dict.get("ollama", {}).get("pool_size", 10)),
+            keep_alive=bool(cfg_dict.get("ollama", {}).get("keep_alive", True)),
+        )
 
         return cls(
             client = client,
@@ -1,6 +1,7 @@
 from __future__ import annotations
-import sys, time
+import sys, time, threading
 from dataclasses import dataclass
+from typing import Callable, Optional
 
 @dataclass
 class StageTimer:
@@ -24,15 +25,25 @@ def _log(msg:str, kv:dict | None = None):
         print(f"{msg} {fields}", file=sys.stderr)
 
 class CounterBar:
-    def __init__(self, label: str, total: int | None = None, every: int = 50):
+    """
+    Throughput counter; safe to update from several worker threads.
+    `depth` (optional) reports the size of the queue feeding this stage.
+    """
+    def __init__(self, label: str, total: int | None = None, every: int = 50,
+                 depth: Optional[Callable[[], int]] = None):
         self.label, self.total, self.every = label, total, every
+        self.depth = depth
         self.n = 0
         self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
         _log(f"{label}: 0/{total if total is not None else '?'}")
 
     def update(self, k: int = 1):
-        self.n += k
-        if self.n % self.every == 0:
+        with self._lock:
+            before = self.n
+            self.n += k
+            crossed = self.n // self.every != before // self.every
+        if crossed:
             self._emit()
 
     def close(self):
@@ -44,5 +55,7 @@ class CounterBar:
         info = {"count": self.n, "rate_per_s": round(rate, 2)}
         if self.total is not None:
             info["total"] = self.total
+        if self.depth is not None:
+            info["queue_depth"] = self.depth()
         _log(self.label + (" [final]" if final else ""), info)
 
@@ -1,25 +1,54 @@
 # codebase_whisperer/ingest.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 import hashlib
+import json
+import os
 import sys
+import threading
+import time
 
 from rich import print as rprint
 
 from codebase_whisperer.config import load_config
-from codebase_whisperer.indexing.indexer import index_repo
-from codebase_whisperer.chunking.driver import chunk_text
+from codebase_whisperer.indexing.indexer import FileRecord, index_file
+from codebase_whisperer.indexing.walker import iter_entries, iter_path_entries
+from codebase_whisperer.indexing.gitsource import (
+    changed_files,
+    head_commit,
+    is_git_checkout,
+    iter_git_entries,
+    tracked_files,
+)
+from codebase_whisperer.chunking.driver import iter_chunks
+from codebase_whisperer.chunking.incremental import ParseCache, chunk_text_incremental, open_parse_cache
+from codebase_whisperer.chunking.pool import ChunkPool
 from codebase_whisperer.llm.ollama import OllamaClient
 from codebase_whisperer.logging_utils import StageTimer, CounterBar
+from codebase_whisperer.pipelines.stages import DONE, Pipeline, PipelineAborted
 from codebase_whisperer.db.io import (
     open_db,
     ensure_chunks,
+    ensure_chunk_refs,
+    ensure_chunk_content,
     ensure_vec_cache,
-    load_vec_cache_map,
+    ensure_manifest,
+    load_manifest,
+    ensure_meta,
+    load_meta,
+    ensure_checkpoint,
+    load_checkpoint,
+    load_vec_cache_matrix,
+    VecCacheMatrix,
     validate_vectors,
     upsert_rows,
+    delete_where,
+    distinct_values,
     ensure_vector_index,
+    sql_str,
 )
 
 def _sha256_text(s: str) -> str:
@@ -32,14 +61,41 @@ def run_ingest(
     table_name: str,
     config_path: Optional[str] = None,
     force_reembed: bool = False,
+    paths: Optional[Iterable[str]] = None,
+    resume: bool = False,
 ) -> None:
     """
-    High-level pipeline:
-      - load config
-      - walk & index files (no duplication of indexer defaults)
-      - chunk content via chunker
-      - embed (using Ollama client defaults unless config overrides)
-      - upsert rows to LanceDB through io.py black-box helpers
+    High-level pipeline; stages run concurrently, joined by bounded queues:
+      - walker: iter_entries (1 thread)
+      - reader: index_file, skipping files whose (size, mtime) match the manifest
+        from the last run (indexing.reader_workers threads); the manifest is
+        ignored when embedding.model/dim or the chunk limits changed since
+      - chunker: iter_chunks (indexing.chunker_workers threads), handing a file's
+        chunks on in parts of embed_batch_size as they are produced
+      - embedder: restores walk order, embeds cache misses in batches of
+        indexing.embed_batch_size, up to indexing.embed_concurrency in flight
+      - writer: upserts rows to LanceDB through io.py black-box helpers (1 thread)
+    then deletes rows for files that left the walk or now have fewer chunks.
+
+    `paths` (relpaths, or absolute paths under repo_root) limits the run to those
+    files instead of walking: each is re-ingested if it still exists and passes
+    the include/exclude/ignore filters, otherwise its rows are deleted. Files not
+    listed are left alone. Used by watch mode.
+
+    Files whose rows have all been flushed are recorded in "<table>_checkpoint"
+    until the run completes. With `resume`, files recorded by an interrupted run
+    are skipped before they are read (even with force_reembed); otherwise the
+    checkpoint is cleared and the run starts over.
+
+    With indexing.incremental_parse, the def spans and chunk hashes of each
+    file's last chunking are kept under "<db_dir>/<table>_parse_cache" (and its
+    source and syntax tree in memory, which watch mode reuses run after run): a
+    changed file is re-parsed incrementally and
+    only the definitions that changed are split and hashed again; the rest keep
+    their content_sha, so they also stay vec_cache hits. Chunks that are still
+    at the same chunk_idx are not rewritten at all, so their rows keep the
+    sha256/mtime of the version they were written for (the manifest has the
+    current ones).
     """
     with StageTimer("ingest.load_config", extra={"repo_root": str(Path(repo_root).resolve())}):
         cfg, _ = load_config(config_path)
@@ -52,8 +108,20 @@ def run_ingest(
     max_file_mb: float   = float(idx.get("max_file_mb", 1.5))
     include_hidden: bool = bool(idx.get("include_hidden", False))
     follow_symlinks: bool = bool(idx.get("follow_symlinks", False))
+    walk_workers: int = max(1, int(idx.get("walk_workers", 1)))
+    walk_ordered: bool = bool(idx.get("walk_ordered", True))
+    ignore_files: List[str] = list(idx.get("ignore_files", []))
+    file_source: str = str(idx.get("file_source", "walk"))
     max_chunk_chars: int = int(idx.get("max_chunk_chars", 2400))
     min_chunk_chars: int = int(idx.get("min_chunk_chars", 200))
+    # force_reembed means "process everything", so it also bypasses the manifest
+    skip_unchanged: bool = bool(idx.get("skip_unchanged", True)) and not force_reembed
+    delete_stale: bool = bool(idx.get("delete_stale", True))
+    checkpoint_every_s: float = float(idx.get("checkpoint_every_s", 30.0))
+    # "dedup": content + vector stored once per content_sha in "<table>_content"
+    dedup: bool = str(idx.get("storage", "rows")) == "dedup"
+    incremental_parse: bool = bool(idx.get("incremental_parse", False))
+    parse_cache_trees: int = max(0, int(idx.get("parse_cache_trees", 64)))
 
     emb = cfg.get("embedding", {})
     model: str = emb.get("model", "nomic-embed-text")              # Ollama default is still honored inside client
@@ -69,160 +137,663 @@ def run_ingest(
     # If dim is unknown, we’ll create tables lazily after first embed.
     chunks_tbl = None
     vcache_tbl = None
-    vec_cache: Dict[str, List[float]] = {}
+    # storage="dedup": the content table, and the content_shas it already holds
+    # (left empty under force_reembed so every vector gets rewritten once)
+    content_tbl = None
+    known_content: Set[str] = set()
+    # Read from vec_cache at most once per run, then kept current from the rows we
+    # write ourselves (see _remember_vectors) instead of re-reading the table.
+    vec_cache: VecCacheMatrix | Dict[str, List[float]] = {}
 
     # If dim is provided in config, we can eagerly wire up tables and load cache now.
     if dim is not None:
-        chunks_tbl = ensure_chunks(db, table_name, int(dim))
+        chunks_tbl, content_tbl = _open_chunk_tables(db, table_name, int(dim), dedup)
+        if content_tbl is not None and not force_reembed:
+            known_content = distinct_values(content_tbl, "content_sha")
         vcache_tbl = ensure_vec_cache(db, int(dim))
-        vec_cache = load_vec_cache_map(vcache_tbl, model)
+        vec_cache = load_vec_cache_matrix(vcache_tbl, model)
+
+    # Per-file (size, mtime, sha256) from the last run; entries are only written
+    # once all of a file's rows have been flushed.
+    manifest_tbl = ensure_manifest(db, table_name)
+    manifest: Dict[str, Tuple[int, float, str]] = load_manifest(manifest_tbl) if skip_unchanged else {}
+
+    # the manifest only vouches for rows built with the same model/dim/chunk limits
+    meta_tbl = ensure_meta(db, table_name)
+    meta = load_meta(meta_tbl)
+    fingerprint = _config_fingerprint(model, dim, max_chunk_chars, min_chunk_chars)
+    if manifest and meta.get("config_fingerprint") != fingerprint:
+        rprint("[yellow][ingest] embedding/chunking config changed: re-ingesting every file[/yellow]")
+        manifest = {}
+
+    # file_source="git": list tracked files from the index and only stat/read the
+    # ones that changed since the commit recorded by the last completed ingest
+    # only explicit `paths` (a partial run) -> nothing to record for the next git run
+    use_git = paths is None and file_source == "git" and is_git_checkout(repo_root)
+    git_head = head_commit(repo_root) if use_git else None
+
+    # files that fully landed in an interrupted run -> {relpath: (size, mtime, chunks)}
+    checkpoint_tbl = ensure_checkpoint(db, table_name)
+    resumed: Dict[str, Tuple[int, float, int]] = load_checkpoint(checkpoint_tbl) if resume else {}
+    if not resume:
+        delete_where(checkpoint_tbl, "relpath IS NOT NULL")
+    elif resumed:
+        rprint(f"[cyan][ingest] resuming: {len(resumed)} files already done[/cyan]")
+
+    # every relpath the walk produced (including skipped ones), and the new chunk
+    # count of each file we re-chunked; both feed the stale-row cleanup at the end
+    seen_relpaths: set = set()
+    chunk_counts: Dict[str, int] = {}
+
+    def _stat_unchanged(relpath: str, size: int, mtime: float) -> bool:
+        seen_relpaths.add(relpath)
+        done = resumed.get(relpath)
+        if done is not None and done[0] == size and done[1] == mtime:
+            # landed before the interruption; its rows still need the stale trim
+            if done[2] >= 0:
+                chunk_counts[relpath] = done[2]
+            return True
+        if not skip_unchanged:
+            return False
+        prev = manifest.get(relpath)
+        return prev is not None and prev[0] == size and prev[1] == mtime
 
     # --- client ---
-    client = OllamaClient(host, timeout=timeout, retries=retries, backoff=backoff)
+    oll = cfg.get("ollama", {})
+    client = OllamaClient(
+        host,
+        timeout=timeout,
+        retries=retries,
+        backoff=backoff,
+        # every concurrent embed worker gets its own pooled connection
+        pool_size=max(int(oll.get("pool_size", 10)), int(idx.get("embed_concurrency", 1))),
+        keep_alive=bool(oll.get("keep_alive", True)),
+    )
 
-    # --- walk + index ---
-    with StageTimer(
-        "ingest.index_repo",
-        extra={
-            "include_globs": ",".join(include_globs) if include_globs else "",
-            "exclude_globs": ",".join(exclude_globs) if exclude_globs else "",
-            "include_hidden": include_hidden,
-            "follow_symlinks": follow_symlinks,
-            "max_file_mb": max_file_mb,
-        },
-    ):
-        file_iter = index_repo(
-            repo_root=str(Path(repo_root).resolve()),
-            include_globs=include_globs,
-            exclude_globs=exclude_globs,
-            encodings=encodings,
-            max_file_mb=max_file_mb,
-            include_hidden=include_hidden,
+    # --- stage sizing ---
+    embed_batch_size: int = max(1, int(idx.get("embed_batch_size", 24)))
+    embed_concurrency: int = max(1, int(idx.get("embed_concurrency", 1)))
+    reader_workers: int = max(1, int(idx.get("reader_workers", 4)))
+    chunker_workers: int = max(1, int(idx.get("chunker_workers", 1)))
+    # > 0: chunk in that many worker processes instead of chunker_workers threads
+    chunk_processes: int = max(0, int(idx.get("chunk_processes", 0)))
+    chunk_files_per_task: int = max(1, int(idx.get("chunk_files_per_task", 8)))
+    queue_size: int = max(1, int(idx.get("queue_size", 64)))
+    # files admitted past the walker but not yet assembled into rows; bounds the
+    # reorder buffer (and so memory) whatever order the workers finish in
+    max_files_in_flight: int = max(1, int(idx.get("max_files_in_flight", 256)))
+
+    root = Path(repo_root).resolve()
+    max_bytes = int(max_file_mb * 1024 * 1024)
+    scope: Optional[Set[str]] = None if paths is None else {_relpath_under(root, p) for p in paths}
+
+    pipe = Pipeline("ingest")
+    path_q = pipe.queue(queue_size)     # walker  -> readers
+    rec_q = pipe.queue(queue_size)      # readers -> chunkers
+    chunked_q = pipe.queue(queue_size)  # chunkers -> assembler/embedder (this thread)
+    write_q = pipe.queue(queue_size)    # assembler -> writer
+
+    # counters for visibility (queue_depth = backlog waiting for that stage)
+    walk_bar = CounterBar("walk", total=None, every=200, depth=path_q.qsize)
+    file_bar = CounterBar("files", total=None, every=50, depth=rec_q.qsize)
+    chunk_bar = CounterBar("chunks", total=None, every=200, depth=chunked_q.qsize)
+    embed_bar = CounterBar("embeds", total=None, every=100)
+    write_bar = CounterBar("writes", total=None, every=500, depth=write_q.qsize)
+
+    window = threading.BoundedSemaphore(max_files_in_flight)
+    # each file's last chunking, so a changed file only re-hashes the defs that
+    # changed (and re-parses incrementally while its tree is still in memory)
+    parse_cache: Optional[ParseCache] = None
+    if incremental_parse:
+        if chunk_processes > 0:
+            rprint("[yellow][ingest] incremental_parse is ignored with chunk_processes > 0[/yellow]")
+        else:
+            parse_cache = open_parse_cache(
+                os.path.join(db_dir, f"{table_name}_parse_cache"), max_trees=parse_cache_trees,
+            )
+    chunk_pool: Optional[ChunkPool] = None
+    if chunk_processes > 0:
+        chunk_pool = ChunkPool(
+            chunk_processes,
+            max_chunk_chars=max_chunk_chars,
+            min_chunk_chars=min_chunk_chars,
+        )
+
+    # --- walker ---
+    def _git_entries():
+        tracked = tracked_files(root, follow_symlinks=follow_symlinks)
+        last_commit = meta.get("git_commit") if skip_unchanged and manifest else None
+        changed = changed_files(root, last_commit) if last_commit else None
+        only = None
+        if changed is not None:
+            # edits the last run ingested uncommitted may have been reverted since,
+            # which leaves them out of the diff against its commit
+            changed |= set(json.loads(meta.get("git_dirty", "[]")))
+            # also pick up tracked files never ingested (e.g. include_globs grew)
+            only = {rel for rel in tracked if rel in changed or rel not in manifest}
+        rprint(
+            f"[cyan][ingest] git: {len(tracked)} tracked files, "
+            f"{'all' if only is None else len(only)} to check[/cyan]"
+        )
+        return iter_git_entries(
+            root,
+            include_globs,
+            exclude_globs,
             follow_symlinks=follow_symlinks,
+            include_hidden=include_hidden,
+            tracked=tracked,
+            only=only,
+            # unchanged blobs: never stat()ed or read, but still part of the repo
+            on_skipped=seen_relpaths.add,
         )
 
-    ts_parser_cache: Dict[str, object] = {}
+    def _walk():
+        if scope is not None:
+            entries = iter_path_entries(
+                root,
+                sorted(scope),
+                include_globs,
+                exclude_globs,
+                follow_symlinks=follow_symlinks,
+                include_hidden=include_hidden,
+                ignore_files=ignore_files,
+            )
+        elif use_git:
+            entries = _git_entries()
+        else:
+            entries = iter_entries(
+                root=str(root),
+                include_globs=include_globs,
+                exclude_globs=exclude_globs,
+                follow_symlinks=follow_symlinks,
+                include_hidden=include_hidden,
+                walk_workers=walk_workers,
+                ordered=walk_ordered,
+                ignore_files=ignore_files,
+            )
+        for seq, entry in enumerate(entries):
+            while not window.acquire(timeout=pipe.poll_s):
+                if pipe.stop.is_set():
+                    return
+            yield seq, entry
+
+    # --- reader: skip / read / hash (stat data comes with the walk entry) ---
+    def _read(item):
+        seq, entry = item
+        try:
+            rec = index_file(
+                path=entry,
+                repo_root=root,
+                encodings=encodings,
+                max_bytes=max_bytes,
+                is_unchanged=_stat_unchanged,
+            )
+        except Exception as e:
+            rprint(f"[yellow][ingest] failed {entry.path}: {e}[/yellow]")
+            rec = None
+        return seq, rec
+
+    # --- chunker (parsers aren't thread-safe: one cache per worker thread) ---
+    parser_caches = threading.local()
+
+    def _needs_chunking(rec: Optional[FileRecord]) -> bool:
+        if rec is None:
+            return False
+        print(f"DEBUG: got file {rec.relpath} lang={rec.lang}", file=sys.stderr)
+        prev = manifest.get(rec.relpath)
+        # touched but byte-identical: refresh the stat, skip chunk/embed/upsert
+        return not (prev is not None and prev[2] == rec.sha256)
+
+    # items on chunked_q: (seq, rec, pieces, final, shas, stored); a file's pieces may
+    # arrive in several parts, the last with final=True. pieces=None: nothing to re-chunk.
+    # shas: each piece's content_sha when the chunker already knows it, else None.
+    # stored: per piece, its row already holds exactly this chunk (no write needed).
+    def _chunked(
+        seq: int,
+        rec: FileRecord,
+        pieces: List[Tuple[Optional[str], str]],
+        final: bool = True,
+        shas: Optional[List[str]] = None,
+        stored: Optional[List[bool]] = None,
+    ):
+        print(f"DEBUG: pieces={len(pieces)} for {rec.relpath}", file=sys.stderr)
+        chunk_bar.update(len(pieces))
+        return seq, rec, pieces, final, shas, stored
+
+    def _chunk(item):
+        seq, rec = item
+        if not _needs_chunking(rec):
+            return seq, rec, None, True, None, None
+        if not hasattr(parser_caches, "ts"):
+            parser_caches.ts = {}
+        if parse_cache is not None:
+            update = chunk_text_incremental(
+                key=rec.relpath,
+                lang=rec.lang or "text",
+                text=rec.content or "",
+                max_chunk_chars=max_chunk_chars,
+                min_chunk_chars=min_chunk_chars,
+                parse_cache=parse_cache,
+                ts_parser_cache=parser_caches.ts,
+                tag=rec.sha256,
+            )
+            # the manifest only lists a file once all its rows landed, so rows from the
+            # cached chunking are in the table if the manifest has the same version
+            prev = manifest.get(rec.relpath)
+            stored = update.in_place if prev is not None and prev[2] == update.prev_tag else None
+            return _chunked(seq, rec, update.chunks, shas=update.shas, stored=stored)
+        part: List[Tuple[Optional[str], str]] = []
+        for chunk in iter_chunks(
+            lang=rec.lang or "text",
+            text=rec.content or "",
+            max_chunk_chars=max_chunk_chars,
+            min_chunk_chars=min_chunk_chars,
+            ts_parser_cache=parser_caches.ts,
+        ):
+            part.append(chunk)
+            if len(part) >= embed_batch_size:
+                # a batch's worth: let the embedder start on it while we keep going
+                pipe.put(chunked_q, _chunked(seq, rec, part, final=False))
+                part = []
+        return _chunked(seq, rec, part)
+
+    def _chunk_in_pool(items):
+        # one pool task per group of files; each worker thread keeps one process busy
+        todo = [(seq, rec) for seq, rec in items if _needs_chunking(rec)]
+        results = chunk_pool.chunk_files([rec for _, rec in todo])
+        by_seq = {seq: _chunked(seq, rec, pieces) for (seq, rec), pieces in zip(todo, results)}
+        return [by_seq.get(seq, (seq, rec, None, True, None, None)) for seq, rec in items]
+
+    # --- writer (single thread: owns pending_rows and the manifest bookkeeping) ---
     pending_rows: List[dict] = []
+    # Row positions are the same in staging order and in flush order, so a file is
+    # durable once the running count of written rows passes its last row.
+    rows_written = 0
+    last_flush = time.monotonic()
+    # (rows staged through this file, manifest entry, new chunk count or -1)
+    manifest_queue: Deque[Tuple[int, dict, int]] = deque()
 
-    # counters for visibility
-    file_bar = CounterBar("files", total=None, every=50)
-    chunk_bar = CounterBar("chunks", total=None, every=200)
-    embed_bar = CounterBar("embeds", total=None, every=100)
-    write_bar = CounterBar("writes", total=None, every=500)
+    def _flush() -> None:
+        nonlocal rows_written, last_flush
+        written = _flush_rows(
+            pending_rows, chunks_tbl, vcache_tbl, model, dim,
+            content_tbl=content_tbl, known_content=known_content,
+        )
+        _remember_vectors(vec_cache, written)
+        rows_written += len(written)
+        last_flush = time.monotonic()
+        write_bar.update(len(written))
+        landed: List[Tuple[dict, int]] = []
+        while manifest_queue and manifest_queue[0][0] <= rows_written:
+            _, entry, n = manifest_queue.popleft()
+            landed.append((entry, n))
+        upsert_rows(manifest_tbl, [entry for entry, _ in landed], on=["relpath"])
+        # after the manifest: a file in the checkpoint is always fully recorded
+        upsert_rows(
+            checkpoint_tbl,
+            [
+                {"relpath": entry["relpath"], "size": entry["size"], "mtime": entry["mtime"], "chunks": n}
+                for entry, n in landed
+            ],
+            on=["relpath"],
+        )
+
+    def _write(item) -> None:
+        kind, payload = item
+        if kind == "file":
+            manifest_queue.append(payload)
+        else:
+            pending_rows.extend(payload)
+        # flush opportunistically to keep memory steady, and often enough that
+        # a crash loses at most checkpoint_every_s of finished files
+        if len(pending_rows) >= 500 or (
+            manifest_queue and time.monotonic() - last_flush >= checkpoint_every_s
+        ):
+            _flush()
 
     def _ensure_tables_if_needed(vector_dim: int):
-        nonlocal chunks_tbl, vcache_tbl, vec_cache, dim
+        nonlocal chunks_tbl, content_tbl, known_content, vcache_tbl, vec_cache, dim
         if chunks_tbl is None:
-            chunks_tbl = ensure_chunks(db, table_name, vector_dim)
+            chunks_tbl, content_tbl = _open_chunk_tables(db, table_name, vector_dim, dedup)
+            if content_tbl is not None and not force_reembed:
+                known_content = distinct_values(content_tbl, "content_sha")
         if vcache_tbl is None:
             vcache_tbl = ensure_vec_cache(db, vector_dim)
-            vec_cache = load_vec_cache_map(vcache_tbl, model)
+            vec_cache = load_vec_cache_matrix(vcache_tbl, model)
         dim = vector_dim
 
-    with StageTimer("ingest.process_files"):
-        for rec in file_iter:
-            print(f"DEBUG: got file {rec.relpath} lang={rec.lang}", file=sys.stderr)
-            pieces: List[Tuple[Optional[str], str]] = chunk_text(
-                lang=rec.lang or "text",
-                text=rec.content or "",
-                max_chunk_chars=max_chunk_chars,
-                min_chunk_chars=min_chunk_chars,
-                ts_parser_cache=ts_parser_cache,
-            )
-            print(f"DEBUG: pieces={len(pieces)} for {rec.relpath}", file=sys.stderr)  # ADD HERE
-            # build rows + embed
-            for idx_i, (symbol, piece) in enumerate(pieces):
-                chunk_sha = _sha256_text(piece)
-                vec: Optional[List[float]] = None
-
-                use_cached = (not force_reembed) and (chunk_sha in vec_cache)
-                if use_cached:
-                    vec = vec_cache[chunk_sha]
-                else:
-                    # Embed now (one by one keeps code simple; batch later if needed)
-                    v = client.embed(model, [piece])
-                    # normalize to List[float]
-                    vec0 = v[0] if isinstance(v, list) and v and isinstance(v[0], (list, tuple)) else v
-                    vec = [float(x) for x in vec0]
-                    # Learn dim & ensure tables only once we know it
-                    if dim is None:
-                        _ensure_tables_if_needed(len(vec))
-
-                # If dim was provided in config, ensure tables once up-front
-                if dim is not None and chunks_tbl is None:
-                    _ensure_tables_if_needed(int(dim))
-
-                # build row to match schema.py exactly
-                row = {
-                    "id": f"{rec.relpath}:{idx_i}",
-                    "path": rec.path,
-                    "realpath": rec.realpath,
-                    "is_symlink": bool(rec.is_symlink),
-                    "relpath": rec.relpath,
-                    "lang": rec.lang or "text",
-                    "symbol": symbol or "",
-                    "chunk_idx": idx_i,
-                    "content": piece,
-                    "sha256": rec.sha256,
-                    "content_sha": chunk_sha,
-                    "mtime": float(rec.mtime or 0.0),
-                    "vector": vec,
-                }
-                print(f"DEBUG: adding row id={row['id']} vec_len={len(vec) if vec else None}", file=sys.stderr)  # ADD HERE
-                pending_rows.append(row)
-
-            # flush opportunistically to keep memory steady
-            if len(pending_rows) >= 500:
-                _flush_rows(pending_rows, chunks_tbl, vcache_tbl, model, dim)
-                if vcache_tbl is not None:
-                    vec_cache = load_vec_cache_map(vcache_tbl, model)
+    # --- assembler + embedder (this thread, embed calls on a worker pool) ---
+    rows_staged = 0
+    # rows since the last submitted batch, in chunk order; cache misses also sit in
+    # `awaiting_embed` (same dict objects) until a full batch is ready.
+    staged_rows: List[dict] = []
+    awaiting_embed: List[dict] = []
+    # (rows, future|None) segments in submission order; rows are only released to
+    # the writer from the front, so output order never depends on which batch
+    # finishes first. At most `embed_concurrency` slots are in flight: one per
+    # embed batch, and one per batch's worth of cached rows queued behind one.
+    in_flight: Deque[Tuple[List[dict], Optional[Future]]] = deque()
+
+    def _slots_in_flight() -> int:
+        return sum(1 if fut is not None else -(-len(rows) // embed_batch_size) for rows, fut in in_flight)
+
+    def _collect(*, wait_all: bool = False) -> None:
+        while in_flight:
+            rows, fut = in_flight[0]
+            if fut is not None:
+                # backpressure: block on the oldest batch while the window is full
+                if not (wait_all or fut.done() or _slots_in_flight() >= embed_concurrency):
+                    return
+                vecs = fut.result()
+                embed_bar.update(len(vecs))
+                # Learn dim & ensure tables only once we know it
+                if dim is None and vecs:
+                    _ensure_tables_if_needed(len(vecs[0]))
+            in_flight.popleft()
+            pipe.put(write_q, ("rows", rows))
+
+    def _submit_awaiting(pool: ThreadPoolExecutor) -> None:
+        if not awaiting_embed:
+            return
+        fut = pool.submit(_embed_rows, client, model, list(awaiting_embed))
+        in_flight.append((list(staged_rows), fut))
+        awaiting_embed.clear()
+        staged_rows.clear()
+        _collect()
+
+    def _release_staged() -> None:
+        # cached-only rows queue up behind any batches still in flight
+        if awaiting_embed or not staged_rows:
+            return
+        if in_flight and in_flight[-1][1] is None:
+            in_flight[-1][0].extend(staged_rows)
+        else:
+            in_flight.append((list(staged_rows), None))
+        staged_rows.clear()
+        _collect()
+
+    # chunks of the current (walk-order) file already assembled from earlier parts
+    file_chunks = 0
+
+    def _assemble(
+        rec: FileRecord,
+        pieces: Optional[List[Tuple[Optional[str], str]]],
+        pool,
+        final: bool = True,
+        shas: Optional[List[str]] = None,
+        stored: Optional[List[bool]] = None,
+    ) -> None:
+        nonlocal rows_staged, file_chunks
+        file_entry = {
+            "relpath": rec.relpath,
+            "size": int(rec.size_bytes),
+            "mtime": float(rec.mtime or 0.0),
+            "sha256": rec.sha256,
+        }
+        if pieces is None:
+            pipe.put(write_q, ("file", (rows_staged, file_entry, -1)))
+            return
+        # build rows; cache misses are embedded in batches across files
+        staged = 0
+        for idx_i, (symbol, piece) in enumerate(pieces, start=file_chunks):
+            if stored is not None and stored[idx_i - file_chunks]:
+                continue
+            chunk_sha = shas[idx_i - file_chunks] if shas is not None else _sha256_text(piece)
+
+            use_cached = (not force_reembed) and (chunk_sha in vec_cache)
+
+            # If dim was provided in config, ensure tables once up-front
+            if dim is not None and chunks_tbl is None:
+                _ensure_tables_if_needed(int(dim))
+
+            # build row to match schema.py exactly
+            row = {
+                "id": f"{rec.relpath}:{idx_i}",
+                "path": rec.path,
+                "realpath": rec.realpath,
+                "is_symlink": bool(rec.is_symlink),
+                "relpath": rec.relpath,
+                "lang": rec.lang or "text",
+                "symbol": symbol or "",
+                "chunk_idx": idx_i,
+                "content": piece,
+                "sha256": rec.sha256,
+                "content_sha": chunk_sha,
+                "mtime": float(rec.mtime or 0.0),
+                "vector": vec_cache[chunk_sha] if use_cached else None,
+            }
+            staged_rows.append(row)
+            staged += 1
+            if not use_cached:
+                awaiting_embed.append(row)
+                if len(awaiting_embed) >= embed_batch_size:
+                    _submit_awaiting(pool)
+
+        rows_staged += staged
+        file_chunks += len(pieces)
+        if final:
+            chunk_counts[rec.relpath] = file_chunks
+            pipe.put(write_q, ("file", (rows_staged, file_entry, file_chunks)))
+            file_chunks = 0
+        _release_staged()
+
+    pipe.source("walk", _walk(), path_q, bar=walk_bar)
+    pipe.stage("read", _read, path_q, rec_q, workers=reader_workers, bar=file_bar)
+    if chunk_pool is None:
+        pipe.stage("chunk", _chunk, rec_q, chunked_q, workers=chunker_workers)
+    else:
+        pipe.stage(
+            "chunk", _chunk_in_pool, rec_q, chunked_q,
+            workers=chunk_processes, batch=chunk_files_per_task,
+        )
+    pipe.sink("write", _write, write_q)
+
+    with StageTimer(
+        "ingest.process_files",
+        extra={
+            "include_globs": ",".join(include_globs) if include_globs else "",
+            "exclude_globs": ",".join(exclude_globs) if exclude_globs else "",
+            "embed_batch_size": embed_batch_size,
+            "embed_concurrency": embed_concurrency,
+            "reader_workers": reader_workers,
+            "chunker_workers": chunker_workers,
+            "chunk_processes": chunk_processes,
+            "walk_workers": walk_workers,
+            "file_source": "git" if use_git else "walk",
+            "queue_size": queue_size,
+        },
+    ):
+        try:
+            with ThreadPoolExecutor(max_workers=embed_concurrency, thread_name_prefix="embed") as pool:
+                # walker order is restored here from the sequence numbers
+                # (parts of the current file are assembled as soon as they arrive)
+                reorder: Dict[int, List[Tuple[Optional[FileRecord], Optional[list], bool, Optional[list], Optional[list]]]] = {}
+                next_seq = 0
+                while True:
+                    item = pipe.get(chunked_q)
+                    if item is DONE:
+                        break
+                    seq, rec, pieces, final, shas, stored = item
+                    reorder.setdefault(seq, []).append((rec, pieces, final, shas, stored))
+                    while next_seq in reorder:
+                        finished = False
+                        for rec, pieces, final, shas, stored in reorder.pop(next_seq):
+                            if rec is not None:
+                                _assemble(rec, pieces, pool, final, shas, stored)
+                            finished = final
+                        if not finished:
+                            break  # more parts of this file to come
+                        next_seq += 1
+                        window.release()
+
+                # embed the tail batch and wait for everything still in flight
+                _submit_awaiting(pool)
+                _release_staged()
+                _collect(wait_all=True)
+            pipe.put(write_q, DONE)
+        except PipelineAborted:
+            pass  # a stage failed; join() below re-raises its error
+        except BaseException as e:
+            pipe.fail(e)
+        try:
+            pipe.join()
+        except BaseException:
+            # keep whatever finished before the failure, so --resume can skip it;
+            # the writer has stopped, so take over what it left in its queue
+            try:
+                while not write_q.empty():
+                    item = write_q.get_nowait()
+                    if item is not DONE:
+                        _write(item)
+                _flush()
+            except Exception as e:
+                rprint(f"[yellow][ingest] checkpoint flush failed: {e}[/yellow]")
+            raise
+        finally:
+            if chunk_pool is not None:
+                chunk_pool.close()
+
     # final flush
-    _flush_rows(pending_rows, chunks_tbl, vcache_tbl, model, dim)
-    if vcache_tbl is not None:
-        vec_cache = load_vec_cache_map(vcache_tbl, model)
+    _flush()
+
+    if delete_stale and chunks_tbl is not None:
+        with StageTimer("ingest.db.delete_stale"):
+            _delete_stale_rows(chunks_tbl, manifest_tbl, seen_relpaths, chunk_counts, scope=scope)
+            if content_tbl is not None:
+                known_content -= _delete_orphan_content(chunks_tbl, content_tbl)
+    if parse_cache is not None:
+        # cached parses of files that left the walk are never needed again
+        if scope is None:
+            parse_cache.prune(seen_relpaths)
+        else:
+            for rel in scope - seen_relpaths:
+                parse_cache.forget(rel)
+    meta_rows = []
+    dirty = changed_files(root, git_head) if git_head is not None else None
+    if dirty is not None:
+        # everything up to this commit is now in the table, plus the working-tree
+        # state of the files that differed from it
+        meta_rows.append({"key": "git_commit", "value": git_head})
+        meta_rows.append({"key": "git_dirty", "value": json.dumps(sorted(dirty))})
+    if scope is None:
+        # a partial run leaves the other files as they were built
+        meta_rows.append({"key": "config_fingerprint", "value": fingerprint})
+    upsert_rows(meta_tbl, meta_rows, on=["key"])
+    # the run is complete: nothing left to resume
+    delete_where(checkpoint_tbl, "relpath IS NOT NULL")
     # create vector index lazily (no-op on empty)
-        # create vector index lazily (no-op on empty)
     if chunks_tbl is not None:
         with StageTimer("ingest.db.ensure_vector_index", extra={"metric": "cosine"}):
-            ensure_vector_index(chunks_tbl, column="vector", metric="cosine")
+            ensure_vector_index(content_tbl if dedup else chunks_tbl, column="vector", metric="cosine")
 
-    # Pre-warm cache (best-effort) so second run can skip embeds.
+    # Make sure the cache table exists (best-effort) so a second run can skip embeds.
     if vcache_tbl is None:
         try:
             probe_dim = int(emb.get("dim", dim or 768))
             vcache_tbl = ensure_vec_cache(db, probe_dim)
-            vec_cache = load_vec_cache_map(vcache_tbl, model)
             if "dim" in emb and chunks_tbl is None:
-                chunks_tbl = ensure_chunks(db, table_name, int(emb["dim"]))
+                chunks_tbl, content_tbl = _open_chunk_tables(db, table_name, int(emb["dim"]), dedup)
         except Exception:
-            vec_cache = {}
             vcache_tbl = None
 
      # close counters
+    walk_bar.close()
     file_bar.close()
     chunk_bar.close()
     embed_bar.close()
     write_bar.close()
     rprint("[green]Ingest complete.[/green]")
 
+def _config_fingerprint(model: str, dim: Optional[int], max_chunk_chars: int, min_chunk_chars: int) -> str:
+    """The settings every stored row depends on; a change invalidates the manifest."""
+    return f"model={model};dim={'auto' if dim is None else int(dim)};max_chunk_chars={max_chunk_chars};min_chunk_chars={min_chunk_chars}"
+
+def _relpath_under(root: Path, path: str) -> str:
+    """POSIX relpath for a path given relative to `root` or as an absolute path under it."""
+    p = Path(path)
+    if p.is_absolute():
+        p = Path(os.path.abspath(p)).relative_to(root)
+    return p.as_posix()
+
+def _open_chunk_tables(db, table_name: str, vector_dim: int, dedup: bool):
+    """(chunks table, content table or None) for the configured indexing.storage."""
+    if not dedup:
+        chunks_tbl, content_tbl = ensure_chunks(db, table_name, vector_dim), None
+    else:
+        chunks_tbl = ensure_chunk_refs(db, table_name)
+        content_tbl = ensure_chunk_content(db, table_name, vector_dim)
+    if ("vector" in chunks_tbl.schema.names) == dedup:
+        built = "rows" if dedup else "dedup"
+        raise ValueError(
+            f"table {table_name!r} was built with indexing.storage={built!r}; "
+            "ingest into a new table to switch storage modes"
+        )
+    return chunks_tbl, content_tbl
+
+def _embed_rows(client: OllamaClient, model: str, rows: List[dict]) -> List[List[float]]:
+    """
+    Embed rows["content"] in one client call and fill in row["vector"] in place.
+    Identical contents within the batch are only sent once.
+    """
+    uniq: Dict[str, int] = {}
+    texts: List[str] = []
+    for r in rows:
+        if r["content_sha"] not in uniq:
+            uniq[r["content_sha"]] = len(texts)
+            texts.append(r["content"])
+
+    vecs = client.embed(model, texts)
+    if len(vecs) != len(texts):
+        raise ValueError(f"embed returned {len(vecs)} vectors for {len(texts)} inputs")
+    # normalize to List[float]
+    vecs = [[float(x) for x in v] for v in vecs]
+
+    for r in rows:
+        r["vector"] = vecs[uniq[r["content_sha"]]]
+    return vecs
+
 def _flush_rows(
     pending_rows: List[dict],
     chunks_tbl,
     vcache_tbl,
     model: str,
     dim: Optional[int],
-) -> None:
+    *,
+    content_tbl=None,
+    known_content: Optional[Set[str]] = None,
+) -> List[dict]:
+    """
+    Write pending rows (+ their vec_cache entries); returns the rows written.
+    With `content_tbl` (storage="dedup"), chunks_tbl only gets the per-location
+    columns, and content/vector go to content_tbl for shas not in `known_content`.
+    """
     if not pending_rows:
-        return
+        return []
     print(f"DEBUG: flush_rows with len(rows)={len(pending_rows)}, expected dim={dim}", file=sys.stderr)
     if pending_rows:
         example_vec = pending_rows[0].get("vector")
-        print(f"DEBUG: example row vector length={len(example_vec) if example_vec else None}", file=sys.stderr)
+        print(f"DEBUG: example row vector length={len(example_vec) if example_vec is not None else None}", file=sys.stderr)
     if chunks_tbl is None or dim is None:
         # nothing to write yet (waiting to learn dim)
-        return
+        return []
     rows = validate_vectors(pending_rows, dim, key="vector")
-    upsert_rows(chunks_tbl, rows, on=["id"])
+    if content_tbl is None:
+        upsert_rows(chunks_tbl, rows, on=["id"])
+    else:
+        known = known_content if known_content is not None else set()
+        new_content: Dict[str, dict] = {}
+        for r in rows:
+            sha = r["content_sha"]
+            if sha not in known and sha not in new_content:
+                new_content[sha] = {"content_sha": sha, "content": r["content"], "vector": r["vector"]}
+        # content first: a ref never points at a sha the content table lacks
+        upsert_rows(content_tbl, list(new_content.values()), on=["content_sha"])
+        known.update(new_content)
+        upsert_rows(
+            chunks_tbl,
+            [{k: v for k, v in r.items() if k not in ("content", "vector")} for r in rows],
+            on=["id"],
+        )
 
     # NEW: persist cache entries
     if vcache_tbl is not None:
@@ -234,4 +805,88 @@ def _flush_rows(
         if cache_rows:
             upsert_rows(vcache_tbl, cache_rows, on=["chunk_sha", "model"])
 
-    pending_rows.clear()
\ No newline at end of file
+    pending_rows.clear()
+    return rows
+
+def _stale_predicates(
+    gone: List[str],
+    chunk_counts: Dict[str, int],
+    *,
+    max_paths: int = 1000,
+) -> List[str]:
+    """
+    Build a few delete predicates covering:
+      - every row of a relpath no longer in the walk
+      - rows with chunk_idx >= a file's new chunk count
+    Files are grouped by chunk count so one clause covers many paths; each
+    predicate mentions at most `max_paths` relpaths.
+    """
+    clauses: List[Tuple[int, str]] = []  # (paths mentioned, clause)
+    for i in range(0, len(gone), max_paths):
+        part = gone[i:i + max_paths]
+        clauses.append((len(part), f"relpath IN ({','.join(sql_str(p) for p in part)})"))
+
+    by_count: Dict[int, List[str]] = {}
+    for rel, n in chunk_counts.items():
+        by_count.setdefault(n, []).append(rel)
+    for n in sorted(by_count):
+        rels = sorted(by_count[n])
+        for i in range(0, len(rels), max_paths):
+            part = rels[i:i + max_paths]
+            clauses.append((
+                len(part),
+                f"(chunk_idx >= {n} AND relpath IN ({','.join(sql_str(p) for p in part)}))",
+            ))
+
+    preds: List[str] = []
+    cur: List[str] = []
+    cur_paths = 0
+    for n_paths, clause in clauses:
+        if cur and cur_paths + n_paths > max_paths:
+            preds.append(" OR ".join(cur))
+            cur, cur_paths = [], 0
+        cur.append(clause)
+        cur_paths += n_paths
+    if cur:
+        preds.append(" OR ".join(cur))
+    return preds
+
+def _delete_orphan_content(chunks_tbl, content_tbl, *, max_shas: int = 1000) -> Set[str]:
+    """storage="dedup": drop content rows no chunk row references any more; returns their shas."""
+    orphans = distinct_values(content_tbl, "content_sha") - distinct_values(chunks_tbl, "content_sha")
+    gone = sorted(orphans)
+    for i in range(0, len(gone), max_shas):
+        part = gone[i:i + max_shas]
+        delete_where(content_tbl, f"content_sha IN ({','.join(sql_str(s) for s in part)})")
+    return orphans
+
+def _delete_stale_rows(
+    chunks_tbl,
+    manifest_tbl,
+    seen_relpaths: set,
+    chunk_counts: Dict[str, int],
+    *,
+    scope: Optional[Set[str]] = None,
+) -> None:
+    """
+    Drop rows for removed files and for chunk indexes past a file's new chunk count.
+    With `scope`, only files in it can count as removed (a partial run).
+    """
+    in_scope = (lambda rels: rels) if scope is None else (lambda rels: rels & scope)
+    gone = sorted(in_scope(distinct_values(chunks_tbl, "relpath") - seen_relpaths))
+    for pred in _stale_predicates(gone, chunk_counts):
+        delete_where(chunks_tbl, pred)
+    # forget removed files in the manifest too (it may know files the chunks table doesn't)
+    gone_files = sorted(in_scope(distinct_values(manifest_tbl, "relpath") - seen_relpaths))
+    for pred in _stale_predicates(gone_files, {}):
+        delete_where(manifest_tbl, pred)
+
+def _remember_vectors(vec_cache: VecCacheMatrix | Dict[str, List[float]], rows: List[dict]) -> None:
+    """
+    Fold just-written rows into the in-memory cache (same normalization as the
+    table). Existing entries are overwritten, as the upsert did in the table,
+    so vectors re-embedded by force_reembed replace the old ones.
+    """
+    for r in rows:
+        if r.get("vector") is not None:
+            vec_cache[r["content_sha"]] = r["vector"]
\ No newline at end of file
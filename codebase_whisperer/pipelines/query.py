@@ -1,9 +1,10 @@
 # codebase_whisperer/pipelines/query.py
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional
 import lancedb
 
 from codebase_whisperer.config import load_config
+from codebase_whisperer.db.io import content_table_name, rows_where, sql_str
 from codebase_whisperer.llm.ollama import OllamaClient
 # --- debug helper ---
 import os, sys, json
@@ -21,12 +22,18 @@ def query_repo(
     embed_model: Optional[str] = None,
     host: Optional[str] = None,
     top_k: Optional[int] = None,
+    collapse_duplicates: Optional[bool] = None,
 ) -> List[dict]:
     """
     1) Read config
     2) Embed question (Ollama)
     3) Search LanceDB for similar chunks
     Returns: list[dict] records for easy downstream use.
+
+    Tables ingested with indexing.storage="dedup" are searched by content and
+    joined back to their locations: one record per distinct chunk with every
+    location under "locations" (collapse_duplicates, the default), or one
+    record per location.
     """
     cfg, _ = load_config(config_path)
     _dbg("Loaded config:", json.dumps(cfg, indent=2))
@@ -36,6 +43,8 @@ def query_repo(
     model = embed_model or cfg["embedding"]["model"]
     host = host or cfg["ollama"]["host"]
     top_k = top_k or cfg["retrieval"]["top_k"]
+    if collapse_duplicates is None:
+        collapse_duplicates = bool(cfg["retrieval"].get("collapse_duplicates", True))
     _dbg(f"db_dir={db_dir}, table_name={table_name}, model={model}, host={host}, top_k={top_k}")
 
 
@@ -48,6 +57,8 @@ def query_repo(
     client = OllamaClient(host)
     [query_vec] = client.embed(model, [question])
     _dbg(f"Question='{question}' -> embedding len={len(query_vec)}")
+    if "vector" not in table.schema.names:
+        return _search_dedup(db, table, table_name, query_vec, top_k, collapse_duplicates)
     # Vector search
     q = (
         table.search(query_vec, vector_column_name="vector")
@@ -63,6 +74,54 @@ def query_repo(
     return df.to_dict(orient="records")
 
 
+def _search_dedup(db, table, table_name: str, query_vec, top_k: int, collapse: bool) -> List[dict]:
+    """storage="dedup": ANN over the content table, then look up where each hit occurs."""
+    content = db.open_table(content_table_name(table_name))
+    hits = (
+        content.search(query_vec, vector_column_name="vector")
+               .metric("cosine")
+               .limit(top_k)
+               .select(["content_sha", "content", "_distance"])
+               .to_pandas()
+               .to_dict(orient="records")
+    )
+    if not hits:
+        return []
+    shas = ",".join(sql_str(h["content_sha"]) for h in hits)
+    where: Dict[str, List[dict]] = {}
+    for ref in rows_where(table, f"content_sha IN ({shas})", ["id", "relpath", "chunk_idx", "content_sha"]):
+        where.setdefault(ref["content_sha"], []).append(ref)
+
+    out: List[dict] = []
+    for h in hits:
+        refs = sorted(where.get(h["content_sha"], []), key=lambda r: (r["relpath"], r["chunk_idx"]))
+        if not refs:
+            continue  # content whose files were removed since the last cleanup
+        if collapse:
+            first = refs[0]
+            out.append({
+                "id": first["id"],
+                "relpath": first["relpath"],
+                "chunk_idx": first["chunk_idx"],
+                "content": h["content"],
+                "_distance": h["_distance"],
+                "locations": [f"{r['relpath']}:{r['chunk_idx']}" for r in refs],
+            })
+        else:
+            out.extend(
+                {
+                    "id": r["id"],
+                    "relpath": r["relpath"],
+                    "chunk_idx": r["chunk_idx"],
+                    "content": h["content"],
+                    "_distance": h["_distance"],
+                }
+                for r in refs
+            )
+    _dbg("Search results:", out[:5])
+    return out
+
+
 def chat_with_context(
     question: str,
     context_chunks: List[dict],
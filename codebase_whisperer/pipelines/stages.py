@@ -0,0 +1,169 @@
+# codebase_whisperer/pipelines/stages.py
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+from codebase_whisperer.logging_utils import StageTimer, CounterBar
+
+# End-of-stream marker passed down every queue once a stage has drained.
+DONE = object()
+
+
+class PipelineAborted(RuntimeError):
+    """Raised inside a stage when another stage failed and the pipeline is stopping."""
+
+
+class Pipeline:
+    """
+    Minimal thread pipeline:
+      - source(): one thread feeding an iterable into a bounded queue
+      - stage(): N worker threads, in_q -> fn(item) -> out_q
+      - sink(): like stage() but with nothing downstream
+      - get()/put(): blocking queue ops that give up once the pipeline stops
+    The first exception in any thread stops every stage; join() re-raises it.
+    """
+
+    def __init__(self, name: str, *, poll_s: float = 0.1) -> None:
+        self.name = name
+        self.poll_s = poll_s
+        self.stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._threads: List[threading.Thread] = []
+
+    # ---- queues ------------------------------------------------------------
+    def queue(self, maxsize: int) -> "queue.Queue[Any]":
+        return queue.Queue(maxsize=max(1, int(maxsize)))
+
+    def put(self, q: "queue.Queue[Any]", item: Any) -> None:
+        while True:
+            if self.stop.is_set():
+                raise PipelineAborted(self.name)
+            try:
+                q.put(item, timeout=self.poll_s)
+                return
+            except queue.Full:
+                continue
+
+    def get(self, q: "queue.Queue[Any]") -> Any:
+        while True:
+            if self.stop.is_set():
+                raise PipelineAborted(self.name)
+            try:
+                return q.get(timeout=self.poll_s)
+            except queue.Empty:
+                continue
+
+    # ---- threads -----------------------------------------------------------
+    def source(
+        self,
+        name: str,
+        items: Iterable[Any],
+        out_q: "queue.Queue[Any]",
+        *,
+        bar: Optional[CounterBar] = None,
+    ) -> None:
+        def _run() -> None:
+            with StageTimer(f"{self.name}.{name}"):
+                for item in items:
+                    self.put(out_q, item)
+                    if bar is not None:
+                        bar.update()
+                self.put(out_q, DONE)
+
+        self._spawn(f"{name}", _run)
+
+    def stage(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        in_q: "queue.Queue[Any]",
+        out_q: Optional["queue.Queue[Any]"],
+        *,
+        workers: int = 1,
+        batch: int = 1,
+        bar: Optional[CounterBar] = None,
+    ) -> None:
+        """
+        Run `fn` on every item from in_q with `workers` threads. Results go to out_q
+        (unordered across workers; carry a sequence number if order matters).
+
+        With batch > 1, `fn` takes a list of up to `batch` items (whatever is queued
+        once the first arrives; it never waits to fill a batch) and returns one
+        output per item.
+        """
+        workers = max(1, int(workers))
+        batch = max(1, int(batch))
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def _take() -> List[Any]:
+            items = [self.get(in_q)]
+            while len(items) < batch and items[-1] is not DONE:
+                try:
+                    items.append(in_q.get_nowait())
+                except queue.Empty:
+                    break
+            return items
+
+        def _run(worker: int) -> None:
+            with StageTimer(f"{self.name}.{name}", extra={"worker": worker}):
+                done = False
+                while not done:
+                    items = _take()
+                    if items[-1] is DONE:
+                        items.pop()
+                        # let sibling workers see the end of stream too
+                        self.put(in_q, DONE)
+                        done = True
+                    if not items:
+                        continue
+                    outs = fn(items) if batch > 1 else [fn(items[0])]
+                    for out in outs:
+                        if out_q is not None:
+                            self.put(out_q, out)
+                    if bar is not None:
+                        bar.update(len(items))
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and out_q is not None:
+                    self.put(out_q, DONE)
+
+        for w in range(workers):
+            self._spawn(f"{name}-{w}", lambda w=w: _run(w))
+
+    def sink(
+        self,
+        name: str,
+        fn: Callable[[Any], None],
+        in_q: "queue.Queue[Any]",
+        *,
+        bar: Optional[CounterBar] = None,
+    ) -> None:
+        self.stage(name, fn, in_q, None, workers=1, bar=bar)
+
+    def _spawn(self, name: str, target: Callable[[], None]) -> None:
+        def _guarded() -> None:
+            try:
+                target()
+            except PipelineAborted:
+                pass
+            except BaseException as e:  # surface in join()
+                self.fail(e)
+
+        t = threading.Thread(target=_guarded, name=f"{self.name}-{name}", daemon=True)
+        self._threads.append(t)
+        t.start()
+
+    # ---- lifecycle ---------------------------------------------------------
+    def fail(self, err: BaseException) -> None:
+        self._errors.append(err)
+        self.stop.set()
+
+    def join(self) -> None:
+        for t in self._threads:
+            t.join()
+        if self._errors:
+            raise self._errors[0]
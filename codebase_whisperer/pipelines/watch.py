@@ -0,0 +1,294 @@
+# codebase_whisperer/pipelines/watch.py
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from rich import print as rprint
+
+from codebase_whisperer.config import load_config
+from codebase_whisperer.indexing.ignore import IgnoreLookup
+from codebase_whisperer.indexing.walker import compile_globs, iter_entries
+from codebase_whisperer.pipelines.ingest import run_ingest
+
+# A change batch: relpaths to re-ingest, plus whether something happened that a
+# per-file run can't express (directory created/moved/deleted) -> full run.
+Changes = Tuple[Set[str], bool]
+
+FULL_RESCAN = "\0full"  # marker put on the event queue for directory-level events
+
+
+def _under(rel: str, rel_dir: str) -> bool:
+    return rel == rel_dir or rel.startswith(rel_dir + "/")
+
+
+def _skip_rel(root: Path, skip_dir: Optional[Path]) -> Optional[str]:
+    """`skip_dir` relative to root, or None when it isn't inside the repo."""
+    if skip_dir is None:
+        return None
+    try:
+        return Path(skip_dir).resolve().relative_to(root).as_posix()
+    except ValueError:
+        return None  # outside the repo: its writes never show up here
+
+
+class _PollingSource:
+    """Re-walks the tree every poll_s (never more often) and diffs (size, mtime) snapshots."""
+
+    def __init__(self, root: Path, walk_kwargs: dict, poll_s: float, skip_dir: Optional[Path] = None) -> None:
+        self.root = root
+        self.walk_kwargs = walk_kwargs
+        self.poll_s = poll_s
+        self._skip_rel = _skip_rel(root, skip_dir)
+        self._snap = self._snapshot()
+        self._next_poll = time.monotonic() + poll_s
+
+    def _snapshot(self) -> Dict[str, Tuple[int, float]]:
+        return {
+            e.relpath: (e.size, e.mtime)
+            for e in iter_entries(self.root, **self.walk_kwargs)
+            if self._skip_rel is None or not _under(e.relpath, self._skip_rel)
+        }
+
+    def get(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Changed relpaths since the last walk (blocks up to `timeout`), or None.
+        Walks only once the next poll is due; a timeout that ends first returns
+        None without walking.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._next_poll > deadline:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                return None
+            time.sleep(max(0.0, self._next_poll - time.monotonic()))
+            snap = self._snapshot()
+            self._next_poll = time.monotonic() + self.poll_s
+            old, self._snap = self._snap, snap
+            changed = {rel for rel in snap.keys() | old.keys() if snap.get(rel) != old.get(rel)}
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _EventFilter:
+    """
+    What a raw filesystem event means for the index, judged by the walk's own
+    rules (include/exclude globs, hidden files, ignore files), so only changes
+    the walk could see reach the queue. Nothing under `skip_dir` (the DB, when
+    it lives inside the repo) ever does.
+    """
+
+    def __init__(self, root: Path, walk_kwargs: dict, skip_dir: Optional[Path] = None) -> None:
+        self.root_s = str(root)
+        self.matcher = compile_globs(walk_kwargs["include_globs"], walk_kwargs["exclude_globs"])
+        self.include_hidden = bool(walk_kwargs.get("include_hidden", True))
+        self.ignore_files = tuple(walk_kwargs.get("ignore_files", ()))
+        self.ignored = IgnoreLookup(root, self.ignore_files)
+        self.skip_rel = _skip_rel(root, skip_dir)
+
+    def _rel(self, path) -> Optional[str]:
+        path = os.fsdecode(path)
+        if not path.startswith(self.root_s + os.sep):
+            return None
+        rel = path[len(self.root_s) + 1:].replace(os.sep, "/")
+        if self.skip_rel is not None and _under(rel, self.skip_rel):
+            return None
+        return rel
+
+    def __call__(self, path, *, is_dir: bool, event_type: str) -> Optional[str]:
+        """The relpath to re-ingest, FULL_RESCAN, or None when the walk wouldn't notice."""
+        rel = self._rel(path) if path else None
+        if rel is None:
+            return None
+        parts = rel.split("/")
+        # drop noise from pruned trees (.git, target, node_modules, ...) early
+        if not self.matcher.pruned_names.isdisjoint(parts):
+            return None
+        if not self.include_hidden and any(p.startswith(".") for p in parts[:-1]):
+            return None
+        parent = rel.rpartition("/")[0]
+        if parent and self.ignored(parent, True):
+            return None  # the walk prunes ignored dirs, ignore files inside included
+        if not is_dir and parts[-1] in self.ignore_files:
+            # ignore rules changed: which files are in the walk may have too
+            self.ignored = IgnoreLookup(self.root_s, self.ignore_files)
+            return FULL_RESCAN
+        if not self.include_hidden and parts[-1].startswith("."):
+            return None
+        if self.ignored(rel, is_dir):
+            return None
+        if is_dir:
+            # modified dirs just mean "an entry changed"; the entry reports itself
+            return None if event_type == "modified" else FULL_RESCAN
+        return rel if self.matcher(rel) else None
+
+
+class _WatchdogSource:
+    """inotify (and friends) through the optional `watchdog` package."""
+
+    def __init__(self, root: Path, walk_kwargs: dict, skip_dir: Optional[Path] = None) -> None:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.root = root
+        self._q: "queue.Queue[str]" = queue.Queue()
+        judge = _EventFilter(root, walk_kwargs, skip_dir)
+        q = self._q
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):  # noqa: N802 (watchdog API)
+                if event.event_type in ("opened", "closed_no_write"):
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    item = judge(path, is_dir=event.is_directory, event_type=event.event_type)
+                    if item is not None:
+                        q.put(item)
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(root), recursive=True)
+        self._observer.start()
+
+    def get(self, timeout: float) -> Optional[Set[str]]:
+        try:
+            first = self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        out = {first}
+        while True:
+            try:
+                out.add(self._q.get_nowait())
+            except queue.Empty:
+                return out
+
+    def close(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+
+
+def _open_source(root: Path, walk_kwargs: dict, backend: str, poll_s: float, skip_dir: Optional[Path] = None):
+    if backend in ("auto", "watchdog"):
+        try:
+            return _WatchdogSource(root, walk_kwargs, skip_dir)
+        except ImportError:
+            if backend == "watchdog":
+                raise
+            rprint("[yellow][watch] watchdog not installed; falling back to polling[/yellow]")
+    return _PollingSource(root, walk_kwargs, poll_s, skip_dir)
+
+
+def _coalesce(source, *, first_wait: float, debounce_s: float, max_wait_s: float) -> Optional[Changes]:
+    """
+    Wait up to first_wait for a change, then keep collecting until the tree has
+    been quiet for debounce_s (or max_wait_s passed), so a burst like
+    `git checkout` becomes one batch.
+    """
+    got = source.get(first_wait)
+    if got is None:
+        return None
+    rels: Set[str] = set(got)
+    started = time.monotonic()
+    while time.monotonic() - started < max_wait_s:
+        more = source.get(debounce_s)
+        if more is None:
+            break
+        rels |= more
+    full = FULL_RESCAN in rels
+    rels.discard(FULL_RESCAN)
+    return rels, full
+
+
+def watch_ingest(
+    *,
+    repo_root: str,
+    db_dir: str,
+    table_name: str,
+    config_path: Optional[str] = None,
+    force_reembed: bool = False,
+    resume: bool = False,
+    stop: Optional[threading.Event] = None,
+    initial: bool = True,
+) -> None:
+    """
+    Keep the index current: one normal run_ingest (unless initial=False), then
+    re-ingest only the files touched since, in debounced batches. Deleted files
+    have their rows removed; directory-level events (create/move/delete) fall
+    back to a full incremental run, which the manifest keeps cheap. Events the
+    walk couldn't see (excluded, hidden or ignored paths, anything under db_dir)
+    are dropped; editing an ignore file counts as a directory-level event.
+    force_reembed and resume apply to the initial run only. A failed run (Ollama
+    restarting, a LanceDB error, ...) is logged and its files are retried with
+    the next batch, or after watch_retry_s when nothing else changes. Runs
+    until `stop` is set (or Ctrl-C).
+    """
+    cfg, _ = load_config(config_path)
+    idx = cfg.get("indexing", {})
+    debounce_s = float(idx.get("watch_debounce_s", 1.0))
+    max_wait_s = float(idx.get("watch_max_wait_s", 10.0))
+    poll_s = float(idx.get("watch_poll_s", 2.0))
+    backend = str(idx.get("watch_backend", "auto"))
+    retry_s = float(idx.get("watch_retry_s", 30.0))
+    stop = stop or threading.Event()
+
+    root = Path(repo_root).resolve()
+    walk_kwargs = dict(
+        include_globs=idx.get("include_globs", ["**/*"]),
+        exclude_globs=idx.get("exclude_globs", []),
+        follow_symlinks=bool(idx.get("follow_symlinks", False)),
+        include_hidden=bool(idx.get("include_hidden", False)),
+        ignore_files=idx.get("ignore_files", []),
+    )
+    ingest_kwargs = dict(repo_root=str(root), db_dir=db_dir, table_name=table_name, config_path=config_path)
+
+    def _run(rels: Set[str], full: bool, opts: Optional[Dict[str, bool]] = None) -> bool:
+        try:
+            if full:
+                run_ingest(**(opts or {}), **ingest_kwargs)
+            else:
+                run_ingest(paths=sorted(rels), **ingest_kwargs)
+            return True
+        except Exception as e:
+            rprint(f"[red][watch] ingest failed ({type(e).__name__}: {e}); retrying in {retry_s:g}s[/red]")
+            return False
+
+    # subscribe before the initial run so edits made during it aren't lost
+    source = _open_source(root, walk_kwargs, backend, poll_s, skip_dir=Path(db_dir))
+    try:
+        # what the last failed run didn't get done: (relpaths, full run) and the
+        # initial run's options if that was it
+        failed: Changes = (set(), False)
+        failed_opts: Dict[str, bool] = {}
+        retry_at = 0.0
+        initial_opts = dict(force_reembed=force_reembed, resume=resume)
+        if initial and not _run(set(), True, initial_opts):
+            failed, failed_opts, retry_at = (set(), True), initial_opts, time.monotonic() + retry_s
+        rprint(f"[cyan][watch] watching {root} ({type(source).__name__.strip('_')})[/cyan]")
+        while not stop.is_set():
+            batch = _coalesce(source, first_wait=min(1.0, poll_s), debounce_s=debounce_s, max_wait_s=max_wait_s)
+            if batch is None:
+                if not (failed[0] or failed[1]) or time.monotonic() < retry_at:
+                    continue
+                batch = (set(), False)
+            rels, full = batch[0] | failed[0], batch[1] or failed[1]
+            if full:
+                rprint("[cyan][watch] directory change; running a full incremental ingest[/cyan]")
+            elif rels:
+                rprint(f"[cyan][watch] re-ingesting {len(rels)} changed file(s)[/cyan]")
+            else:
+                continue
+            opts = failed_opts if full else {}
+            if _run(rels, full, opts):
+                failed, failed_opts = (set(), False), {}
+            else:
+                failed, failed_opts = (rels, full), opts
+                retry_at = time.monotonic() + retry_s
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
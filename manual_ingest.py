@@ -1,6 +1,7 @@
 # manual_ingest.py
 import argparse
 from codebase_whisperer.pipelines.ingest import run_ingest
+from codebase_whisperer.pipelines.watch import watch_ingest
 
 def main():
     parser = argparse.ArgumentParser(description="Manually run ingest pipeline")
@@ -9,16 +10,30 @@ def main():
     parser.add_argument("--table-name", required=True, help="Target table name")
     parser.add_argument("--config-path", help="Optional path to config file")
     parser.add_argument("--force-reembed", action="store_true", help="Force re-embedding even if cache exists")
+    parser.add_argument("--resume", action="store_true", help="Skip files finished by an interrupted run")
+    parser.add_argument("--watch", action="store_true", help="Keep running and re-ingest files as they change")
 
     args = parser.parse_args()
 
+    if args.watch:
+        watch_ingest(
+            repo_root=args.repo_root,
+            db_dir=args.db_dir,
+            table_name=args.table_name,
+            config_path=args.config_path,
+            force_reembed=args.force_reembed,
+            resume=args.resume,
+        )
+        return
+
     run_ingest(
         repo_root=args.repo_root,
         db_dir=args.db_dir,
         table_name=args.table_name,
         config_path=args.config_path,
         force_reembed=args.force_reembed,
+        resume=args.resume,
     )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -150,4 +150,30 @@ def test_unknown_or_empty_lang_uses_plain(lang):
 
 def test_empty_text_returns_empty_list():
     out = chunk_text(lang="text", text="", max_chunk_chars=100, min_chunk_chars=0)
-    assert out == []
\ No newline at end of file
+    assert out == []
+
+
+# ---------- streaming ----------
+
+def test_iter_chunks_streams_defs_as_they_are_found(monkeypatch):
+    """iter_chunks yields a def's chunks before later defs have been produced."""
+    import codebase_whisperer.chunking.driver as drv
+    import codebase_whisperer.chunking.t_sitter.core as tcore
+
+    monkeypatch.setattr(drv, "ts_supported", lambda lang: True)
+    monkeypatch.setattr(drv, "get_parser", lambda lang, cache=None: DummyParser())
+    produced: List[str] = []
+
+    def fake_iter_defs(lang: str, parser: Any, text: str):
+        for sym in ("A", "B", "C"):
+            produced.append(sym)
+            yield sym, f"body of {sym}"
+
+    monkeypatch.setattr(tcore, "iter_defs", fake_iter_defs, raising=True)
+    monkeypatch.setattr(tcore, "extract_defs", lambda *a: list(fake_iter_defs(*a)), raising=True)
+
+    it = drv.iter_chunks(lang="java", text="x", max_chunk_chars=100)
+    assert next(it) == ("A", "body of A")
+    assert produced == ["A"]
+    rest = list(it)
+    assert [("A", "body of A")] + rest == drv.chunk_text(lang="java", text="x", max_chunk_chars=100)
@@ -103,4 +103,680 @@ def test_ingest_honors_config_file(monkeypatch, tmp_repo, tmp_path):
         config_path=str(cfg_file),
     )
 
-    assert any(call[0] == "fake-embed" for call in dummy.calls)
\ No newline at end of file
+    assert any(call[0] == "fake-embed" for call in dummy.calls)
+
+def test_ingest_batches_embeds_across_files(monkeypatch, tmp_repo, tmp_path):
+    """Cache misses from several files share embed calls of embed_batch_size."""
+    db_dir = tmp_path / "db"
+    for name in ("a", "b", "c", "d", "e"):
+        (tmp_repo / f"{name}.txt").write_text(f"hello from {name}", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n  embed_batch_size: 2\n",
+        encoding="utf-8",
+    )
+
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+
+    ingest.run_ingest(
+        repo_root=str(tmp_repo),
+        db_dir=str(db_dir),
+        table_name="chunks",
+        config_path=str(cfg_file),
+    )
+
+    assert [len(inputs) for _, inputs in dummy.calls] == [2, 2, 1]
+    embedded = sorted(t for _, inputs in dummy.calls for t in inputs)
+    assert embedded == sorted(f"hello from {n}" for n in ("a", "b", "c", "d", "e"))
+
+    import lancedb
+    rows = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow().to_pylist()
+    assert sorted(r["relpath"] for r in rows) == ["a.txt", "b.txt", "c.txt", "d.txt", "e.txt"]
+    assert all(len(r["vector"]) == 3 for r in rows)
+
+
+def test_ingest_concurrent_embeds_bounded_and_ordered(monkeypatch, tmp_repo, tmp_path):
+    """embed_concurrency keeps at most N batches in flight; rows still land intact."""
+    import threading
+    import time
+
+    db_dir = tmp_path / "db"
+    names = [f"f{i:02d}" for i in range(12)]
+    for name in names:
+        (tmp_repo / f"{name}.txt").write_text(f"text {name}", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n"
+        "  embed_batch_size: 2\n  embed_concurrency: 3\n",
+        encoding="utf-8",
+    )
+
+    class SlowClient(DummyClient):
+        def __init__(self):
+            super().__init__(dim=3)
+            self.lock = threading.Lock()
+            self.active = 0
+            self.peak = 0
+
+        def embed(self, model, inputs):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            # earlier batches finish later, so completion order != submission order
+            time.sleep(0.02 * (6 - len(self.calls) % 6))
+            with self.lock:
+                self.active -= 1
+                self.calls.append((model, inputs))
+            # vector encodes the text so we can check rows got their own vector
+            return [[float(int(t[-2:])), 0.0, 1.0] for t in inputs]
+
+    slow = SlowClient()
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: slow)
+
+    ingest.run_ingest(
+        repo_root=str(tmp_repo),
+        db_dir=str(db_dir),
+        table_name="chunks",
+        config_path=str(cfg_file),
+    )
+
+    assert 1 < slow.peak <= 3
+    assert sum(len(inputs) for _, inputs in slow.calls) == len(names)
+
+    import lancedb
+    rows = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow().to_pylist()
+    assert sorted(r["relpath"] for r in rows) == sorted(f"{n}.txt" for n in names)
+    for r in rows:
+        assert r["vector"][0] == float(int(r["relpath"][1:3]))
+
+
+def test_ingest_cached_rows_do_not_pile_up_behind_a_slow_embed(monkeypatch, tmp_repo, tmp_path):
+    """Cache hits behind a pending embed batch count against embed_concurrency."""
+    import time
+    from codebase_whisperer.indexing.walker import iter_files
+
+    for i in range(30):
+        (tmp_repo / f"h{i:02d}.txt").write_text(f"hit {i}", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n"
+        "  embed_batch_size: 1\n  embed_concurrency: 2\n  queue_size: 1\n"
+        "  max_files_in_flight: 1\n  reader_workers: 1\n",
+        encoding="utf-8",
+    )
+    db_dir = tmp_path / "db"
+
+    def run(table, client):
+        monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: client)
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name=table, config_path=str(cfg_file))
+
+    # warm the shared vec_cache, then make the first file in walk order a miss
+    run("warm", DummyClient(dim=3))
+    first = Path(next(iter(iter_files(tmp_repo, ["*.txt"], []))))
+    first.write_text("a miss", encoding="utf-8")
+
+    reads = []
+    real_index_file = ingest.index_file
+    monkeypatch.setattr(ingest, "index_file", lambda **kw: reads.append(1) or real_index_file(**kw))
+
+    class SlowClient(DummyClient):
+        def embed(self, model, inputs):
+            before = len(reads)
+            time.sleep(0.5)
+            self.during = len(reads) - before
+            return super().embed(model, inputs)
+
+    slow = SlowClient(dim=3)
+    run("main", slow)
+    assert [t for _, inputs in slow.calls for t in inputs] == ["a miss"]
+    # the hits after the miss wait for it instead of all being read and queued
+    assert slow.during <= 5
+    import lancedb
+    assert lancedb.connect(str(db_dir)).open_table("main").count_rows() == 30
+
+
+def test_ingest_stage_workers_keep_walk_order(monkeypatch, tmp_repo, tmp_path):
+    """Reader/chunker workers finish out of order; embed batches still follow the walk."""
+    import random
+    import time
+
+    names = [f"f{i:02d}" for i in range(16)]
+    for name in names:
+        (tmp_repo / f"{name}.txt").write_text(f"text {name}", encoding="utf-8")
+
+    real_index_file = ingest.index_file
+
+    def jittery_index_file(**kw):
+        time.sleep(random.random() * 0.01)
+        return real_index_file(**kw)
+
+    monkeypatch.setattr(ingest, "index_file", jittery_index_file)
+
+    def run(workers: int, queue_size: int):
+        cfg_file = tmp_path / f"cfg{workers}.yaml"
+        cfg_file.write_text(
+            "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n"
+            f"  embed_batch_size: 3\n  reader_workers: {workers}\n  chunker_workers: {workers}\n"
+            f"  queue_size: {queue_size}\n  max_files_in_flight: 4\n",
+            encoding="utf-8",
+        )
+        dummy = DummyClient(dim=3)
+        monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+        ingest.run_ingest(
+            repo_root=str(tmp_repo),
+            db_dir=str(tmp_path / f"db{workers}"),
+            table_name="chunks",
+            config_path=str(cfg_file),
+        )
+        return [inputs for _, inputs in dummy.calls]
+
+    serial = run(1, 64)
+    assert sum(len(b) for b in serial) == len(names)
+    assert run(4, 1) == serial
+
+
+def test_ingest_chunk_processes_match_in_thread_chunking(monkeypatch, tmp_repo, tmp_path):
+    """chunk_processes > 0 chunks in worker processes with identical output."""
+    (tmp_repo / "src").mkdir()
+    for i in range(6):
+        (tmp_repo / f"src/C{i}.java").write_text(
+            f"class C{i} {{ int f() {{ return {i}; }} }}", encoding="utf-8"
+        )
+        (tmp_repo / f"n{i}.txt").write_text(f"note {i}", encoding="utf-8")
+
+    def run(tag: str, extra: str):
+        cfg_file = tmp_path / f"cfg_{tag}.yaml"
+        cfg_file.write_text(
+            "embedding:\n  dim: 3\nindexing:\n  include_globs: ['**/*.java', '*.txt']\n"
+            "  embed_batch_size: 4\n" + extra,
+            encoding="utf-8",
+        )
+        dummy = DummyClient(dim=3)
+        monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+        ingest.run_ingest(
+            repo_root=str(tmp_repo),
+            db_dir=str(tmp_path / f"db_{tag}"),
+            table_name="chunks",
+            config_path=str(cfg_file),
+        )
+        import lancedb
+        rows = lancedb.connect(str(tmp_path / f"db_{tag}")).open_table("chunks").to_arrow().to_pylist()
+        return dummy.calls, sorted((r["id"], r["symbol"], r["content"]) for r in rows)
+
+    in_thread = run("thread", "")
+    in_procs = run("procs", "  chunk_processes: 2\n  chunk_files_per_task: 3\n")
+    assert in_procs == in_thread
+    assert len(in_thread[1]) >= 12
+
+
+def test_ingest_embeds_a_files_first_chunks_while_it_is_still_chunking(monkeypatch, tmp_repo, tmp_path):
+    import threading
+
+    (tmp_repo / "big.txt").write_text("big", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n  embed_batch_size: 2\n",
+        encoding="utf-8",
+    )
+    first_embed = threading.Event()
+    overlapped = []
+
+    class SignalingClient(DummyClient):
+        def embed(self, model, inputs):
+            first_embed.set()
+            return super().embed(model, inputs)
+
+    def slow_chunks(**kw):
+        for i in range(6):
+            if i == 4:
+                # the first batch was handed on at i == 2; it should be embedding by now
+                overlapped.append(first_embed.wait(timeout=5))
+            yield None, f"chunk {i}"
+
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: SignalingClient(dim=3))
+    monkeypatch.setattr(ingest, "iter_chunks", slow_chunks)
+    ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(tmp_path / "db"), table_name="chunks", config_path=str(cfg_file))
+
+    assert overlapped == [True]
+
+
+def test_ingest_stage_failure_propagates(monkeypatch, tmp_repo, tmp_path):
+    """An error inside a worker stage stops the pipeline and surfaces to the caller."""
+    for i in range(8):
+        (tmp_repo / f"f{i}.txt").write_text(f"text {i}", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n"
+        "  chunker_workers: 2\n  queue_size: 1\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: DummyClient(dim=3))
+
+    def boom(**kw):
+        raise RuntimeError("chunker exploded")
+
+    monkeypatch.setattr(ingest, "iter_chunks", boom)
+
+    with pytest.raises(RuntimeError, match="chunker exploded"):
+        ingest.run_ingest(
+            repo_root=str(tmp_repo),
+            db_dir=str(tmp_path / "db"),
+            table_name="chunks",
+            config_path=str(cfg_file),
+        )
+
+
+def test_ingest_reads_vec_cache_once_and_reuses_flushed_vectors(monkeypatch, tmp_repo, tmp_path):
+    """vec_cache is loaded once per run; later flushes update the in-memory map."""
+    db_dir = tmp_path / "db"
+    paras = "\n\n".join(f"paragraph {i} " + "x" * 200 for i in range(300))
+    (tmp_repo / "a.txt").write_text(paras, encoding="utf-8")
+    (tmp_repo / "b.txt").write_text(paras.replace("paragraph", "section"), encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n"
+        "  max_chunk_chars: 250\n  min_chunk_chars: 0\n  embed_batch_size: 64\n",
+        encoding="utf-8",
+    )
+
+    loads = []
+    real_load = ingest.load_vec_cache_matrix
+    monkeypatch.setattr(ingest, "load_vec_cache_matrix", lambda *a, **kw: loads.append(1) or real_load(*a, **kw))
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+
+    ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+    assert len(loads) == 1
+    assert sum(len(inputs) for _, inputs in dummy.calls) == 600
+
+    # Second run: one load, every chunk (including a duplicate file) is a hit
+    (tmp_repo / "c.txt").write_text(paras, encoding="utf-8")
+    loads.clear()
+    dummy.calls.clear()
+    ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+    assert len(loads) == 1
+    assert not dummy.calls
+
+
+def test_ingest_skips_unchanged_files_before_reading(monkeypatch, tmp_repo, tmp_path):
+    """Files whose (size, mtime) match the manifest are not read again."""
+    import codebase_whisperer.indexing.indexer as indexer
+
+    db_dir = tmp_path / "db"
+    (tmp_repo / "a.txt").write_text("alpha file", encoding="utf-8")
+    (tmp_repo / "b.txt").write_text("beta file", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text("embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n", encoding="utf-8")
+
+    reads = []
+    real_read = indexer.read_bytes
+    monkeypatch.setattr(indexer, "read_bytes", lambda path: reads.append(Path(path).name) or real_read(path))
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+
+    def run():
+        reads.clear()
+        dummy.calls.clear()
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+
+    run()
+    assert sorted(reads) == ["a.txt", "b.txt"]
+
+    # no-op re-run: nothing read, nothing embedded
+    run()
+    assert reads == []
+    assert not dummy.calls
+
+    # an edited file is the only one read again
+    (tmp_repo / "b.txt").write_text("beta file, edited", encoding="utf-8")
+    run()
+    assert reads == ["b.txt"]
+    assert [inputs for _, inputs in dummy.calls] == [["beta file, edited"]]
+
+    # touched but identical: read once to hash, not re-embedded, then skipped again
+    st = (tmp_repo / "a.txt").stat()
+    os.utime(tmp_repo / "a.txt", (st.st_atime, st.st_mtime + 10))
+    run()
+    assert reads == ["a.txt"]
+    assert not dummy.calls
+    run()
+    assert reads == []
+
+
+def test_ingest_config_change_invalidates_manifest(monkeypatch, tmp_repo, tmp_path):
+    """Rows built with another model / chunk size are not "unchanged"."""
+    import codebase_whisperer.indexing.indexer as indexer
+
+    db_dir = tmp_path / "db"
+    (tmp_repo / "a.txt").write_text("alpha file", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    reads = []
+    real_read = indexer.read_bytes
+    monkeypatch.setattr(indexer, "read_bytes", lambda path: reads.append(Path(path).name) or real_read(path))
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: DummyClient(dim=3))
+
+    def run(extra=""):
+        cfg_file.write_text(
+            f"embedding:\n  dim: 3\n{extra}indexing:\n  include_globs: ['*.txt']\n  max_chunk_chars: 100\n",
+            encoding="utf-8",
+        )
+        reads.clear()
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+
+    run()
+    assert reads == ["a.txt"]
+    run()
+    assert reads == []
+    # another embedding model: every file is read and re-chunked again, once
+    run("  model: other-model\n")
+    assert reads == ["a.txt"]
+    run("  model: other-model\n")
+    assert reads == []
+
+
+def test_ingest_deletes_rows_for_removed_and_shrunk_files(monkeypatch, tmp_repo, tmp_path):
+    import lancedb
+
+    db_dir = tmp_path / "db"
+    paras = "\n\n".join(f"paragraph {i} " + "x" * 200 for i in range(5))
+    (tmp_repo / "long.txt").write_text(paras, encoding="utf-8")
+    (tmp_repo / "gone.txt").write_text("soon removed", encoding="utf-8")
+    (tmp_repo / "keep.txt").write_text("stays put", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n"
+        "  max_chunk_chars: 250\n  min_chunk_chars: 0\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: DummyClient(dim=3))
+
+    def ids():
+        rows = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow().to_pylist()
+        return sorted(r["id"] for r in rows)
+
+    def run():
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+
+    run()
+    assert ids() == ["gone.txt:0", "keep.txt:0"] + [f"long.txt:{i}" for i in range(5)]
+
+    (tmp_repo / "gone.txt").unlink()
+    (tmp_repo / "long.txt").write_text(paras.split("\n\n")[0], encoding="utf-8")
+    run()
+    assert ids() == ["keep.txt:0", "long.txt:0"]
+
+    files = lancedb.connect(str(db_dir)).open_table("chunks_files").to_arrow().column("relpath").to_pylist()
+    assert sorted(files) == ["keep.txt", "long.txt"]
+
+
+@pytest.mark.skipif(__import__("shutil").which("git") is None, reason="git not installed")
+def test_ingest_git_source_only_stats_changed_files(monkeypatch, tmp_path):
+    import os
+    import subprocess
+
+    import lancedb
+    import codebase_whisperer.indexing.gitsource as gitsource
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+
+    def git(*args):
+        subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "t@example.com")
+    git("config", "user.name", "t")
+    for name in ("a", "b", "c"):
+        (repo / f"{name}.txt").write_text(f"file {name}", encoding="utf-8")
+    git("add", "-A")
+    git("commit", "-q", "-m", "init")
+
+    db_dir = tmp_path / "db"
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n  file_source: git\n",
+        encoding="utf-8",
+    )
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+
+    statted = []
+    real_stat = os.stat
+    def counting_stat(p, *a, **kw):
+        # os.stat is patched process-wide; only count stats of repo files
+        if str(p).endswith(".txt"):
+            statted.append(os.path.basename(p))
+        return real_stat(p, *a, **kw)
+
+    monkeypatch.setattr(gitsource.os, "stat", counting_stat)
+
+    def run():
+        statted.clear()
+        dummy.calls.clear()
+        ingest.run_ingest(repo_root=str(repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+
+    run()
+    assert sorted(statted) == ["a.txt", "b.txt", "c.txt"]
+
+    (repo / "b.txt").write_text("file b, edited", encoding="utf-8")
+    git("rm", "-q", "c.txt")
+    git("commit", "-q", "-am", "edit b, drop c")
+    run()
+    assert statted == ["b.txt"]
+    assert [t for _, inputs in dummy.calls for t in inputs] == ["file b, edited"]
+    rows = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow().to_pylist()
+    assert sorted(r["relpath"] for r in rows) == ["a.txt", "b.txt"]
+
+    run()
+    assert statted == [] and dummy.calls == []
+
+    # an uncommitted edit is ingested, then reverted: the revert is picked up
+    # although the file never differs from the recorded commit again
+    (repo / "a.txt").write_text("file a, scratch edit", encoding="utf-8")
+    run()
+    assert [t for _, inputs in dummy.calls for t in inputs] == ["file a, scratch edit"]
+    git("checkout", "-q", "--", "a.txt")
+    run()
+    rows = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow().to_pylist()
+    assert sorted((r["relpath"], r["content"]) for r in rows) == [("a.txt", "file a"), ("b.txt", "file b, edited")]
+    run()
+    assert statted == [] and dummy.calls == []
+
+
+def test_ingest_paths_touches_only_listed_files(monkeypatch, tmp_repo, tmp_path):
+    import lancedb
+
+    db_dir = tmp_path / "db"
+    for name in ("a", "b", "c"):
+        (tmp_repo / f"{name}.txt").write_text(f"file {name}", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text("embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n", encoding="utf-8")
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+
+    def run(**kw):
+        dummy.calls.clear()
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file), **kw)
+
+    run()
+    # a and c both change on disk, but only a (edited) and b (deleted) are listed
+    (tmp_repo / "a.txt").write_text("file a, edited", encoding="utf-8")
+    (tmp_repo / "c.txt").write_text("file c, edited", encoding="utf-8")
+    (tmp_repo / "b.txt").unlink()
+    run(paths=["a.txt", str(tmp_repo / "b.txt"), "pom.xml"])
+
+    assert [t for _, inputs in dummy.calls for t in inputs] == ["file a, edited"]
+    rows = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow().to_pylist()
+    assert {r["relpath"]: r["content"] for r in rows} == {"a.txt": "file a, edited", "c.txt": "file c"}
+
+
+def test_ingest_resume_skips_files_finished_before_a_crash(monkeypatch, tmp_repo, tmp_path):
+    import lancedb
+
+    db_dir = tmp_path / "db"
+    (tmp_repo / "a.txt").write_text("file a", encoding="utf-8")
+    (tmp_repo / "b.txt").write_text("file b", encoding="utf-8")
+    # the walk lists a directory's files before its subdirectories: c comes last
+    (tmp_repo / "sub").mkdir()
+    (tmp_repo / "sub" / "c.txt").write_text("file c", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['**/*.txt']\n"
+        "  embed_batch_size: 1\n  checkpoint_every_s: 0\n",
+        encoding="utf-8",
+    )
+
+    class FlakyClient(DummyClient):
+        def embed(self, model, inputs):
+            if "file c" in inputs:
+                raise ConnectionError("ollama went away")
+            return super().embed(model, inputs)
+
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: FlakyClient(dim=3))
+    with pytest.raises(ConnectionError):
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+
+    db = lancedb.connect(str(db_dir))
+    landed = sorted(db.open_table("chunks_checkpoint").to_arrow().column("relpath").to_pylist())
+    assert landed == ["a.txt", "b.txt"]
+
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+    ingest.run_ingest(
+        repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks",
+        config_path=str(cfg_file), force_reembed=True, resume=True,
+    )
+    assert [t for _, inputs in dummy.calls for t in inputs] == ["file c"]
+    rows = db.open_table("chunks").to_arrow().column("relpath").to_pylist()
+    assert sorted(rows) == ["a.txt", "b.txt", "sub/c.txt"]
+    # a completed run leaves nothing to resume
+    assert db.open_table("chunks_checkpoint").count_rows() == 0
+
+
+def test_ingest_dedup_storage_stores_each_chunk_once(monkeypatch, tmp_repo, tmp_path):
+    import lancedb
+    import codebase_whisperer.pipelines.query as query
+
+    db_dir = tmp_path / "db"
+    header = "// Licensed under the Apache License, Version 2.0"
+    for name in ("a", "b", "c"):
+        (tmp_repo / f"{name}.txt").write_text(header, encoding="utf-8")
+    (tmp_repo / "d.txt").write_text("something else", encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.txt']\n  storage: dedup\n",
+        encoding="utf-8",
+    )
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+    monkeypatch.setattr(query, "OllamaClient", lambda *a, **kw: DummyClient(dim=3))
+
+    def run():
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file))
+
+    run()
+    db = lancedb.connect(str(db_dir))
+    refs = db.open_table("chunks").to_arrow()
+    content = db.open_table("chunks_content").to_arrow()
+    assert "vector" not in refs.schema.names and "content" not in refs.schema.names
+    assert sorted(refs.column("relpath").to_pylist()) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+    assert sorted(content.column("content").to_pylist()) == [header, "something else"]
+    assert sorted(t for _, inputs in dummy.calls for t in inputs) == [header, "something else"]
+
+    def ask(**kw):
+        return query.query_repo(
+            "license?", db_dir=str(db_dir), table_name="chunks", config_path=str(cfg_file), **kw
+        )
+
+    hits = {h["content"]: h for h in ask()}
+    assert hits[header]["locations"] == ["a.txt:0", "b.txt:0", "c.txt:0"]
+    assert sorted(h["relpath"] for h in ask(collapse_duplicates=False)) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+
+    # the last file holding a chunk takes its content row with it
+    (tmp_repo / "d.txt").unlink()
+    run()
+    content = db.open_table("chunks_content").to_arrow()
+    assert content.column("content").to_pylist() == [header]
+
+
+def test_ingest_incremental_parse_rehashes_only_changed_defs(monkeypatch, tmp_repo, tmp_path):
+    import lancedb
+    import codebase_whisperer.chunking.incremental as incremental
+    from codebase_whisperer.chunking.t_sitter import get_ts_parser
+
+    if get_ts_parser("java")[0] is None:
+        pytest.skip("tree-sitter parser not available for java")
+
+    def java(n):
+        methods = "\n".join(f"    int m{m}() {{ return {m} + {n}; }}" for m in range(4))
+        return f"class C{n} {{\n{methods}\n}}\n"
+
+    for n in range(3):
+        (tmp_repo / f"C{n}.java").write_text(java(n), encoding="utf-8")
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text(
+        "embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.java']\n  incremental_parse: true\n",
+        encoding="utf-8",
+    )
+    plain_cfg = tmp_path / "plain.yaml"
+    plain_cfg.write_text("embedding:\n  dim: 3\nindexing:\n  include_globs: ['*.java']\n", encoding="utf-8")
+    dummy = DummyClient(dim=3)
+    monkeypatch.setattr(ingest, "OllamaClient", lambda *a, **kw: dummy)
+    hashed = []
+    real_sha = incremental._sha256_text
+    monkeypatch.setattr(incremental, "_sha256_text", lambda s: hashed.append(s) or real_sha(s))
+
+    def rows(db_dir):
+        tbl = lancedb.connect(str(db_dir)).open_table("chunks").to_arrow()
+        cols = [tbl.column(c).to_pylist() for c in ("id", "symbol", "content", "content_sha")]
+        return sorted(zip(*cols))
+
+    def run(db_dir, cfg):
+        ingest.run_ingest(repo_root=str(tmp_repo), db_dir=str(db_dir), table_name="chunks", config_path=str(cfg))
+
+    db_dir = tmp_path / "db"
+    run(db_dir, cfg_file)
+    assert len(hashed) == 3 * 5  # every class + method, once
+    assert len(list((db_dir / "chunks_parse_cache").iterdir())) == 3
+
+    # one method edited: only it and its class are hashed, embedded and written again
+    hashed.clear()
+    dummy.calls.clear()
+    written = []
+    real_flush = ingest._flush_rows
+    monkeypatch.setattr(ingest, "_flush_rows", lambda rows, *a, **kw: written.extend(r["id"] for r in rows) or real_flush(rows, *a, **kw))
+    (tmp_repo / "C1.java").write_text(java(1).replace("return 2 + 1;", "return 2 * 1;"), encoding="utf-8")
+    run(db_dir, cfg_file)
+    assert sorted(s.split("{")[0].strip() for s in hashed) == ["class C1", "int m2()"]
+    assert sorted(written) == ["C1.java:0", "C1.java:3"]
+    monkeypatch.setattr(ingest, "_flush_rows", real_flush)
+    assert sorted(t.split("{")[0].strip() for _, inputs in dummy.calls for t in inputs) == ["class C1", "int m2()"]
+    # same rows as a from-scratch ingest of the same tree
+    run(tmp_path / "plain_db", plain_cfg)
+    assert rows(db_dir) == rows(tmp_path / "plain_db")
+
+    # a removed file's cached parse goes with it
+    (tmp_repo / "C2.java").unlink()
+    run(db_dir, cfg_file)
+    assert len(list((db_dir / "chunks_parse_cache").iterdir())) == 2
+
+
+def test_stale_predicates_are_batched():
+    gone = [f"dead/{i}.txt" for i in range(5)]
+    counts = {"a.txt": 2, "b.txt": 2, "c'q.txt": 0}
+    preds = ingest._stale_predicates(gone, counts, max_paths=4)
+    joined = " OR ".join(preds)
+    assert len(preds) == 2  # [4 dead paths] + [1 dead, c'q, a, b]
+    assert "(chunk_idx >= 2 AND relpath IN ('a.txt','b.txt'))" in joined
+    assert "(chunk_idx >= 0 AND relpath IN ('c''q.txt'))" in joined
+    assert all(f"'dead/{i}.txt'" in joined for i in range(5))
+
+
+def test_remember_vectors_replaces_cached_entries():
+    import numpy as np
+    from codebase_whisperer.db.io import VecCacheMatrix
+
+    cache = VecCacheMatrix(index={"s1": 0}, vectors=np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+    ingest._remember_vectors(cache, [{"content_sha": "s1", "vector": [0.0, 1.0, 0.0]}, {"content_sha": "s2", "vector": None}])
+    assert list(cache["s1"]) == [0.0, 1.0, 0.0] and "s2" not in cache
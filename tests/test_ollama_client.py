@@ -4,6 +4,7 @@ import types
 import requests
 import pytest
 
+import codebase_whisperer.llm.ollama as ollama
 from codebase_whisperer.llm.ollama import OllamaClient, OllamaError
 
 class FakeResponse:
@@ -30,17 +31,26 @@ class FakeResponse:
             else:
                 yield line if decode_unicode else line.encode("utf-8")
 
+def _stub_post(monkeypatch, fn):
+    """Route every OllamaClient session POST to `fn(url, **kwargs)`."""
+    monkeypatch.setattr(requests.Session, "post", lambda _self, url, **kw: fn(url, **kw))
+
 @pytest.fixture(autouse=True)
 def no_sleep(monkeypatch):
     """Avoid real sleeping during backoff."""
     monkeypatch.setattr("time.sleep", lambda *_args, **_kwargs: None)
 
+@pytest.fixture(autouse=True)
+def fresh_embed_path_cache(monkeypatch):
+    """Each test starts without a remembered embed endpoint per host."""
+    monkeypatch.setattr(ollama, "_EMBED_PATH_BY_HOST", {})
+
 def test__post_success(monkeypatch):
     calls = {}
     def fake_post(url, json=None, timeout=None, stream=None, **kwargs):
         calls["last"] = (url, json, timeout, stream)
         return FakeResponse(status=200, json_data={"ok": True})
-    monkeypatch.setattr(requests, "post", fake_post)
+    _stub_post(monkeypatch, fake_post)
 
     c = OllamaClient("http://localhost:11434", timeout=1, retries=0)
     resp = c._post("/api/ping", {"x": 1})
@@ -55,7 +65,7 @@ def test__post_retries_then_success(monkeypatch):
         if attempts["n"] == 1:
             raise requests.exceptions.ConnectionError("boom")
         return FakeResponse(status=200, json_data={"ok": True})
-    monkeypatch.setattr(requests, "post", flaky_post)
+    _stub_post(monkeypatch, flaky_post)
 
     c = OllamaClient("http://localhost:11434", retries=1, backoff=0)
     resp = c._post("/api/ping", {"x": 1})
@@ -65,7 +75,7 @@ def test__post_retries_then_success(monkeypatch):
 def test__post_exhausts_retries_raises(monkeypatch):
     def always_fail(url, json=None, timeout=None, stream=None, **kwargs):
         raise requests.exceptions.Timeout("slow")
-    monkeypatch.setattr(requests, "post", always_fail)
+    _stub_post(monkeypatch, always_fail)
 
     c = OllamaClient("http://localhost:11434", retries=2, backoff=0)
     with pytest.raises(OllamaError) as ei:
@@ -81,9 +91,9 @@ def test_embed_multiple_texts(monkeypatch):
         # Return a 2-dim vector to make assertions simple
         return FakeResponse(status=200, json_data={"embedding": [0.1, 0.2]})
 
-    monkeypatch.setattr(requests, "post", post_embeddings)
+    _stub_post(monkeypatch, post_embeddings)
 
-    c = OllamaClient("http://localhost:11434")
+    c = OllamaClient("http://localhost:11434", batch_embed=False)
     vecs = c.embed("nomic-embed-text", ["a", "b", "c"])
     assert len(vecs) == 3
     assert vecs[0] == [0.1, 0.2]
@@ -91,10 +101,71 @@ def test_embed_multiple_texts(monkeypatch):
     assert calls["payloads"][0]["model"] == "nomic-embed-text"
     assert calls["payloads"][0]["prompt"] == "a"
 
+def test_embed_batch_single_post(monkeypatch):
+    calls = []
+
+    def post_embed(url, json=None, timeout=None, stream=None, **kwargs):
+        calls.append((url, json))
+        return FakeResponse(status=200, json_data={"embeddings": [[float(i), 0.0] for i, _ in enumerate(json["input"])]})
+
+    _stub_post(monkeypatch, post_embed)
+
+    c = OllamaClient("http://localhost:11434")
+    vecs = c.embed("nomic-embed-text", ["a", "b", "c"])
+    assert vecs == [[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]]
+    assert len(calls) == 1
+    assert calls[0][0].endswith("/api/embed")
+    assert calls[0][1] == {"model": "nomic-embed-text", "input": ["a", "b", "c"]}
+
+def test_embed_falls_back_on_old_server_and_remembers_host(monkeypatch):
+    urls = []
+
+    def post_old_server(url, json=None, timeout=None, stream=None, **kwargs):
+        urls.append(url)
+        if url.endswith("/api/embed"):
+            return FakeResponse(status=404, json_data={})
+        return FakeResponse(status=200, json_data={"embedding": [0.5]})
+
+    _stub_post(monkeypatch, post_old_server)
+
+    c = OllamaClient("http://localhost:11434", retries=0)
+    assert c.embed("m", ["a", "b"]) == [[0.5], [0.5]]
+    assert [u.rsplit("/", 1)[-1] for u in urls] == ["embed", "embeddings", "embeddings"]
+
+    # A second client for the same host goes straight to the legacy path
+    urls.clear()
+    c2 = OllamaClient("http://localhost:11434/", retries=0)
+    assert c2.embed("m", ["x"]) == [[0.5]]
+    assert [u.rsplit("/", 1)[-1] for u in urls] == ["embeddings"]
+
+def test_embed_missing_model_404_is_not_treated_as_old_server(monkeypatch):
+    def post_missing_model(url, json=None, timeout=None, stream=None, **kwargs):
+        resp = FakeResponse(status=404, json_data={})
+        resp.text = '{"error":"model \\"m\\" not found, try pulling it first"}'
+        return resp
+
+    _stub_post(monkeypatch, post_missing_model)
+
+    c = OllamaClient("http://localhost:11434", retries=0)
+    with pytest.raises(OllamaError) as ei:
+        c.embed("m", ["a"])
+    assert ei.value.status == 404
+    assert "http://localhost:11434" not in ollama._EMBED_PATH_BY_HOST
+
+@pytest.mark.parametrize("body", [{"embeddings": [[0.1]]}, {"error": "out of memory"}, {}])
+def test_embed_bad_batch_answer_raises_and_keeps_the_batch_endpoint(monkeypatch, body):
+    _stub_post(monkeypatch, lambda url, **kw: FakeResponse(status=200, json_data=body))
+
+    c = OllamaClient("http://localhost:11434", retries=0)
+    with pytest.raises(OllamaError) as ei:
+        c.embed("m", ["a", "b"])
+    assert ei.value.status == 200
+    assert "http://localhost:11434" not in ollama._EMBED_PATH_BY_HOST
+
 def test_chat_non_stream(monkeypatch):
     def post_chat(url, json=None, timeout=None, stream=None, **kwargs):
         return FakeResponse(status=200, json_data={"message": {"content": "hello"}})
-    monkeypatch.setattr(requests, "post", post_chat)
+    _stub_post(monkeypatch, post_chat)
 
     c = OllamaClient("http://localhost:11434")
     out = c.chat("llama3:8b", [{"role": "user", "content": "hi"}], stream=False)
@@ -111,7 +182,7 @@ def test_chat_stream_emits_and_collects(monkeypatch):
     def post_chat(url, json=None, timeout=None, stream=None, **kwargs):
         assert stream is True
         return FakeResponse(status=200, lines=lines)
-    monkeypatch.setattr(requests, "post", post_chat)
+    _stub_post(monkeypatch, post_chat)
 
     chunks = []
     def on_chunk(s: str):
@@ -136,8 +207,42 @@ def test_chat_stream_handles_non_message_lines(monkeypatch):
     ]
     def post_chat(url, json=None, timeout=None, stream=None, **kwargs):
         return FakeResponse(status=200, lines=lines)
-    monkeypatch.setattr(requests, "post", post_chat)
+    _stub_post(monkeypatch, post_chat)
 
     c = OllamaClient("http://localhost:11434")
     full = c.chat("llama3:8b", [{"role": "user", "content": "x"}], stream=True)
     assert full == "AB"
+
+
+def test_session_is_pooled_and_shared_across_calls():
+    class RecordingSession:
+        def __init__(self):
+            self.urls = []
+        def post(self, url, **kwargs):
+            self.urls.append(url)
+            if url.endswith("/api/embed"):
+                return FakeResponse(status=200, json_data={"embeddings": [[0.1]]})
+            if kwargs.get("stream"):
+                return FakeResponse(status=200, lines=[json.dumps({"done": True})])
+            return FakeResponse(status=200, json_data={"message": {"content": "ok"}})
+
+    sess = RecordingSession()
+    c = OllamaClient("http://localhost:11434", session=sess)
+    c.embed("m", ["a"])
+    c.chat("llama3:8b", [{"role": "user", "content": "x"}], stream=True)
+    assert [u.rsplit("/", 1)[-1] for u in sess.urls] == ["embed", "chat"]
+
+    pooled = OllamaClient("http://localhost:11434", pool_size=4)
+    adapter = pooled._session.get_adapter("http://localhost:11434/api/embed")
+    assert adapter._pool_maxsize == 4
+    pooled.close()
+
+def test_keep_alive_off_sends_connection_close(monkeypatch):
+    seen = {}
+    def fake_post(url, json=None, timeout=None, stream=None, headers=None, **kwargs):
+        seen["headers"] = headers
+        return FakeResponse(status=200, json_data={"ok": True})
+    _stub_post(monkeypatch, fake_post)
+
+    OllamaClient("http://localhost:11434", keep_alive=False)._post("/api/ping", {})
+    assert seen["headers"]["Connection"] == "close"
@@ -0,0 +1,166 @@
+# tests/test_watch.py
+import threading
+
+import codebase_whisperer.pipelines.watch as watch
+
+
+class FakeSource:
+    """Hands out queued batches (None = a quiet wait); sets `stop` once drained."""
+
+    def __init__(self, batches, stop=None):
+        self.batches = list(batches)
+        self.stop = stop
+        self.waits = []
+        self.closed = False
+
+    def get(self, timeout):
+        self.waits.append(timeout)
+        if self.batches:
+            batch = self.batches.pop(0)
+            return None if batch is None else set(batch)
+        if self.stop is not None:
+            self.stop.set()
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+def test_coalesce_merges_a_burst_into_one_batch():
+    src = FakeSource([{"a.txt"}, {"b.txt", "a.txt"}, {watch.FULL_RESCAN, "c.txt"}])
+    rels, full = watch._coalesce(src, first_wait=1.0, debounce_s=0.25, max_wait_s=60)
+    assert rels == {"a.txt", "b.txt", "c.txt"} and full
+    assert src.waits == [1.0, 0.25, 0.25, 0.25]
+    assert watch._coalesce(src, first_wait=1.0, debounce_s=0.25, max_wait_s=60) is None
+
+
+def test_watch_ingest_reingests_only_touched_files(monkeypatch, tmp_path):
+    stop = threading.Event()
+    # one burst (a, b, a again), a quiet spell, then a directory-level event
+    src = FakeSource([{"b.txt", "a.txt"}, {"a.txt"}, None, {watch.FULL_RESCAN}], stop=stop)
+    calls = []
+    monkeypatch.setattr(watch, "_open_source", lambda *a, **kw: src)
+    monkeypatch.setattr(watch, "run_ingest", lambda **kw: calls.append(kw))
+
+    watch.watch_ingest(repo_root=str(tmp_path), db_dir=str(tmp_path / "db"), table_name="chunks", resume=True, stop=stop)
+
+    assert src.closed
+    assert [c.get("paths") for c in calls] == [None, ["a.txt", "b.txt"], None]
+    # the initial run picks up an interrupted run's checkpoint; later ones don't
+    assert calls[0]["force_reembed"] is False and calls[0]["resume"] is True
+    assert "resume" not in calls[2]
+
+
+def _walk_kwargs(**kw):
+    base = dict(
+        include_globs=["**/*.txt"],
+        exclude_globs=["**/target/**"],
+        follow_symlinks=False,
+        include_hidden=False,
+        ignore_files=[".gitignore"],
+    )
+    base.update(kw)
+    return base
+
+
+def test_event_filter_applies_the_walk_rules(tmp_path):
+    (tmp_path / ".gitignore").write_text("build/\n*.log.txt\n", encoding="utf-8")
+    judge = watch._EventFilter(tmp_path, _walk_kwargs(), skip_dir=tmp_path / "db")
+
+    def ev(rel, is_dir=False, kind="created"):
+        return judge(str(tmp_path / rel), is_dir=is_dir, event_type=kind)
+
+    assert ev("a.txt") == "a.txt"
+    assert ev("src/b.txt", kind="modified") == "src/b.txt"
+    assert ev("a.py") is None                         # not included
+    assert ev("target/c.txt") is None                 # excluded dir
+    assert ev("build/c.txt") is None                  # ignored dir
+    assert ev("x.log.txt") is None                    # ignored file
+    assert ev(".hidden/c.txt") is None                # hidden
+    assert ev("db/chunks.lance/data/0.txt") is None   # the DB's own writes
+    # directories: only ones the walk would enter mean a rescan
+    assert ev("pkg", is_dir=True) == watch.FULL_RESCAN
+    assert ev("pkg", is_dir=True, kind="modified") is None
+    for rel in ("target", "build", "build/out", ".cache", "db", "db/chunks.lance/_indices"):
+        assert ev(rel, is_dir=True) is None, rel
+    # changed ignore rules can move files in or out of the walk
+    assert ev(".gitignore", kind="modified") == watch.FULL_RESCAN
+    assert ev("build/.gitignore") is None
+
+
+def test_watchdog_source_drops_db_and_ignored_noise(tmp_path):
+    import time
+    import pytest
+
+    pytest.importorskip("watchdog")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".gitignore").write_text("build/\n", encoding="utf-8")
+    src = watch._WatchdogSource(repo.resolve(), _walk_kwargs(), skip_dir=repo / "db")
+
+    def drain(quiet_s=0.5, max_s=5.0):
+        got, end = set(), time.monotonic() + max_s
+        while time.monotonic() < end:
+            more = src.get(quiet_s)
+            if more is None and got:
+                break
+            got |= more or set()
+        return got
+
+    try:
+        # LanceDB-style writes inside the repo, build output, excluded trees
+        (repo / "db" / "chunks.lance" / "_indices").mkdir(parents=True)
+        (repo / "db" / "chunks.lance" / "data.txt").write_text("x", encoding="utf-8")
+        (repo / "build" / "classes").mkdir(parents=True)
+        (repo / "build" / "out.txt").write_text("x", encoding="utf-8")
+        (repo / "target").mkdir()
+        (repo / "target" / "t.txt").write_text("x", encoding="utf-8")
+        (repo / "a.txt").write_text("hello", encoding="utf-8")
+        assert drain() == {"a.txt"}
+
+        (repo / "pkg").mkdir()
+        assert watch.FULL_RESCAN in drain()
+    finally:
+        src.close()
+
+
+def test_watch_ingest_survives_a_failed_run_and_retries_its_files(monkeypatch, tmp_path):
+    stop = threading.Event()
+    src = FakeSource([{"a.txt"}, None, {"b.txt"}], stop=stop)
+    calls = []
+
+    def run_ingest(**kw):
+        calls.append(kw)
+        if len(calls) == 2:
+            raise ConnectionError("ollama is restarting")
+
+    monkeypatch.setattr(watch, "_open_source", lambda *a, **kw: src)
+    monkeypatch.setattr(watch, "run_ingest", run_ingest)
+
+    watch.watch_ingest(repo_root=str(tmp_path), db_dir=str(tmp_path / "db"), table_name="chunks", stop=stop)
+
+    # the failed a.txt waits out the quiet spell (retry not due yet), then rides along with b.txt
+    assert [c.get("paths") for c in calls] == [None, ["a.txt"], ["a.txt", "b.txt"]]
+    assert src.closed
+
+
+def test_polling_source_walks_at_most_once_per_poll(monkeypatch, tmp_path):
+    import time
+
+    walks = []
+    real_iter_entries = watch.iter_entries
+    monkeypatch.setattr(watch, "iter_entries", lambda *a, **kw: walks.append(1) or real_iter_entries(*a, **kw))
+    (tmp_path / "a.txt").write_text("x", encoding="utf-8")
+    src = watch._PollingSource(tmp_path, _walk_kwargs(ignore_files=[]), poll_s=0.3, skip_dir=tmp_path / "db")
+    assert len(walks) == 1
+
+    # short waits don't walk early: ~1.2 s of 0.05 s waits is ~4 polls, not ~24
+    end = time.monotonic() + 1.2
+    while time.monotonic() < end:
+        assert src.get(0.05) is None
+    assert 3 <= len(walks) - 1 <= 5
+
+    (tmp_path / "b.txt").write_text("y", encoding="utf-8")
+    (tmp_path / "db").mkdir()
+    (tmp_path / "db" / "c.txt").write_text("z", encoding="utf-8")
+    assert src.get(1.0) == {"b.txt"}